@@ -4,21 +4,197 @@ Oracle Biblico PRO - Web Interface with Matrix-like Biblical Theme
 Modern API backend with enhanced analysis pipeline
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
+import gc
 import json
+import queue
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import sys
 sys.path.insert(0, str(Path(__file__).parent / 'scripts'))
 
 from analysis_pipeline import BiblicalAnalysisPipeline
+from audio_cache import AudioRenderCache
+from http_cache import (COMPRESS_MIN_BYTES, COMPRESSIBLE_TYPES, IMMUTABLE, REVALIDATE,
+                        EncodedBodyCache, StaticVersions, choose_encoding, etag_for)
+from instrumentation import PROMETHEUS_CONTENT_TYPE, configure_logging, metrics
+from result_cache import ResultCache, SharedCacheTier
+
+# ORACLE_LOG_LEVEL=DEBUG|INFO|WARNING|ERROR|OFF
+configure_logging()
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
 CORS(app)
+app.json.compact = True  # API bodies are never pretty-printed, even in debug mode
+
+# Conditional GETs and compression (see finalize_response); static URLs carry
+# a ?v=<content hash> so browsers can keep them for a year
+static_versions = StaticVersions(app.static_folder)
+encoded_bodies = EncodedBodyCache(max_entries=512)
+STORED_RESULT_CACHE_CONTROL = 'private, max-age=86400'  # stored results never change
+
+# Initialize pipeline (results cached in memory and in outputs/cache/results.sqlite,
+# which every worker process of a multi-worker server shares).
+# Cheap: indexes, lexicon and the result store load on first use or at warm-up.
+result_cache = ResultCache(max_entries=2048, ttl_seconds=24 * 3600,
+                           shared=SharedCacheTier('outputs/cache/results.sqlite'))
+pipeline = BiblicalAnalysisPipeline(cache=result_cache)
+# Read-only resources loaded by the server master before it forks workers
+# (see gunicorn.conf.py); the result store opens SQLite, so each worker opens its own
+PRELOAD_RESOURCES = ['gematria_index', 'lexicon', 'concept_index', 'hot_queries']
+MAX_BATCH_QUERIES = 1000
+MAX_RECENT_RESULTS = 100
+
+# On-demand audio renders (cached under outputs/audio_cache)
+audio_cache = AudioRenderCache()
+MAX_AUDIO_SECONDS = 600
+MAX_AUDIO_FREQUENCIES = 8
+
+# Counters kept by the cache and coalescer, exported on /api/metrics
+for _name, _help, _read in (
+        ('oracle_cache_entries', 'Results held in the in-memory cache',
+         lambda: result_cache.stats()['entries']),
+        ('oracle_cache_hits_total', 'Result cache hits (memory and disk)',
+         lambda: result_cache.stats()['hits'] + result_cache.stats()['disk_hits']),
+        ('oracle_cache_misses_total', 'Result cache misses',
+         lambda: result_cache.stats()['misses']),
+        ('oracle_coalesced_requests_total', 'Analyze calls that joined an in-flight computation',
+         lambda: pipeline.flight.stats()['coalesced'])):
+    metrics.callback(_name, _help, _read, kind='counter' if _name.endswith('_total') else 'gauge')
+
+def parse_audio_params(args) -> Dict:
+    """Validates ?freq=432,528&volume=0.1&duration=120&fade=3 into render params"""
+    frequencies = [float(f) for f in args.get('freq', '432,528').split(',') if f.strip()]
+    volume = float(args.get('volume', 0.1))
+    duration = float(args.get('duration', 120))
+    fade = float(args.get('fade', 3))
+    
+    if not 1 <= len(frequencies) <= MAX_AUDIO_FREQUENCIES:
+        raise ValueError(f'Between 1 and {MAX_AUDIO_FREQUENCIES} frequencies are required')
+    if not all(20 <= f <= 20000 for f in frequencies):
+        raise ValueError('Frequencies must be between 20 and 20000 Hz')
+    if not 0 < volume * len(frequencies) <= 1:
+        raise ValueError('Combined volume must be between 0 and 1')
+    if not 0 < duration <= MAX_AUDIO_SECONDS:
+        raise ValueError(f'Duration must be between 0 and {MAX_AUDIO_SECONDS} seconds')
+    if not 0 <= fade <= duration / 2:
+        raise ValueError('Fade must be between 0 and half the duration')
+    
+    return {
+        'frequencies': frequencies,
+        'amplitudes': [volume] * len(frequencies),
+        'duration': duration,
+        'fade': fade
+    }
+
+def analysis_response(query: str, result: Dict) -> Dict:
+    """JSON body returned by /api/analyze (shared with the ASGI server)"""
+    return {
+        'status': 'success',
+        'query': query,
+        'result_id': result.get('result_id'),
+        'analysis': result,
+        'layers': result.get('analysis_layers', []),
+        'synthesis': result.get('synthesis', {})
+    }
+
+def profile_requested(args) -> bool:
+    """?profile=1 asks for a cProfile dump of this request (see outputs/profiles)"""
+    return args.get('profile', '').lower() in ('1', 'true', 'yes')
+
+def format_sse(event: str, data: Dict) -> str:
+    """One server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def layer_event(name: str, result: Optional[Dict], error: Optional[str]) -> str:
+    """SSE frame for one finished (or failed) analysis layer"""
+    return format_sse('layer', {'layer': name, 'result': result, 'error': error})
+
+def done_event(result: Dict) -> str:
+    """Final SSE frame, sent once every layer has been reported"""
+    return format_sse('done', {
+        'result_id': result.get('result_id'),
+        'layer_errors': result.get('layer_errors', {}),
+        'metrics': result.get('metrics', {})
+    })
+
+def preload_for_workers() -> Dict:
+    """Loads read-only resources in the master process, before workers are forked
+    
+    Workers then share those pages copy-on-write instead of each loading its
+    own copy; gc.freeze() keeps the collector from touching (and so copying)
+    the preloaded objects in every worker.
+    """
+    status = pipeline.resources.warm_up(PRELOAD_RESOURCES)
+    gc.freeze()
+    return status
+
+def warm_up_in_background() -> threading.Thread:
+    """Loads pipeline resources without delaying startup; see /api/health/ready"""
+    thread = threading.Thread(target=pipeline.warm_up, name='pipeline-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def not_modified(etag: str) -> Optional[Response]:
+    """304 for a view that knows its ETag before doing any work, if the client has it"""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
 
-# Initialize pipeline
-pipeline = BiblicalAnalysisPipeline()
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+@app.url_defaults
+def version_static_urls(endpoint, values):
+    """url_for('static', ...) gets ?v=<content hash>, so a changed file gets a new URL"""
+    if endpoint == 'static' and 'v' not in values:
+        version = static_versions.version(values['filename'])
+        if version:
+            values['v'] = version
+
+@app.after_request
+def finalize_response(response):
+    """ETags, 304s and gzip/brotli for JSON responses; immutable static files at their hash
+    
+    GETs get an ETag (a content hash unless the view set one) and a matching
+    If-None-Match is answered with 304. Bodies of at least COMPRESS_MIN_BYTES
+    are compressed when the client accepts it; the ETag becomes weak since
+    the bytes now depend on the coding, and compressed bodies are reused for
+    the same ETag.
+    """
+    if request.endpoint == 'static' and request.args.get('v'):
+        # Only the current hash may be cached for a year: a stale or made-up
+        # ?v= must not pin whatever the file holds right now
+        current = static_versions.version(request.view_args['filename'])
+        response.headers['Cache-Control'] = (IMMUTABLE if request.args['v'] == current
+                                             else REVALIDATE)
+    if (response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    
+    if request.method in ('GET', 'HEAD') and response.status_code == 200:
+        if not response.get_etag()[0]:
+            response.add_etag()
+        response.headers.setdefault('Cache-Control', REVALIDATE)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if (encoding is None or 'Content-Encoding' in response.headers
+            or (response.content_length or 0) < COMPRESS_MIN_BYTES):
+        return response
+    
+    etag, _ = response.get_etag()
+    response.set_data(encoded_bodies.get_or_compress(etag, encoding, response.get_data()))
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)  # If-None-Match compares weakly, so it still matches
+    return response
 
 # Routes
 @app.route('/')
@@ -37,14 +213,68 @@ def analyze():
             return jsonify({'error': 'Query is required'}), 400
         
         # Execute analysis
-        result = pipeline.analyze(query)
+        result = pipeline.analyze(query, profile=profile_requested(request.args))
+        
+        return jsonify(analysis_response(query, result)), 200
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/analyze/stream')
+def analyze_stream():
+    """Streams each analysis layer as a server-sent event as soon as it finishes"""
+    query = request.args.get('query', '')
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+    
+    events = queue.Queue()
+    profile = profile_requested(request.args)
+    
+    def run():
+        try:
+            result = pipeline.analyze(query, lambda *layer: events.put(layer_event(*layer)),
+                                      profile=profile)
+            events.put(done_event(result))
+        except Exception as e:
+            events.put(format_sse('error', {'message': str(e)}))
+        finally:
+            events.put(None)
+    
+    threading.Thread(target=run, name='analysis-stream', daemon=True).start()
+    
+    def generate():
+        while (frame := events.get()) is not None:
+            yield frame
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers=SSE_HEADERS)
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """API endpoint for analyzing many queries in one call"""
+    try:
+        data = request.get_json() or {}
+        queries = data.get('queries', [])
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'queries must be a non-empty list'}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}), 400
+        if not all(isinstance(q, str) and q for q in queries):
+            return jsonify({'error': 'Every query must be a non-empty string'}), 400
+        
+        results = pipeline.analyze_batch(queries)
         
         return jsonify({
             'status': 'success',
-            'query': query,
-            'analysis': result,
-            'layers': result.get('analysis_layers', []),
-            'synthesis': result.get('synthesis', {})
+            'count': len(results),
+            'results': [
+                {'query': query, 'analysis': result}
+                for query, result in zip(queries, results)
+            ]
         }), 200
     
     except Exception as e:
@@ -55,36 +285,130 @@ def analyze():
 
 @app.route('/api/results')
 def get_results():
-    """Retrieve last analysis results"""
+    """Retrieve recent analysis results (?limit=N) or the latest one"""
     try:
-        results_file = Path('outputs/analysis_results.json')
-        if results_file.exists():
-            with open(results_file, 'r', encoding='utf-8') as f:
-                results = json.load(f)
-            return jsonify({
-                'status': 'success',
-                'results': results
-            }), 200
-        else:
+        limit = request.args.get('limit', type=int)
+        count = min(limit or 1, MAX_RECENT_RESULTS)
+        # Results never change once stored, so their ids identify the response:
+        # a client that already has it gets a 304 before any payload is decoded
+        ids = pipeline.store.recent_ids(count)
+        etag = etag_for('results', limit or 0, *ids)
+        if ids and (cached := not_modified(etag)):
+            return cached
+        
+        results = pipeline.store.recent(count)
+        if not results:
             return jsonify({
                 'status': 'error',
                 'message': 'No results found'
             }), 404
+        response = jsonify({
+            'status': 'success',
+            'results': results if limit else results[0]
+        })
+        response.set_etag(etag)
+        return response
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
+@app.route('/api/results/<result_id>')
+def get_result(result_id):
+    """Retrieve one analysis result by id"""
+    try:
+        etag = etag_for('result', result_id)
+        if cached := not_modified(etag):
+            return cached
+        
+        result = pipeline.store.get(result_id)
+        if result is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'Result not found'
+            }), 404
+        response = jsonify({
+            'status': 'success',
+            'results': result
+        })
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = STORED_RESULT_CACHE_CONTROL
+        return response
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/audio')
+def audio():
+    """Renders (or serves from cache) a tone/blend WAV with HTTP Range support"""
+    try:
+        params = parse_audio_params(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The render is fully determined by its params, so their hash is the ETag
+    etag = audio_cache.key(params)
+    if cached := not_modified(etag):
+        return cached
+    
+    path = audio_cache.get(params)
+    if path is None and request.range is not None:
+        # Byte ranges need the whole file, so render it first
+        path = audio_cache.render(params)
+    if path is not None:
+        response = send_file(path, mimetype='audio/wav', conditional=True, etag=etag)
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+    
+    # First listener: stream chunks as they are rendered while filling the cache
+    response = Response(stream_with_context(audio_cache.render_stream(params)),
+                        mimetype='audio/wav')
+    response.headers['Content-Length'] = str(audio_cache.size_for(params))
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Analysis result cache, request coalescing and hot query table counters"""
+    try:
+        hot = pipeline.hot_queries
+    except Exception:
+        hot = None  # failed to load: /api/health/ready reports why
+    return jsonify({
+        'status': 'success',
+        'cache': result_cache.stats(),
+        'coalescing': pipeline.flight.stats(),
+        'precomputed': hot.stats() if hot is not None else None
+    }), 200
+
+@app.route('/api/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint: layer timings, retrieval sizes, cache counters"""
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.route('/api/health')
 def health():
-    """Health check endpoint"""
+    """Liveness: the process is up and serving requests"""
     return jsonify({
         'status': 'healthy',
         'service': 'Oracle Biblico PRO',
         'version': '1.0.0'
     }), 200
 
+@app.route('/api/health/ready')
+def ready():
+    """Readiness: every pipeline resource has been loaded (503 while warming up)"""
+    readiness = pipeline.readiness()
+    return jsonify({
+        'status': 'ready' if readiness['ready'] else 'warming_up',
+        **readiness
+    }), 200 if readiness['ready'] else 503
+
 if __name__ == '__main__':
     print("")
     print("╔════════════════════════════════════════════════════════════╗")
@@ -94,6 +418,8 @@ if __name__ == '__main__':
     print("")
     print("🌐 Starting server...")
     print("📱 Access interface: http://localhost:5000")
+    print("⚡ Async server: uvicorn asgi:app --port 5000")
     print("")
     
+    warm_up_in_background()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - ASGI Server
+Async analysis endpoints and layer streaming; other routes are served by the Flask app
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.wsgi import WSGIMiddleware
+
+from app import (MAX_BATCH_QUERIES, SSE_HEADERS, analysis_response, app as flask_app,
+                 done_event, format_sse, layer_event, pipeline, profile_requested,
+                 warm_up_in_background)
+from http_cache import encode_json
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Accept connections right away; /api/health/ready reports when loading is done"""
+    warm_up_in_background()
+    yield
+
+app = FastAPI(title="Oracle Biblico PRO", docs_url=None, redoc_url=None, lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"],
+                   allow_headers=["*"])
+
+@app.post('/api/analyze')
+async def analyze(request: Request):
+    """API endpoint for biblical analysis; layers are awaited, not blocked on"""
+    try:
+        data = await request.json()
+        query = data.get('query', '')
+
+        if not query:
+            return JSONResponse({'error': 'Query is required'}, 400)
+
+        result = await pipeline.analyze_async(query,
+                                              profile=profile_requested(request.query_params))
+        # Compact and, when large enough and accepted, gzip/brotli-compressed
+        body, headers = encode_json(analysis_response(query, result),
+                                    request.headers.get('accept-encoding', ''))
+        return Response(body, media_type='application/json', headers=headers)
+
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, 500)
+
+@app.post('/api/analyze/batch')
+async def analyze_batch(request: Request):
+    """API endpoint for analyzing many queries in one call"""
+    try:
+        data = await request.json() or {}
+        queries = data.get('queries', [])
+
+        if not isinstance(queries, list) or not queries:
+            return JSONResponse({'error': 'queries must be a non-empty list'}, 400)
+        if len(queries) > MAX_BATCH_QUERIES:
+            return JSONResponse({'error': f'At most {MAX_BATCH_QUERIES} queries per batch'}, 400)
+        if not all(isinstance(q, str) and q for q in queries):
+            return JSONResponse({'error': 'Every query must be a non-empty string'}, 400)
+
+        # Batches fan out to a process pool; only the wait happens on a thread
+        results = await run_in_threadpool(pipeline.analyze_batch, queries)
+        # Large bodies: serialize and compress off the event loop too
+        body, headers = await run_in_threadpool(encode_json, {
+            'status': 'success',
+            'count': len(results),
+            'results': [
+                {'query': query, 'analysis': result}
+                for query, result in zip(queries, results)
+            ]
+        }, request.headers.get('accept-encoding', ''))
+        return Response(body, media_type='application/json', headers=headers)
+
+    except Exception as e:
+        return JSONResponse({'status': 'error', 'message': str(e)}, 500)
+
+@app.get('/api/analyze/stream')
+async def analyze_stream(request: Request, query: str = ''):
+    """Streams each analysis layer as a server-sent event as soon as it finishes"""
+    if not query:
+        return JSONResponse({'error': 'Query is required'}, 400)
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        try:
+            result = await pipeline.analyze_async(
+                query, lambda *layer: events.put_nowait(layer_event(*layer)),
+                profile=profile_requested(request.query_params))
+            events.put_nowait(done_event(result))
+        except Exception as e:
+            events.put_nowait(format_sse('error', {'message': str(e)}))
+        finally:
+            events.put_nowait(None)
+
+    async def generate():
+        task = asyncio.create_task(run())
+        try:
+            while (frame := await events.get()) is not None:
+                yield frame
+        finally:
+            # Client went away: stop waiting on layers nobody will read
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+# Everything else (page, static files, results, audio, health) is the Flask app
+app.mount('/', WSGIMiddleware(flask_app))
+
+if __name__ == '__main__':
+    import uvicorn
+
+    print("")
+    print("🔮 Oracle Biblico PRO - ASGI server")
+    print("📱 Access interface: http://localhost:5000")
+    print("")
+    uvicorn.run(app, host='0.0.0.0', port=5000)
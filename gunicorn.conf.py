@@ -0,0 +1,32 @@
+"""
+Oracle Biblico PRO - Production Server Profile
+Multi-process gunicorn configuration with read-only resources preloaded before fork
+
+    gunicorn -c gunicorn.conf.py                    # ASGI app, uvicorn workers
+    gunicorn -c gunicorn.conf.py -k gthread app:app  # Flask app only, threaded workers
+
+ORACLE_WORKERS (default: CPU count), ORACLE_THREADS (gthread only, default 8)
+and ORACLE_BIND (default 0.0.0.0:5000) tune it.
+"""
+
+import os
+
+wsgi_app = "asgi:app"
+bind = os.environ.get("ORACLE_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("ORACLE_WORKERS", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+threads = int(os.environ.get("ORACLE_THREADS", "8"))
+# The app is imported once in the master, so preload_for_workers() runs before fork
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Master is up and no worker has been forked yet: load shared resources now"""
+    from app import preload_for_workers
+
+    status = preload_for_workers()
+    loaded = [name for name, resource in status.items() if resource["available"]]
+    server.log.info("Preloaded for workers: %s", ", ".join(loaded) or "nothing")
@@ -4,61 +4,259 @@ Oracle Biblico PRO - Biblical Analysis Pipeline
 Executes comprehensive 5-layer biblical text analysis
 """
 
+import argparse
+import asyncio
 import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from concept_index import (CONCEPT_TERMS, HISTORICAL_TERMS, ConceptIndex,
+                           load_concept_index, match_vocabulary)
+from gematria import GematriaIndex, gematria, load_index, word_breakdown, words
+from hot_queries import HotQueryStore, load_hot_queries
+from instrumentation import SIZE_BUCKETS, RequestProfiler, configure_logging, metrics
+from layer_scheduler import Layer, LayerCallback, LayerScheduler
+from lexicon import Lexicon, load_lexicon, script_language
+from result_cache import ResultCache, cache_key
+from resources import ResourceRegistry
+from result_store import ResultStore
+from single_flight import SingleFlight
+
+# Bump when a layer's output changes so cached results are not reused
+PIPELINE_VERSION = "1.0.0"
+LAYER_VERSIONS = {
+    "linguistic": 2,
+    "numerical": 2,
+    "historical": 2,
+    "theological": 2,
+    "synthesis": 1
+}
+
+# Layers 1-4 are independent; only the synthesis waits on them
+ANALYSIS_LAYERS = ["linguistic", "numerical", "historical", "theological"]
+LAYER_TIMEOUT_SECONDS = 30.0
+MAX_MATCHING_VERSES = 20
+# Cross-reference walk bounds for "related passages"
+RELATED_SEEDS = 50
+RELATED_DEPTH = 2
+
+logger = logging.getLogger("oracle_biblico.pipeline")
+
+LAYER_WALL_SECONDS = metrics.histogram(
+    "oracle_layer_wall_seconds", "Wall time per analysis layer", ["layer"])
+LAYER_CPU_SECONDS = metrics.histogram(
+    "oracle_layer_cpu_seconds", "CPU time per analysis layer on its worker thread", ["layer"])
+LAYER_ERRORS = metrics.counter(
+    "oracle_layer_errors_total", "Analysis layers that failed or timed out", ["layer"])
+ANALYZE_SECONDS = metrics.histogram(
+    "oracle_analyze_seconds", "End-to-end analyze latency by cache outcome", ["cache"])
+RETRIEVAL_SIZE = metrics.histogram(
+    "oracle_retrieval_size", "Items retrieved per analysis", ["kind"], buckets=SIZE_BUCKETS)
 
 class BiblicalAnalysisPipeline:
-    """Performs 5-layer analysis on biblical texts"""
+    """Performs 5-layer analysis on biblical texts
+    
+    Construction is cheap: indexes, the lexicon and the result store are
+    registered as lazy resources, loaded on first use or by warm_up().
+    
+    Every result carries a "metrics" block (per-layer wall/CPU milliseconds,
+    retrieval sizes, cache outcome) and the same figures feed the process-wide
+    Prometheus histograms in instrumentation.metrics.
+    
+    Queries materialized by hot_queries.py are answered from that
+    memory-mapped table (cache outcome "precomputed") without running any
+    layer; a table built for another pipeline version is ignored.
+    """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResultCache] = None,
+                 layer_timeout: float = LAYER_TIMEOUT_SECONDS,
+                 store: Optional[ResultStore] = None,
+                 gematria_index: Optional[GematriaIndex] = None,
+                 lexicon: Optional[Lexicon] = None,
+                 concept_index: Optional[ConceptIndex] = None,
+                 profiler: Optional[RequestProfiler] = None,
+                 hot_queries: Optional[HotQueryStore] = None):
         self.results_dir = Path("outputs")
+        self.cache = cache if cache is not None else ResultCache()
+        self.profiler = profiler if profiler is not None else RequestProfiler.from_env()
+        self.resources = ResourceRegistry()
+        self.version = {"pipeline": PIPELINE_VERSION, "layers": LAYER_VERSIONS}
+        # Indexes are built by prepare_training_data; layers degrade without them
+        for name, value, loader in (
+                ("result_store", store, self._open_store),
+                ("gematria_index", gematria_index, load_index),
+                ("lexicon", lexicon, load_lexicon),
+                ("concept_index", concept_index, load_concept_index),
+                ("hot_queries", hot_queries,
+                 lambda: load_hot_queries(version=self.version))):
+            if value is not None:
+                self.resources.provide(name, value)
+            else:
+                self.resources.register(name, loader)
+        # Identical queries arriving together share one computation
+        self.flight = SingleFlight()
+        self.scheduler = LayerScheduler([
+            Layer("linguistic", self.linguistic_analysis, resources=["lexicon"]),
+            Layer("numerical", self.numerical_analysis, resources=["gematria_index"]),
+            Layer("historical", self.historical_analysis, resources=["concept_index"]),
+            Layer("theological", self.theological_analysis, resources=["concept_index"]),
+            Layer("synthesis",
+                  lambda query, deps: self.integrated_synthesis(
+                      [deps[name] for name in ANALYSIS_LAYERS if name in deps]),
+                  depends_on=ANALYSIS_LAYERS)
+        ], default_timeout=layer_timeout)
+    
+    def _open_store(self) -> ResultStore:
         self.results_dir.mkdir(parents=True, exist_ok=True)
-        print("Initializing Biblical Analysis Pipeline")
-        print("5-Layer Analysis Framework:")
-        print("  1. Linguistic (Hebrew/Greek/Aramaic)")
-        print("  2. Numerical (Gematria values)")
-        print("  3. Historical (Archaeological context)")
-        print("  4. Theological (Divine concepts)")
-        print("  5. Integrated (Complete synthesis)")
+        return ResultStore(str(self.results_dir / "results.db"))
+    
+    @property
+    def store(self) -> ResultStore:
+        return self.resources.get("result_store")
+    
+    @property
+    def gematria_index(self) -> Optional[GematriaIndex]:
+        return self.resources.get("gematria_index")
+    
+    @property
+    def lexicon(self) -> Optional[Lexicon]:
+        return self.resources.get("lexicon")
+    
+    @property
+    def concept_index(self) -> Optional[ConceptIndex]:
+        return self.resources.get("concept_index")
+    
+    @property
+    def hot_queries(self) -> Optional[HotQueryStore]:
+        return self.resources.get("hot_queries")
+    
+    def _precomputed(self, key: str) -> Optional[Dict]:
+        """The materialized result for a cache key, if the hot query table has one"""
+        try:
+            hot = self.hot_queries
+        except Exception:
+            return None  # reported by readiness(); never fails an analysis
+        return hot.get(key) if hot is not None else None
+    
+    def _lookup(self, key: str) -> Tuple[Optional[Dict], str]:
+        """A cached or precomputed result for a cache key and which it was, else (None, "miss")"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, "hit"
+        precomputed = self._precomputed(key)
+        if precomputed is not None:
+            return precomputed, "precomputed"
+        return None, "miss"
+    
+    def warm_up(self) -> Dict:
+        """Loads every resource now instead of on the first request"""
+        logger.info("Initializing Biblical Analysis Pipeline (layers: %s)",
+                    ", ".join(self.scheduler.order))
+        return self.resources.warm_up()
+    
+    def readiness(self) -> Dict:
+        """Resource load states and which layers have everything they need"""
+        layers = self.scheduler.layers.values()
+        return {
+            "ready": self.resources.ready(),
+            "layers": {layer.name: self.resources.ready(layer.resources) for layer in layers},
+            "resources": self.resources.status()
+        }
     
     def linguistic_analysis(self, text: str) -> Dict:
         """Layer 1: Language structure and semantics"""
+        if self.lexicon is not None:
+            tokens = self.lexicon.analyze(text)
+        else:
+            tokens = [{"token": word, "language": script_language(word), "analyses": []}
+                      for word in words(text)]
+        
+        languages, fields, features = [], [], []
+        for token in tokens:
+            candidates = [token["language"]] + [a["language"] for a in token["analyses"]]
+            languages.extend(language for language in candidates if language)
+            fields.extend(a["domain"] for a in token["analyses"] if a["domain"])
+            features.extend(a["morph"] for a in token["analyses"] if a["morph"])
+        known = sum(1 for token in tokens if token["analyses"])
         return {
             "language_layer": {
-                "original_languages": ["Hebrew", "Greek", "Aramaic"],
-                "semantic_fields": ["divine_action", "covenant", "redemption"],
-                "grammatical_features": ["tense", "mood", "voice"]
+                "original_languages": list(dict.fromkeys(languages)),
+                "semantic_fields": list(dict.fromkeys(fields)),
+                "grammatical_features": list(dict.fromkeys(features)),
+                "tokens": tokens,
+                "lexicon_coverage": round(known / len(tokens), 3) if tokens else 0.0
             }
         }
     
     def numerical_analysis(self, text: str) -> Dict:
         """Layer 2: Gematria and numerical patterns"""
+        values = gematria(text)
+        matching = {}
+        if self.gematria_index is not None:
+            for method, value in values.items():
+                if value:
+                    matching[method] = {
+                        "count": self.gematria_index.count_with_value(value, method),
+                        "verses": self.gematria_index.verses_with_value(
+                            value, method, MAX_MATCHING_VERSES)
+                    }
         return {
             "numerical_layer": {
-                "gematria_values": {"sample": 26},
-                "pattern_analysis": "Hebrew letter values",
+                "gematria_values": values,
+                "word_values": word_breakdown(text),
+                "matching_verses": matching,
+                "pattern_analysis": "Hebrew and Greek letter values",
                 "numeric_significance": "Sacred numbers"
             }
         }
     
+    def _occurrences(self, groups: Dict[str, List[str]]) -> Dict:
+        """Corpus-wide verse counts and sample references per concept or period"""
+        if self.concept_index is None:
+            return {}
+        occurrences = {}
+        for name, terms in groups.items():
+            rows = self.concept_index.occurrences(terms)
+            occurrences[name] = {
+                "count": int(len(rows)),
+                "verses": self.concept_index.refs_for(rows, MAX_MATCHING_VERSES)
+            }
+        return occurrences
+    
     def historical_analysis(self, text: str) -> Dict:
         """Layer 3: Historical and archaeological context"""
+        periods = match_vocabulary(text, HISTORICAL_TERMS)
         return {
             "historical_layer": {
-                "archaeological_evidence": "Cross-referenced",
-                "chronological_context": "Second Temple Period",
+                "chronological_context": list(periods),
+                "period_occurrences": self._occurrences(periods),
                 "cultural_background": "Ancient Near East"
             }
         }
     
     def theological_analysis(self, text: str) -> Dict:
         """Layer 4: Theological concepts and doctrines"""
+        concepts = match_vocabulary(text, CONCEPT_TERMS)
+        related = {}
+        if self.concept_index is not None:
+            # Verses sharing the query's terms, then their cross-reference neighbourhood
+            matches = self.concept_index.intersect(words(text))
+            related = {
+                "matches": self.concept_index.refs_for(matches, MAX_MATCHING_VERSES),
+                "cross_references": self.concept_index.related(
+                    matches[:RELATED_SEEDS], RELATED_DEPTH, MAX_MATCHING_VERSES)
+            }
         return {
             "theological_layer": {
-                "core_concepts": ["covenant", "messiah", "kingdom"],
-                "doctrinal_themes": "Salvation history",
-                "prophetic_fulfillment": "Cross-testament connections"
+                "core_concepts": list(concepts),
+                "concept_occurrences": self._occurrences(concepts),
+                "related_passages": related
             }
         }
     
@@ -72,37 +270,302 @@ class BiblicalAnalysisPipeline:
             }
         }
     
-    def analyze(self, query: str) -> Dict:
-        """Execute full analysis pipeline"""
-        print(f"\nAnalyzing: {query}")
-        print("="*50)
-        
-        analyses = []
-        analyses.append(self.linguistic_analysis(query))
-        analyses.append(self.numerical_analysis(query))
-        analyses.append(self.historical_analysis(query))
-        analyses.append(self.theological_analysis(query))
-        
-        synthesis = self.integrated_synthesis(analyses)
+    @staticmethod
+    def _retrieval_sizes(results: Dict[str, Dict]) -> Dict[str, int]:
+        """How much each layer pulled from the indexes for this query"""
+        language = results.get("linguistic", {}).get("language_layer", {})
+        numerical = results.get("numerical", {}).get("numerical_layer", {})
+        historical = results.get("historical", {}).get("historical_layer", {})
+        theological = results.get("theological", {}).get("theological_layer", {})
+        related = theological.get("related_passages", {})
+        return {
+            "tokens": len(language.get("tokens", [])),
+            "lexicon_analyses": sum(len(token["analyses"])
+                                    for token in language.get("tokens", [])),
+            "gematria_matches": sum(match["count"]
+                                    for match in numerical.get("matching_verses", {}).values()),
+            "period_occurrences": sum(occurrence["count"] for occurrence
+                                      in historical.get("period_occurrences", {}).values()),
+            "concept_occurrences": sum(occurrence["count"] for occurrence
+                                       in theological.get("concept_occurrences", {}).values()),
+            "related_matches": len(related.get("matches", [])),
+            "cross_references": len(related.get("cross_references", []))
+        }
+    
+    @classmethod
+    def _assemble(cls, query: str, run) -> Dict:
+        """Builds the result document from a scheduler run"""
+        analyses = [run.results[name] for name in ANALYSIS_LAYERS if name in run.results]
         
         result = {
             "query": query,
             "analysis_layers": analyses,
-            "synthesis": synthesis
+            "synthesis": run.results.get("synthesis", {}),
+            "metrics": {
+                "layers": {name: {"wall_ms": round(run.timings[name] * 1000, 3),
+                                  "cpu_ms": round(run.cpu_timings[name] * 1000, 3)
+                                  if name in run.cpu_timings else None}
+                           for name in run.timings},
+                "retrieval": cls._retrieval_sizes(run.results)
+            }
         }
+        if run.partial:
+            result["layer_errors"] = run.errors
+        return result
+    
+    def _run_layers(self, query: str, on_layer: Optional[LayerCallback] = None) -> Dict:
+        """Runs all layers for one query without touching the cache or disk"""
+        return self._assemble(query, self.scheduler.run(query, on_layer))
+    
+    @staticmethod
+    def _record(result: Dict):
+        """Feeds a computed result's metrics block into the Prometheus histograms"""
+        block = result.get("metrics", {})
+        for name, timing in block.get("layers", {}).items():
+            LAYER_WALL_SECONDS.observe(timing["wall_ms"] / 1000, layer=name)
+            if timing["cpu_ms"] is not None:
+                LAYER_CPU_SECONDS.observe(timing["cpu_ms"] / 1000, layer=name)
+        for kind, size in block.get("retrieval", {}).items():
+            RETRIEVAL_SIZE.observe(size, kind=kind)
+        for name, error in result.get("layer_errors", {}).items():
+            LAYER_ERRORS.inc(layer=name)
+            logger.warning("Layer %s failed: %s", name, error)
+    
+    @staticmethod
+    def _observe(result: Dict, outcome: str, started: float) -> Dict:
+        """Records one analyze call; returns the result with this call's cache outcome
+        
+        The cached document is shared, so the per-call fields go on a shallow copy.
+        """
+        elapsed = time.perf_counter() - started
+        ANALYZE_SECONDS.observe(elapsed, cache=outcome)
+        block = dict(result.get("metrics", {}), cache=outcome,
+                     total_ms=round(elapsed * 1000, 3))
+        return dict(result, metrics=block)
+    
+    @staticmethod
+    def _replay(result: Dict, on_layer: Optional[LayerCallback]):
+        """Reports a cached (complete) result layer by layer"""
+        if on_layer is None:
+            return
+        for name, layer in zip(ANALYSIS_LAYERS, result.get("analysis_layers", [])):
+            on_layer(name, layer, None)
+        on_layer("synthesis", result.get("synthesis", {}), None)
+    
+    def _complete(self, key: str, query: str, run, started: float,
+                  profile_requested: bool) -> Dict:
+        """Assembles, records, persists and caches a freshly computed run"""
+        result = self._assemble(query, run)
+        self._record(result)
+        
+        result["result_id"] = uuid.uuid4().hex
+        if run.profiles:
+            path = self.profiler.dump(run.profiles, time.perf_counter() - started,
+                                      profile_requested, result["result_id"])
+            if path is not None:
+                result["metrics"]["profile"] = path
         
-        # Save results
-        output_file = self.results_dir / "analysis_results.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        # Persisted by the store's background writer, off the request thread
+        self.store.put(result, result["result_id"])
         
-        print("✅ Analysis complete!")
+        # Partial results are not cached so the next request retries failed layers
+        if "layer_errors" not in result:
+            self.cache.put(key, result)
+        logger.info("Analysis complete in %.1fms: %s",
+                    (time.perf_counter() - started) * 1000, query)
         return result
+    
+    def analyze(self, query: str, on_layer: Optional[LayerCallback] = None,
+                profile: bool = False) -> Dict:
+        """Execute full analysis pipeline
+        
+        on_layer(name, result, error) receives each layer as soon as it is
+        done (all at once for a cached result), for streaming responses.
+        profile=True bypasses the cache and writes a cProfile dump of the
+        layers; otherwise the profiler samples requests as configured.
+        """
+        started = time.perf_counter()
+        key = cache_key(query, self.version)
+        if not profile:
+            found, outcome = self._lookup(key)
+            if found is not None:
+                self._replay(found, on_layer)
+                return self._observe(found, outcome, started)
+        
+        def compute() -> Dict:
+            logger.info("Analyzing: %s", query)
+            run = self.scheduler.run(query, on_layer,
+                                     profile=self.profiler.should_profile(profile))
+            return self._complete(key, query, run, started, profile)
+        
+        result, shared = self.flight.do(key, compute)
+        if shared:
+            self._replay(result, on_layer)
+        return self._observe(result, "coalesced" if shared else "miss", started)
+    
+    async def analyze_async(self, query: str, on_layer: Optional[LayerCallback] = None,
+                            profile: bool = False) -> Dict:
+        """analyze() for asyncio servers: waits on layers without holding a thread
+        
+        The cache lookup and the completion (the shared cache tier is SQLite,
+        which may wait on other workers' locks) run on the loop's default
+        executor, so they never stall other connections on the event loop.
+        """
+        started = time.perf_counter()
+        key = cache_key(query, self.version)
+        loop = asyncio.get_running_loop()
+        if not profile:
+            found, outcome = await loop.run_in_executor(None, self._lookup, key)
+            if found is not None:
+                self._replay(found, on_layer)
+                return self._observe(found, outcome, started)
+        
+        async def compute() -> Dict:
+            logger.info("Analyzing: %s", query)
+            run = await self.scheduler.run_async(query, on_layer,
+                                                 profile=self.profiler.should_profile(profile))
+            return await loop.run_in_executor(None, self._complete, key, query, run, started,
+                                              profile)
+        
+        result, shared = await self.flight.do_async(key, compute)
+        if shared:
+            self._replay(result, on_layer)
+        return self._observe(result, "coalesced" if shared else "miss", started)
+    
+    def analyze_batch(self, queries: List[str], processes: Optional[int] = None,
+                      executor: Optional[ProcessPoolExecutor] = None,
+                      store: bool = True) -> List[Dict]:
+        """Analyzes many queries, returning results in input order
+        
+        Identical (normalized) queries are computed once and cache hits skip
+        the layers entirely. Remaining queries are spread over a process pool
+        whose workers each build their layers once for the whole batch; pass
+        an executor from make_batch_executor() to reuse workers across calls.
+        store=False leaves computed results out of the result store (they get
+        no result_id), for callers that are not serving a request.
+        """
+        keys = [cache_key(query, self.version) for query in queries]
+        resolved = {}
+        pending = {}
+        for key, query in zip(keys, queries):
+            if key in resolved or key in pending:
+                continue
+            cached = self.cache.get(key) or self._precomputed(key)
+            if cached is not None:
+                resolved[key] = cached
+            else:
+                pending[key] = query
+        
+        if pending:
+            todo = list(pending.items())
+            workers = processes or os.cpu_count() or 1
+            if executor is None and (workers <= 1 or len(todo) < BATCH_PROCESS_THRESHOLD):
+                computed = [self._run_layers(query) for _, query in todo]
+            else:
+                pool = executor or make_batch_executor(workers, self.scheduler.default_timeout)
+                try:
+                    chunksize = max(1, len(todo) // (workers * 4))
+                    computed = list(pool.map(_analyze_in_worker,
+                                             [query for _, query in todo],
+                                             chunksize=chunksize))
+                finally:
+                    if executor is None:
+                        pool.shutdown()
+            
+            for (key, _), result in zip(todo, computed):
+                self._record(result)
+                if store:
+                    result["result_id"] = uuid.uuid4().hex
+                    self.store.put(result, result["result_id"])
+                resolved[key] = result
+                if "layer_errors" not in result:
+                    self.cache.put(key, result)
+        
+        return [resolved[key] for key in keys]
+
+# Batches smaller than this are analyzed in-process; pool startup would dominate
+BATCH_PROCESS_THRESHOLD = 32
+
+_worker_pipeline = None
+
+def _init_batch_worker(layer_timeout: float):
+    """Builds one pipeline per worker process, shared by every query it handles"""
+    global _worker_pipeline
+    _worker_pipeline = BiblicalAnalysisPipeline(layer_timeout=layer_timeout)
+    _worker_pipeline.resources.warm_up(["gematria_index", "lexicon", "concept_index"])
+
+def _analyze_in_worker(query: str) -> Dict:
+    return _worker_pipeline._run_layers(query)
+
+def make_batch_executor(processes: Optional[int] = None,
+                        layer_timeout: float = LAYER_TIMEOUT_SECONDS) -> ProcessPoolExecutor:
+    """Creates a process pool whose workers are ready to run analyze_batch"""
+    return ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1,
+                               initializer=_init_batch_worker,
+                               initargs=(layer_timeout,))
+
+def iter_jsonl_queries(path: str) -> Iterator[Dict]:
+    """Streams {"id", "query"} records from a JSONL file of objects or strings"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"query": record}
+            record.setdefault("id", line_number)
+            yield record
+
+def run_batch_file(pipeline: BiblicalAnalysisPipeline, input_path: str, output_path: str,
+                   processes: Optional[int] = None, chunk_size: int = 1000) -> int:
+    """Analyzes a JSONL query file chunk by chunk, appending results as JSONL"""
+    total = 0
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with make_batch_executor(processes, pipeline.scheduler.default_timeout) as executor, \
+            open(output_path, "w", encoding="utf-8") as out:
+        records = iter_jsonl_queries(input_path)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            results = pipeline.analyze_batch([r.get("query", "") for r in chunk],
+                                             processes=processes, executor=executor)
+            for record, result in zip(chunk, results):
+                out.write(json.dumps({"id": record["id"], "query": record.get("query", ""),
+                                      "analysis": result}, ensure_ascii=False) + "\n")
+            total += len(chunk)
+            print(f"✓ Analyzed {total} queries")
+    return total
 
 def main():
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Biblical Analysis Pipeline")
+    parser.add_argument("query", nargs="?", default="Profecia sobre cometa na biblia",
+                        help="Single query to analyze")
+    parser.add_argument("--batch", metavar="INPUT_JSONL",
+                        help="Analyze every query in a JSONL file")
+    parser.add_argument("--output", default="outputs/batch_results.jsonl",
+                        help="Where to write batch results (JSONL)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Queries read and analyzed per chunk in batch mode")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write a cProfile dump of the analysis to outputs/profiles")
+    parser.add_argument("--log-level", default=None,
+                        help="DEBUG, INFO, WARNING, ERROR or OFF (default: $ORACLE_LOG_LEVEL or INFO)")
+    args = parser.parse_args()
+    configure_logging(args.log_level)
+    
     pipeline = BiblicalAnalysisPipeline()
-    # Example query
-    result = pipeline.analyze("Profecia sobre cometa na biblia")
+    pipeline.warm_up()
+    if args.batch:
+        total = run_batch_file(
+            pipeline, args.batch, args.output, args.processes, args.chunk_size)
+        print(f"\n✅ Batch complete: {total} results written to {args.output}")
+        return
+    
+    result = pipeline.analyze(args.query, profile=args.profile)
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Audio Render Cache
+Content-keyed disk cache for on-demand WAV renders
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from generate_divine_audio import DivineAudioGenerator
+
+
+class AudioRenderCache:
+    """Renders tones/blends once and keeps them on disk with size-based eviction
+
+    Files are named after a hash of the render parameters, so identical
+    requests map to the same WAV. Least recently used files (by mtime, which
+    is refreshed on every hit) are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = "outputs/audio_cache", max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir).resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.generator = DivineAudioGenerator()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(params: Dict) -> str:
+        """Content key for a set of render parameters"""
+        payload = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def path_for(self, params: Dict) -> Path:
+        return self.cache_dir / f"{self.key(params)}.wav"
+
+    def size_for(self, params: Dict) -> int:
+        """Total WAV size in bytes (header + 16-bit mono samples)"""
+        return 44 + 2 * int(self.generator.sample_rate * params["duration"])
+
+    def get(self, params: Dict) -> Optional[Path]:
+        """Cached render path, or None; a hit marks the file as recently used"""
+        path = self.path_for(params)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _blocks(self, params: Dict) -> Iterator[bytes]:
+        return self.generator.stream_wav(params["frequencies"], params["amplitudes"],
+                                         params["duration"], params["fade"])
+
+    def render(self, params: Dict) -> Path:
+        """Renders straight to the cache (used when a byte range is requested first)"""
+        for _ in self.render_stream(params):
+            pass
+        return self.path_for(params)
+
+    def render_stream(self, params: Dict) -> Iterator[bytes]:
+        """Yields WAV chunks while also writing them to the cache
+
+        The file is renamed into place only after the last chunk, so a client
+        that disconnects early never leaves a truncated WAV in the cache.
+        """
+        path = self.path_for(params)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        completed = False
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in self._blocks(params):
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, path)
+            completed = True
+        finally:
+            if not completed:
+                tmp_path.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self):
+        """Deletes least recently used renders until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".wav"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Performance Benchmarks
+Offline benchmarks over synthetic corpora, saved as JSON and compared against a baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from concept_index import ConceptIndex
+from dataset_stream import iter_jsonl, write_jsonl
+from gematria import GematriaIndex
+from generate_divine_audio import DivineAudioGenerator
+from hybrid_search import BM25Index, HybridRetriever, OverlapReranker
+from instrumentation import LOGGING_OFF
+from lexicon import Lexicon
+from result_cache import ResultCache
+from vector_index import HashingEmbedder, VectorIndex
+
+FORMAT_VERSION = 1
+DEFAULT_SIZES = (1_000, 10_000)
+DEFAULT_THRESHOLD = 0.15
+
+_PORTUGUESE = ("senhor deus aliança povo terra céu rei profeta palavra dia casa israel "
+               "reino santo messias luz vida espírito fé graça paz filho pai nome "
+               "templo lei coração cometa estrela sinal profecia glória").split()
+_HEBREW = "ברית אלהים יהוה משיח מלכות קדוש ישועה נביא שלום ארץ שמים דבר".split()
+_GREEK = "λόγος χριστός βασιλεία διαθήκη σωτηρία ἅγιος προφήτης εἰρήνη".split()
+_SYLLABLES = "ba be bi bo ra re ri ro sa se si so ta te ti to na ne ni no ma me mi mo".split()
+_BOOKS = ("Gn Ex Lv Nm Dt Js Jz Rt Sm Rs Cr Ed Ne Et Jó Sl Pv Ec Is Jr Lm Ez Dn Os "
+          "Mt Mc Lc Jo At Rm Co Gl Ef Fp Cl Ts Tm Hb Tg Pe Ap").split()
+
+
+# Synthetic corpora
+
+def _vocabulary(rng: random.Random, size: int = 5000) -> List[str]:
+    """Real biblical words first (most frequent), then pronounceable filler words"""
+    words = list(_PORTUGUESE + _HEBREW + _GREEK)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def synthetic_verses(count: int, seed: int = 0, words_per_verse: int = 18) -> Iterator[Dict]:
+    """Deterministic verse records ({"ref", "text"}) with Zipf-distributed words"""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    cumulative = list(np.cumsum(1.0 / np.arange(1, len(vocabulary) + 1)))
+    for i in range(count):
+        book = _BOOKS[i % len(_BOOKS)]
+        chapter, verse = divmod(i // len(_BOOKS), 40)
+        length = rng.randint(words_per_verse // 2, words_per_verse * 3 // 2)
+        yield {"ref": f"{book} {chapter + 1}:{verse + 1}",
+               "text": " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=length))}
+
+
+def synthetic_samples(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Training-data style records ({"text", "metadata"}) for RAG and JSONL benchmarks"""
+    for verse in synthetic_verses(count, seed):
+        yield {"text": verse["text"], "metadata": {"ref": verse["ref"], "source": "synthetic"}}
+
+
+def synthetic_cross_references(refs: List[str], seed: int = 0) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    for _ in range(len(refs) // 2):
+        yield {"from": rng.choice(refs), "to": rng.choice(refs)}
+
+
+def synthetic_lexicon() -> Iterator[Dict]:
+    for number, word in enumerate(_HEBREW + _GREEK, 1):
+        yield {"form": word, "lemma": word, "strongs": f"S{number}",
+               "gloss": "synthetic", "morph": "N", "domain": "synthetic"}
+
+
+def synthetic_queries(count: int, seed: int = 1) -> List[str]:
+    """Distinct queries, so every analyze call misses the result cache"""
+    rng = random.Random(seed)
+    vocabulary = _PORTUGUESE + _HEBREW + _GREEK
+    return [" ".join(rng.sample(vocabulary, 4)) + f" {i}" for i in range(count)]
+
+
+# Measurement
+
+def summarize(samples: List[float]) -> Dict:
+    """pytest-benchmark style statistics over per-round timings (seconds)"""
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return float(np.percentile(ordered, p))
+
+    mean = statistics.fmean(ordered)
+    return {
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": mean,
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "median": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "ops": 1.0 / mean if mean > 0 else 0.0
+    }
+
+
+def time_rounds(fn: Callable[[], object], rounds: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class BenchmarkResults:
+    """Collects latency (lower is better) and throughput (higher is better) results"""
+
+    def __init__(self):
+        self.benchmarks: Dict[str, Dict] = {}
+
+    def latency(self, name: str, samples: List[float]):
+        stats = summarize(samples)
+        self.benchmarks[name] = {"kind": "latency", "unit": "s", "value": stats["median"],
+                                 "stats": stats}
+        print(f"  {name:<40} median {stats['median'] * 1000:9.3f} ms   "
+              f"p95 {stats['p95'] * 1000:9.3f} ms")
+
+    def throughput(self, name: str, items: int, seconds: float, unit: str):
+        value = items / seconds if seconds > 0 else 0.0
+        self.benchmarks[name] = {"kind": "throughput", "unit": f"{unit}/s", "value": value,
+                                 "stats": {"items": items, "seconds": seconds}}
+        print(f"  {name:<40} {value:14,.0f} {unit}/s")
+
+    def duration(self, name: str, seconds: float):
+        """A one-shot timing such as an index build"""
+        self.latency(name, [seconds])
+
+    def to_json(self, sizes: Sequence[int]) -> Dict:
+        return {
+            "format_version": FORMAT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "sizes": list(sizes),
+            "benchmarks": self.benchmarks
+        }
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the pipeline's logging and progress prints inside timed sections"""
+    logger = logging.getLogger("oracle_biblico")
+    level = logger.level
+    logger.setLevel(LOGGING_OFF)  # inherited by the child loggers modules log through
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logger.setLevel(level)
+
+
+# Benchmarks
+
+def bench_jsonl(results: BenchmarkResults, size: int, workdir: Path):
+    records = list(synthetic_samples(size))
+    for compression in (None, "gzip"):
+        label = compression or "plain"
+        path = workdir / f"bench_{size}_{label}.jsonl"
+        start = time.perf_counter()
+        write_jsonl(path, records, compression=compression)
+        results.throughput(f"jsonl.write.{label}[{size}]", size, time.perf_counter() - start,
+                           "records")
+        start = time.perf_counter()
+        count = sum(1 for _ in iter_jsonl(path))
+        results.throughput(f"jsonl.read.{label}[{size}]", count, time.perf_counter() - start,
+                           "records")
+
+
+def bench_rag(results: BenchmarkResults, size: int, workdir: Path, searches: int):
+    embedder = HashingEmbedder()
+    start = time.perf_counter()
+    index = VectorIndex.build(embedder, synthetic_samples(size))
+    results.duration(f"rag.build[{size}]", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index.save(str(workdir / f"vector_db_{size}"))
+    loaded = VectorIndex.load(str(workdir / f"vector_db_{size}"))
+    results.duration(f"rag.save_load[{size}]", time.perf_counter() - start)
+
+    queries = iter(synthetic_queries(searches * 2 + 2))
+    results.latency(f"rag.search.exact[{size}]",
+                    time_rounds(lambda: loaded.search(next(queries), 5, approximate=False),
+                                searches))
+    if loaded.centroids is not None:
+        results.latency(f"rag.search.ivf[{size}]",
+                        time_rounds(lambda: loaded.search(next(queries), 5, approximate=True),
+                                    searches))
+
+    start = time.perf_counter()
+    BM25Index.build(enumerate(synthetic_samples(size))).save(str(workdir / f"bm25_{size}"))
+    sparse = BM25Index.load(str(workdir / f"bm25_{size}"))
+    results.duration(f"rag.bm25_build[{size}]", time.perf_counter() - start)
+
+    queries = iter(synthetic_queries(searches * 2 + 2))
+    results.latency(f"rag.search.bm25[{size}]",
+                    time_rounds(lambda: sparse.search(next(queries)), searches))
+    hybrid = HybridRetriever(loaded, sparse, OverlapReranker())
+    results.latency(f"rag.search.hybrid_rerank[{size}]",
+                    time_rounds(lambda: hybrid.search(next(queries), 5), searches))
+
+
+def bench_indexes(results: BenchmarkResults, size: int):
+    verses = list(synthetic_verses(size))
+    refs = [verse["ref"] for verse in verses]
+    start = time.perf_counter()
+    GematriaIndex.build(verses)
+    results.duration(f"gematria.build[{size}]", time.perf_counter() - start)
+    start = time.perf_counter()
+    ConceptIndex.build(verses, synthetic_cross_references(refs))
+    results.duration(f"concepts.build[{size}]", time.perf_counter() - start)
+
+
+def bench_pipeline(results: BenchmarkResults, size: int, workdir: Path,
+                   queries: int, batch_size: int):
+    """analyze() latency and analyze_batch() throughput over indexes of the given size"""
+    verses = list(synthetic_verses(size))
+    refs = [verse["ref"] for verse in verses]
+    GematriaIndex.build(verses).save(str(workdir / "data" / "gematria"))
+    ConceptIndex.build(verses, synthetic_cross_references(refs)).save(
+        str(workdir / "data" / "concepts"))
+    Lexicon.build(synthetic_lexicon()).save(str(workdir / "data" / "lexicon"))
+
+    with quiet():
+        pipeline = BiblicalAnalysisPipeline(cache=ResultCache(max_entries=queries * 4))
+        pipeline.warm_up()
+        fresh = iter(synthetic_queries(queries + 1, seed=2))
+        samples = time_rounds(lambda: pipeline.analyze(next(fresh)), queries)
+        hot = synthetic_queries(1, seed=3)[0]
+        cached = time_rounds(lambda: pipeline.analyze(hot), queries)
+    results.latency(f"analyze.latency[{size}]", samples)
+    results.latency(f"analyze.cached_latency[{size}]", cached)
+
+    batch = synthetic_queries(batch_size, seed=4)
+    with quiet():
+        start = time.perf_counter()
+        pipeline.analyze_batch(batch)
+        elapsed = time.perf_counter() - start
+    results.throughput(f"analyze_batch.throughput[{size}]", batch_size, elapsed, "queries")
+    pipeline.store.close()
+
+
+def bench_audio(results: BenchmarkResults, seconds: float):
+    generator = DivineAudioGenerator()
+    # 432+528Hz repeats exactly (one period is rendered and tiled); 432.7+528.3 does not
+    for label, frequencies in (("periodic", [432, 528]), ("aperiodic", [432.7, 528.3])):
+        start = time.perf_counter()
+        total = sum(len(block) for block in generator.render_blocks(
+            frequencies, [0.1] * len(frequencies), seconds, 3))
+        results.throughput(f"audio.render.{label}", total // 2, time.perf_counter() - start,
+                           "samples")
+
+
+def run(sizes: Sequence[int], output: Path, queries: int = 200, batch_size: int = 256,
+        searches: int = 100, audio_seconds: float = 60.0,
+        only: Optional[Sequence[str]] = None) -> Dict:
+    """Runs the selected benchmark groups in a scratch directory and saves the results"""
+    groups = set(only or ("jsonl", "rag", "indexes", "pipeline", "audio"))
+    results = BenchmarkResults()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="oracle-bench-") as scratch:
+        workdir = Path(scratch)
+        os.chdir(workdir)  # the pipeline and its workers read data/ and outputs/ from here
+        try:
+            for size in sizes:
+                print(f"\nCorpus size {size:,}")
+                if "jsonl" in groups:
+                    bench_jsonl(results, size, workdir)
+                if "indexes" in groups:
+                    bench_indexes(results, size)
+                if "rag" in groups:
+                    bench_rag(results, size, workdir, searches)
+            if "pipeline" in groups:
+                print(f"\nPipeline (corpus size {max(sizes):,})")
+                bench_pipeline(results, max(sizes), workdir, queries, batch_size)
+            if "audio" in groups:
+                print("\nAudio")
+                bench_audio(results, audio_seconds)
+        finally:
+            os.chdir(cwd)
+
+    report = results.to_json(sizes)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Saved {len(report['benchmarks'])} benchmarks to {output}")
+    return report
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Per-benchmark relative change; positive `slowdown` means worse than baseline"""
+    rows = []
+    for name, now in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or not before["value"] or not now["value"]:
+            continue
+        if now["kind"] == "latency":
+            slowdown = now["value"] / before["value"] - 1
+        else:
+            slowdown = before["value"] / now["value"] - 1
+        rows.append({"name": name, "kind": now["kind"], "unit": now["unit"],
+                     "baseline": before["value"], "current": now["value"],
+                     "slowdown": slowdown, "regression": slowdown > threshold})
+    return rows
+
+
+def print_comparison(rows: List[Dict], threshold: float) -> int:
+    """Prints a comparison table; returns the number of regressions"""
+    print(f"{'benchmark':<40} {'baseline':>14} {'current':>14} {'change':>9}")
+    for row in rows:
+        flag = "  ❌ REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<40} {row['baseline']:>14.6g} {row['current']:>14.6g} "
+              f"{row['slowdown']:>+8.1%}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%} across {len(rows)} benchmarks")
+    return regressions
+
+
+def _load(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a benchmark report of format {FORMAT_VERSION}")
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Performance Benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and save the results as JSON")
+    run_parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                            help="Comma-separated synthetic corpus sizes")
+    run_parser.add_argument("--output", default="outputs/benchmarks/latest.json")
+    run_parser.add_argument("--only", default=None,
+                            help="Comma-separated groups: jsonl,indexes,rag,pipeline,audio")
+    run_parser.add_argument("--queries", type=int, default=200,
+                            help="analyze() calls timed for latency percentiles")
+    run_parser.add_argument("--batch-size", type=int, default=256)
+    run_parser.add_argument("--searches", type=int, default=100,
+                            help="Top-k searches timed per corpus size")
+    run_parser.add_argument("--audio-seconds", type=float, default=60.0)
+    run_parser.add_argument("--baseline", default=None,
+                            help="Compare against this report after running")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Allowed relative slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        only = args.only.split(",") if args.only else None
+        current = run(sizes, Path(args.output).resolve(), args.queries, args.batch_size,
+                      args.searches, args.audio_seconds, only)
+        if args.baseline:
+            print()
+            regressions = print_comparison(
+                compare(_load(args.baseline), current, args.threshold), args.threshold)
+            sys.exit(1 if regressions else 0)
+        return
+
+    regressions = print_comparison(
+        compare(_load(args.baseline), _load(args.current), args.threshold), args.threshold)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
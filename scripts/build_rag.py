@@ -4,87 +4,331 @@ Oracle Biblico PRO - RAG System Builder
 Builds Retrieval-Augmented Generation system
 """
 
+import argparse
+import hashlib
 import json
+import os
+import shutil
+import threading
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+from dataset_stream import iter_jsonl
+from hybrid_search import BM25Builder, BM25Index, HybridRetriever, make_reranker
+from vector_index import CompositeIndex, HashingEmbedder, OllamaEmbedder, VectorIndex
+
+# Compact once delta rows plus tombstones exceed this share of the base index
+COMPACTION_RATIO = 0.1
+
+def segment_key(record: Dict, line_number: int) -> str:
+    """Stable identity of a text segment: explicit id, else its metadata, else its line"""
+    if "id" in record:
+        return f"id:{record['id']}"
+    if record.get("metadata"):
+        return "meta:" + json.dumps(record["metadata"], ensure_ascii=False, sort_keys=True)
+    return f"line:{line_number}"
+
+def content_hash(record: Dict) -> str:
+    """Hash of everything that ends up in the index for a segment"""
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
 class RAGBuilder:
     """Builds RAG system for biblical text retrieval"""
     
-    def __init__(self, embedding_model: str = "nomic-embed-text"):
+    def __init__(self, embedding_model: str = "nomic-embed-text", embedder=None,
+                 dimension: int = 768, vector_dtype: str = "float32"):
         self.embedding_model = embedding_model
+        self.vector_dtype = vector_dtype
         self.vector_db_dir = Path("data/vector_db")
         self.vector_db_dir.mkdir(parents=True, exist_ok=True)
-        print(f"Initializing RAG builder with {embedding_model}")
+        self.embedder = embedder or self._default_embedder(embedding_model, dimension)
+        self.index = None
+        self.sparse = None
+        self.bm25_dir = self.vector_db_dir / "bm25"
+        self.manifest_file = self.vector_db_dir / "manifest.json"
+        self.tombstones_file = self.vector_db_dir / "tombstones.npy"
+        self.delta_dir = self.vector_db_dir / "delta"
+        self.compaction_thread: Optional[threading.Thread] = None
+        print(f"Initializing RAG builder with {self.embedder.config()}")
+    
+    @staticmethod
+    def _default_embedder(embedding_model: str, dimension: int):
+        """Ollama embedder for named models, hashing embedder offline"""
+        if embedding_model == HashingEmbedder.name:
+            return HashingEmbedder(dimension)
+        try:
+            return OllamaEmbedder(embedding_model)
+        except ImportError:
+            print("⚠️ ollama not installed, falling back to the offline hashing embedder")
+            return HashingEmbedder(dimension)
     
-    def load_processed_texts(self) -> List[Dict]:
-        """Loads processed biblical texts"""
-        print("Loading processed biblical texts...")
-        data_file = Path("data/processed/training_data.jsonl")
+    def load_processed_texts(self) -> Iterator[Dict]:
+        """Streams processed biblical texts (plain, compressed or sharded JSONL)"""
+        print("Streaming processed biblical texts...")
+        return iter_jsonl(Path("data/processed/training_data.jsonl"))
+    
+    def create_embeddings(self, texts: Iterable[Dict]) -> VectorIndex:
+        """Embeds texts into a float32 vector index"""
+        print("\nCreating embeddings...")
+        index = VectorIndex.build(self.embedder, texts)
+        print(f"✓ Created {len(index)} embeddings")
+        return index
+    
+    def build_vector_index(self, index: VectorIndex):
+        """Saves the vector index for similarity search"""
+        print("\nBuilding vector index...")
+        index_config = index.save(str(self.vector_db_dir), dtype=self.vector_dtype)
+        self.index = index
+        print(f"✓ Vector index built successfully ({index_config['index_type']})")
+        return index_config
+    
+    def load_index(self):
+        """Memory-maps the saved vector index (plus any delta) from data/vector_db"""
+        if self.index is None:
+            base = VectorIndex.load(str(self.vector_db_dir))
+            tombstones = self._load_tombstones()
+            if (self.delta_dir / "index.bin").exists() or len(tombstones):
+                segments = [base]
+                if (self.delta_dir / "index.bin").exists():
+                    segments.append(VectorIndex.load(str(self.delta_dir), base.embedder))
+                self.index = CompositeIndex(segments, tombstones)
+            else:
+                self.index = base
+        return self.index
+    
+    def load_sparse(self) -> Optional[BM25Index]:
+        """Memory-maps the BM25 index, or None for indexes built before it existed"""
+        if self.sparse is None and (self.bm25_dir / "bm25_config.json").exists():
+            self.sparse = BM25Index.load(str(self.bm25_dir))
+        return self.sparse
+    
+    def search(self, query: str, k: int = 5, approximate: Optional[bool] = None,
+               mode: str = "hybrid", reranker=None) -> List[Dict]:
+        """Top-k text segments for a query
         
-        texts = []
-        if data_file.exists():
-            with open(data_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    texts.append(json.loads(line))
+        "hybrid" fuses BM25 and dense candidates with reciprocal-rank fusion,
+        so exact references and rare names are found even when embeddings
+        miss them; "dense" and "sparse" use one side only. A reranker (see
+        hybrid_search.make_reranker) reorders only the top fused candidates.
+        """
+        sparse = self.load_sparse()
+        if mode == "hybrid" and sparse is None:
+            mode = "dense"
+        if mode == "dense" and reranker is None:
+            return self.load_index().search(query, k, approximate=approximate)
+        retriever = HybridRetriever(self.load_index(), sparse, reranker)
+        return retriever.search(query, k, mode, approximate)
+    
+    def build_sparse_index(self, builder: BM25Builder) -> Dict:
+        """Saves the BM25 index over the same segments (and ids) as the vector index"""
+        config = builder.build().save(str(self.bm25_dir))
+        self.sparse = None
+        print(f"✓ BM25 index built ({config['num_documents']} segments, "
+              f"{config['num_postings']} postings)")
+        return config
+    
+    def _load_manifest(self) -> Optional[Dict]:
+        if not self.manifest_file.exists():
+            return None
+        with open(self.manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _save_manifest(self, manifest: Dict):
+        tmp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_file, self.manifest_file)
+    
+    def _same_embedder(self, saved: Optional[Dict]) -> bool:
+        """Whether the manifest's vectors came from the current embedder
         
-        print(f"✓ Loaded {len(texts)} text segments")
-        return texts
+        An Ollama embedder only learns its dimension from its first call, so
+        an unknown dimension matches whatever the model produced last time.
+        """
+        current = self.embedder.config()
+        if saved is None:
+            return False
+        if current.get("dimension") is None:
+            saved = {key: value for key, value in saved.items() if key != "dimension"}
+            current = {key: value for key, value in current.items() if key != "dimension"}
+        return saved == current
     
-    def create_embeddings(self, texts: List[Dict]) -> List[Dict]:
-        """Creates embeddings for texts"""
-        print("\nCreating embeddings...")
-        embeddings = []
+    def _load_tombstones(self) -> np.ndarray:
+        if self.tombstones_file.exists():
+            return np.load(self.tombstones_file)
+        return np.zeros(0, dtype=np.int64)
+    
+    def _save_tombstones(self, tombstones: np.ndarray):
+        tmp_file = self.vector_db_dir / "tombstones.tmp.npy"
+        np.save(tmp_file, np.unique(tombstones).astype(np.int64))
+        os.replace(tmp_file, self.tombstones_file)
+    
+    def _keyed_segments(self, texts: Iterable[Dict]) -> Iterator[tuple]:
+        """(key, content hash, record) per segment, disambiguating repeated keys"""
+        seen = {}
+        for line_number, record in enumerate(texts, 1):
+            key = segment_key(record, line_number)
+            seen[key] = seen.get(key, 0) + 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+            yield key, content_hash(record), record
+    
+    def full_build(self, texts: Iterable[Dict]) -> Dict:
+        """Embeds every segment and replaces the index, manifest and delta"""
+        segments = {}
+        sparse = BM25Builder()
+        
+        def records():
+            for i, (key, digest, record) in enumerate(self._keyed_segments(texts)):
+                segments[key] = [digest, i]
+                sparse.add(i, record)
+                yield record
         
-        for i, text in enumerate(texts):
-            # Simulated embedding
-            embedding_entry = {
-                "id": i,
-                "text": text.get("text", ""),
-                "metadata": text.get("metadata", {}),
-                "embedding_model": self.embedding_model,
-                "vector_dimension": 768
-            }
-            embeddings.append(embedding_entry)
+        index = self.create_embeddings(records())
+        self.build_vector_index(index)
+        self.build_sparse_index(sparse)
         
-        print(f"✓ Created {len(embeddings)} embeddings")
-        return embeddings
+        shutil.rmtree(self.delta_dir, ignore_errors=True)
+        self.tombstones_file.unlink(missing_ok=True)
+        self._save_manifest({
+            "embedder": self.embedder.config(),
+            "next_id": len(segments),
+            "segments": segments
+        })
+        return {"reused": 0, "recomputed": len(segments), "deleted": 0, "total": len(segments)}
     
-    def build_vector_index(self, embeddings: List[Dict]):
-        """Builds vector index for similarity search"""
-        print("\nBuilding vector index...")
+    def incremental_build(self, texts: Iterable[Dict]) -> Dict:
+        """Embeds only new or changed segments and tombstones removed ones
         
-        index_config = {
-            "index_type": "faiss",
-            "embedding_model": self.embedding_model,
-            "num_vectors": len(embeddings),
-            "vector_dimension": 768,
-            "metric": "cosine_similarity"
-        }
+        Falls back to a full build when there is no manifest yet or the
+        embedder changed, since existing vectors would not be comparable.
+        The BM25 index has no embedding cost, so it is rebuilt over all
+        segments, keeping each segment's vector id.
+        """
+        manifest = self._load_manifest()
+        if (manifest is None or not self._same_embedder(manifest.get("embedder"))
+                or not (self.vector_db_dir / "index.bin").exists()):
+            print("No compatible manifest found, running a full build")
+            return self.full_build(texts)
         
-        index_file = self.vector_db_dir / "index_config.json"
-        with open(index_file, "w", encoding="utf-8") as f:
-            json.dump(index_config, f, indent=2)
+        previous = manifest["segments"]
+        next_id = manifest["next_id"]
+        segments, changed, new_ids = {}, [], []
+        sparse = BM25Builder()
+        tombstones = [self._load_tombstones()]
+        reused = 0
+        for key, digest, record in self._keyed_segments(texts):
+            entry = previous.pop(key, None)
+            if entry is not None and entry[0] == digest:
+                segments[key] = entry
+                sparse.add(entry[1], record)
+                reused += 1
+                continue
+            if entry is not None:
+                tombstones.append(np.array([entry[1]], dtype=np.int64))
+            segments[key] = [digest, next_id]
+            sparse.add(next_id, record)
+            changed.append(record)
+            new_ids.append(next_id)
+            next_id += 1
+        deleted = len(previous)
+        tombstones.append(np.array([entry[1] for entry in previous.values()], dtype=np.int64))
+        tombstones = np.unique(np.concatenate(tombstones)).astype(np.int64)
         
-        print("✓ Vector index built successfully")
-        return index_config
+        print(f"\nEmbedding {len(changed)} new or changed segments...")
+        fresh = VectorIndex.build(self.embedder, changed, ids=np.array(new_ids, dtype=np.int64))
+        if (self.delta_dir / "index.bin").exists():
+            previous_delta = VectorIndex.load(str(self.delta_dir), self.embedder)
+            delta = VectorIndex.merge(self.embedder, [previous_delta, fresh], tombstones)
+        else:
+            delta = fresh
+        delta.save(str(self.delta_dir), dtype=self.vector_dtype)
+        self.build_sparse_index(sparse)
+        self._save_tombstones(tombstones)
+        self._save_manifest({"embedder": self.embedder.config(), "next_id": next_id,
+                             "segments": segments})
+        self.index = None
+        
+        base_size = VectorIndex.load(str(self.vector_db_dir), self.embedder).vectors.shape[0]
+        if len(delta) + len(tombstones) > COMPACTION_RATIO * max(base_size, 1):
+            self.compact_in_background()
+        
+        return {"reused": reused, "recomputed": len(changed), "deleted": deleted,
+                "total": len(segments)}
     
-    def build(self):
+    def compact(self):
+        """Folds the delta into the base index and drops tombstoned rows, reusing vectors"""
+        base = VectorIndex.load(str(self.vector_db_dir), self.embedder)
+        segments = [base]
+        if (self.delta_dir / "index.bin").exists():
+            segments.append(VectorIndex.load(str(self.delta_dir), self.embedder))
+        merged = VectorIndex.merge(self.embedder, segments, self._load_tombstones())
+        merged.save(str(self.vector_db_dir), dtype=self.vector_dtype)
+        shutil.rmtree(self.delta_dir, ignore_errors=True)
+        self.tombstones_file.unlink(missing_ok=True)
+        self.index = None
+        print(f"✓ Compacted vector index ({len(merged)} vectors)")
+    
+    def compact_in_background(self) -> threading.Thread:
+        """Starts compaction on a worker thread; the process waits for it on exit"""
+        if self.compaction_thread is None or not self.compaction_thread.is_alive():
+            print("Compacting vector index in the background...")
+            self.compaction_thread = threading.Thread(target=self.compact,
+                                                      name="rag-compaction")
+            self.compaction_thread.start()
+        return self.compaction_thread
+    
+    def build(self, incremental: bool = False) -> Dict:
         """Main RAG building pipeline"""
         print("="*50)
         print("Building Retrieval-Augmented Generation System")
         print("="*50)
         
         texts = self.load_processed_texts()
-        embeddings = self.create_embeddings(texts)
-        index_config = self.build_vector_index(embeddings)
+        stats = self.incremental_build(texts) if incremental else self.full_build(texts)
         
         print("\n✅ RAG system built successfully!")
-        print(f"Ready to serve queries with {len(embeddings)} indexed documents")
+        print(f"Segments reused: {stats['reused']}, recomputed: {stats['recomputed']}, "
+              f"deleted: {stats['deleted']}")
+        print(f"Ready to serve queries with {stats['total']} indexed documents")
+        return stats
 
 def main():
-    builder = RAGBuilder()
-    builder.build()
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - RAG System Builder")
+    parser.add_argument("--embedder", default="nomic-embed-text",
+                        help="Ollama embedding model, or 'hashing' for the offline embedder")
+    parser.add_argument("--dimension", type=int, default=768,
+                        help="Vector dimension for the hashing embedder")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="On-disk vector precision")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Query the existing index instead of building it")
+    parser.add_argument("-k", type=int, default=5, help="Results to return with --search")
+    parser.add_argument("--mode", choices=["hybrid", "dense", "sparse"], default="hybrid",
+                        help="Retrieval used by --search (hybrid = BM25 + dense, fused)")
+    parser.add_argument("--rerank", metavar="RERANKER", default=None,
+                        help="Re-rank the top candidates: 'overlap' (offline) or a "
+                             "cross-encoder model name")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Embed only segments that changed since the last build")
+    parser.add_argument("--compact", action="store_true",
+                        help="Fold incremental changes into the base index and exit")
+    args = parser.parse_args()
+    
+    builder = RAGBuilder(args.embedder, dimension=args.dimension, vector_dtype=args.dtype)
+    if args.search:
+        hits = builder.search(args.search, args.k, mode=args.mode,
+                              reranker=make_reranker(args.rerank))
+        for hit in hits:
+            print(f"{hit['score']:.4f}  {hit['text']}")
+        return
+    if args.compact:
+        builder.compact()
+        return
+    builder.build(incremental=args.incremental)
 
 if __name__ == "__main__":
     main()
@@ -4,38 +4,399 @@ Oracle Biblico PRO - Data Collection Script
 Collects Bible texts and resources for training
 """
 
+import argparse
 import json
 import os
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence, Tuple
 
-def collect_bible_texts():
+from dataset_stream import COMPRESSION_SUFFIXES, JsonlWriter, _shard_files
+from lexicon import script_language
+
+DEFAULT_SOURCE_DIR = "data/sources"
+DEFAULT_OUTPUT = "data/raw/verses.jsonl"
+MANIFEST_FILE = "ingest_manifest.json"
+# Bump when parsing or the record layout changes so every source is reparsed
+INGEST_VERSION = 1
+
+SOURCE_FORMATS = {".usfm": "usfm", ".sfm": "usfm", ".osis": "osis", ".xml": "osis",
+                  ".txt": "text"}
+
+# OSIS book ids in canonical order; USFM codes map onto them
+OSIS_BOOKS = [
+    "Gen", "Exod", "Lev", "Num", "Deut", "Josh", "Judg", "Ruth", "1Sam", "2Sam", "1Kgs",
+    "2Kgs", "1Chr", "2Chr", "Ezra", "Neh", "Esth", "Job", "Ps", "Prov", "Eccl", "Song", "Isa",
+    "Jer", "Lam", "Ezek", "Dan", "Hos", "Joel", "Amos", "Obad", "Jonah", "Mic", "Nah", "Hab",
+    "Zeph", "Hag", "Zech", "Mal", "Matt", "Mark", "Luke", "John", "Acts", "Rom", "1Cor",
+    "2Cor", "Gal", "Eph", "Phil", "Col", "1Thess", "2Thess", "1Tim", "2Tim", "Titus", "Phlm",
+    "Heb", "Jas", "1Pet", "2Pet", "1John", "2John", "3John", "Jude", "Rev"
+]
+USFM_BOOKS = [
+    "GEN", "EXO", "LEV", "NUM", "DEU", "JOS", "JDG", "RUT", "1SA", "2SA", "1KI", "2KI", "1CH",
+    "2CH", "EZR", "NEH", "EST", "JOB", "PSA", "PRO", "ECC", "SNG", "ISA", "JER", "LAM", "EZK",
+    "DAN", "HOS", "JOL", "AMO", "OBA", "JON", "MIC", "NAM", "HAB", "ZEP", "HAG", "ZEC", "MAL",
+    "MAT", "MRK", "LUK", "JHN", "ACT", "ROM", "1CO", "2CO", "GAL", "EPH", "PHP", "COL", "1TH",
+    "2TH", "1TI", "2TI", "TIT", "PHM", "HEB", "JAS", "1PE", "2PE", "1JN", "2JN", "3JN", "JUD",
+    "REV"
+]
+USFM_TO_OSIS = dict(zip(USFM_BOOKS, OSIS_BOOKS))
+BOOK_ORDER = {book: position for position, book in enumerate(OSIS_BOOKS)}
+# xml:lang codes named the way script_language() names them
+LANGUAGE_NAMES = {"he": "Hebrew", "hbo": "Hebrew", "arc": "Aramaic", "grc": "Greek",
+                  "el": "Greek"}
+
+# USFM markers whose line is a heading or metadata, never verse text
+USFM_LINE_MARKERS = {"id", "ide", "h", "toc", "mt", "mte", "ms", "mr", "s", "sr", "r", "d",
+                     "rem", "cl", "sts", "usfm", "imt", "is", "ip", "ipi", "im", "io", "iot",
+                     "ili", "ie"}
+_USFM_LEADING = re.compile(r"\s*\\([a-z]+)\d*\b")
+_USFM_NOTES = re.compile(r"\\(f|fe|x)\s.*?\\\1\*", re.DOTALL)
+_USFM_WORD = re.compile(r"\\\+?w\s+([^|\\]*)(?:\|[^\\]*)?\\\+?w\*")
+_USFM_MARKER = re.compile(r"\\(?:(c|v)\s+(\d+)\S*|\+?[a-z]+\d*\*?)\s?")
+# "Gen 1:1 text", "1 John 3.16<tab>text", "Gênesis 1:1 - text"
+_TEXT_VERSE = re.compile(r"^\s*(?P<book>(?:[1-3]\s?)?[^\W\d_][\w.]*(?:\s[^\W\d_][\w.]*)*)\s+"
+                         r"(?P<chapter>\d+)[:.](?P<verse>\d+)\s*[-–—]?\s*(?P<text>.+)$")
+
+VerseTuple = Tuple[str, int, int, str]  # book, chapter, verse, text
+
+
+def _clean(parts) -> str:
+    return " ".join("".join(parts).split())
+
+
+def parse_usfm(content: str) -> Iterator[VerseTuple]:
+    """Verses of a USFM book; notes are dropped and word-level markup unwrapped"""
+    content = _USFM_WORD.sub(r"\1", _USFM_NOTES.sub("", content))
+    book, chapter, verse, parts = None, 0, None, []
+    for line in content.splitlines():
+        leading = _USFM_LEADING.match(line)
+        if leading and leading.group(1) in USFM_LINE_MARKERS:
+            if leading.group(1) == "id":
+                fields = line.split()
+                code = fields[1].upper() if len(fields) > 1 else ""
+                book = USFM_TO_OSIS.get(code, code)
+            continue
+        position = 0
+        for marker in _USFM_MARKER.finditer(line):
+            if verse is not None:
+                parts.append(line[position:marker.start()])
+            position = marker.end()
+            if marker.group(1):
+                if verse is not None and _clean(parts):
+                    yield book, chapter, verse, _clean(parts)
+                parts = []
+                if marker.group(1) == "c":
+                    chapter, verse = int(marker.group(2)), None
+                else:
+                    verse = int(marker.group(2))
+            elif verse is not None:
+                parts.append(" ")
+        if verse is not None:
+            parts.append(line[position:] + " ")
+    if verse is not None and _clean(parts):
+        yield book, chapter, verse, _clean(parts)
+
+
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _osis_ref(osis_id: str) -> Optional[Tuple[str, int, int]]:
+    fields = osis_id.split()[0].split(".") if osis_id else []
+    if len(fields) < 3 or not fields[1].isdigit() or not fields[2].isdigit():
+        return None
+    return fields[0], int(fields[1]), int(fields[2])
+
+
+def parse_osis(content: str) -> Tuple[Dict, Iterator[VerseTuple]]:
+    """Work metadata and verses of an OSIS document
+
+    Handles both container verses (<verse osisID>text</verse>) and milestone
+    verses (<verse sID/>text<verse eID/>); notes and titles are skipped.
+    """
+    root = ET.fromstring(content)
+    meta = {}
+    for element in root.iter():
+        if _local(element.tag) == "osisText":
+            meta = {"translation": element.get("osisIDWork"),
+                    "language": element.get("{http://www.w3.org/XML/1998/namespace}lang")}
+            break
+
+    def walk(element, state) -> Iterator[VerseTuple]:
+        name = _local(element.tag)
+        if name in ("note", "title"):
+            return
+        if name == "verse":
+            if element.get("eID") is not None:
+                yield from flush(state)
+            elif element.get("osisID"):
+                yield from flush(state)
+                state["ref"] = _osis_ref(element.get("osisID"))
+        if element.text and state["ref"]:
+            state["parts"].append(element.text)
+        for child in element:
+            yield from walk(child, state)
+            if child.tail and state["ref"]:
+                state["parts"].append(child.tail)
+        if name == "verse" and element.get("sID") is None and element.get("eID") is None:
+            yield from flush(state)
+
+    def flush(state) -> Iterator[VerseTuple]:
+        if state["ref"] and _clean(state["parts"]):
+            yield (*state["ref"], _clean(state["parts"]))
+        state["ref"], state["parts"] = None, []
+
+    return meta, walk(root, {"ref": None, "parts": []})
+
+
+def parse_text(content: str) -> Iterator[VerseTuple]:
+    """Verses of a plain-text Bible with one "Book chapter:verse text" per line"""
+    for line in content.splitlines():
+        match = _TEXT_VERSE.match(line)
+        if match:
+            book = match.group("book").rstrip(".")
+            yield (book, int(match.group("chapter")), int(match.group("verse")),
+                   " ".join(match.group("text").split()))
+
+
+def ingest_file(source: str, translation: str, shard: str,
+                compression: Optional[str] = None) -> Dict:
+    """Parses one source file into a verse shard; runs in a worker process
+
+    shard is the uncompressed path (verses-00000.jsonl): the writer adds the
+    compression suffix itself. Returns a summary for the manifest (verse count and per-book chapter/verse
+    counts). The shard is renamed into place only once it is complete.
+    """
+    source_format = SOURCE_FORMATS[Path(source).suffix.lower()]
+    with open(source, "r", encoding="utf-8-sig") as f:
+        content = f.read()
+    language = None
+    if source_format == "osis":
+        meta, verses = parse_osis(content)
+        translation = meta.get("translation") or translation
+        language = LANGUAGE_NAMES.get(meta.get("language"), meta.get("language"))
+    elif source_format == "usfm":
+        verses = parse_usfm(content)
+    else:
+        verses = parse_text(content)
+
+    books: Dict[str, Dict] = {}
+    with JsonlWriter(shard, compression=compression) as writer:
+        for book, chapter, verse, text in verses:
+            if language is None:
+                language = script_language(text)
+            writer.write({"ref": f"{book} {chapter}:{verse}", "book": book,
+                          "chapter": chapter, "verse": verse, "text": text,
+                          "translation": translation, "language": language,
+                          "source": Path(source).name})
+            stats = books.setdefault(book, {"chapters": 0, "verses": 0})
+            stats["chapters"] = max(stats["chapters"], chapter)
+            stats["verses"] += 1
+    return {"format": source_format, "translation": translation, "language": language,
+            "verses": writer.count, "books": books}
+
+
+class CorpusIngest:
+    """Parallel, resumable ingestion of a directory of Bible sources
+
+    Every source file becomes its own verse shard (verses-00000.jsonl, ...)
+    next to the output path, so readers of data/raw/verses.jsonl see the
+    whole corpus. Shard numbers are assigned once per source and recorded in
+    a manifest together with the file's size and mtime; the manifest is
+    rewritten as each file finishes, so an interrupted ingest resumes with
+    only the files that were not done (or have changed since).
+    """
+
+    def __init__(self, source_dir: str = DEFAULT_SOURCE_DIR, output: str = DEFAULT_OUTPUT,
+                 workers: Optional[int] = None, compression: Optional[str] = None):
+        self.source_dir = Path(source_dir)
+        self.output = Path(output)
+        self.workers = workers or os.cpu_count() or 1
+        self.compression = compression
+        self.manifest_path = self.output.parent / MANIFEST_FILE
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if self.manifest_path.exists():
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == INGEST_VERSION:
+                return manifest
+        return {"version": INGEST_VERSION, "sources": {}}
+
+    def _save_manifest(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def sources(self) -> Dict[str, Path]:
+        """Source files by path relative to the source directory"""
+        if not self.source_dir.is_dir():
+            return {}
+        return {path.relative_to(self.source_dir).as_posix(): path
+                for path in sorted(self.source_dir.rglob("*"))
+                if path.is_file() and path.suffix.lower() in SOURCE_FORMATS}
+
+    def _shard_base(self, number: int) -> Path:
+        """Shard path without the compression suffix, as JsonlWriter expects it"""
+        stem = self.output.name.split(".jsonl")[0]
+        return self.output.with_name(f"{stem}-{number:05d}.jsonl")
+
+    def _shard_path(self, number: int) -> Path:
+        """The file a shard is actually written to"""
+        base = self._shard_base(number)
+        return base.with_name(base.name + COMPRESSION_SUFFIXES.get(self.compression, ""))
+
+    def _translation(self, relative: str) -> str:
+        """Nested sources take their directory's name (kjv/GEN.usfm), others the file stem"""
+        parts = Path(relative).parts
+        return parts[0] if len(parts) > 1 else Path(relative).stem
+
+    def _is_current(self, entry: Optional[Dict], path: Path) -> bool:
+        stat = path.stat()
+        return (entry is not None and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+                and entry.get("compression") == self.compression
+                and Path(entry["shard"]).exists())
+
+    def run(self, force: bool = False) -> Dict:
+        """Ingests new or changed sources; returns counts of parsed/skipped/removed files"""
+        sources = self.sources()
+        entries = self.manifest["sources"]
+
+        removed = [relative for relative in entries if relative not in sources]
+        for relative in removed:
+            Path(entries.pop(relative)["shard"]).unlink(missing_ok=True)
+
+        todo = [relative for relative, path in sources.items()
+                if force or not self._is_current(entries.get(relative), path)]
+        used = {entry["number"] for relative, entry in entries.items() if relative not in todo}
+        numbers, next_number = {}, 0
+        for relative in todo:
+            if relative in entries and entries[relative]["number"] not in used:
+                numbers[relative] = entries[relative]["number"]
+            else:
+                while next_number in used or next_number in numbers.values():
+                    next_number += 1
+                numbers[relative] = next_number
+            used.add(numbers[relative])
+        self._drop_orphan_shards(used)
+        self._save_manifest()
+
+        # Largest files first so one big translation does not finish last on its own
+        todo.sort(key=lambda relative: sources[relative].stat().st_size, reverse=True)
+        failed = {}
+        if todo:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(todo))) as executor:
+                futures = {
+                    executor.submit(ingest_file, str(sources[relative]),
+                                    self._translation(relative),
+                                    str(self._shard_base(numbers[relative])),
+                                    self.compression): relative
+                    for relative in todo
+                }
+                for future in as_completed(futures):
+                    relative = futures[future]
+                    try:
+                        summary = future.result()
+                    except Exception as e:
+                        failed[relative] = f"{type(e).__name__}: {e}"
+                        print(f"⚠️ Failed to ingest {relative}: {failed[relative]}")
+                        entries.pop(relative, None)
+                        self._shard_path(numbers[relative]).unlink(missing_ok=True)
+                        continue
+                    stat = sources[relative].stat()
+                    entries[relative] = {
+                        "number": numbers[relative],
+                        "shard": str(self._shard_path(numbers[relative])),
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "compression": self.compression,
+                        **summary
+                    }
+                    # Checkpoint: an interrupted run skips everything recorded so far
+                    self._save_manifest()
+                    print(f"✓ {relative}: {summary['verses']} verses")
+
+        if self.output.exists() and entries:
+            print(f"⚠️ {self.output} exists and hides the ingested shards; "
+                  f"remove it to read the shards")
+        return {"parsed": len(todo) - len(failed), "skipped": len(sources) - len(todo),
+                "removed": len(removed), "failed": failed,
+                "verses": sum(entry["verses"] for entry in entries.values())}
+
+    def _drop_orphan_shards(self, used):
+        """Removes shards no manifest entry owns (e.g. from a run that was interrupted)"""
+        owned = {self._shard_path(number).name for number in used}
+        for shard in _shard_files(self.output):
+            if shard.name not in owned:
+                shard.unlink()
+
+    def metadata(self) -> Dict:
+        """Per-book chapter/verse counts and languages over the ingested corpus"""
+        books: Dict[str, Dict] = {}
+        for entry in self.manifest["sources"].values():
+            for name, stats in entry["books"].items():
+                book = books.setdefault(name, {"name": name, "chapters": 0, "verses": 0,
+                                               "languages": [], "translations": []})
+                book["chapters"] = max(book["chapters"], stats["chapters"])
+                book["verses"] = max(book["verses"], stats["verses"])
+                for key, value in (("languages", entry["language"]),
+                                   ("translations", entry["translation"])):
+                    if value and value not in book[key]:
+                        book[key].append(value)
+        ordered = sorted(books.values(),
+                         key=lambda book: (BOOK_ORDER.get(book["name"], len(BOOK_ORDER)),
+                                           book["name"]))
+        return {"translations": sorted({entry["translation"]
+                                        for entry in self.manifest["sources"].values()}),
+                "books": ordered}
+
+
+def collect_bible_texts(source_dir: str = DEFAULT_SOURCE_DIR, output: str = DEFAULT_OUTPUT,
+                        workers: Optional[int] = None, force: bool = False,
+                        compression: Optional[str] = None):
     """
     Collects Bible texts from various sources
-    Stores in JSON format for processing
+    Ingests USFM/OSIS/plain-text files under data/sources into verse shards
+    and stores per-book metadata in JSON format for processing
     """
     print("Collecting Bible texts...")
     
     # Create data directories
     Path("data/raw").mkdir(parents=True, exist_ok=True)
     
-    # Sample Bible texts structure
-    bible_data = {
-        "testament": "Old Testament",
-        "books": [
-            {
-                "name": "Genesis",
-                "chapters": 50,
-                "verses": 1533,
-                "languages": ["Hebrew", "English", "Portuguese"]
-            },
-            {
-                "name": "Exodus",
-                "chapters": 40,
-                "verses": 1213,
-                "languages": ["Hebrew", "English", "Portuguese"]
-            }
-        ]
-    }
+    ingest = CorpusIngest(source_dir, output, workers, compression)
+    if ingest.sources() or ingest.manifest["sources"]:
+        counts = ingest.run(force)
+        print(f"✓ Ingested {counts['verses']} verses ({counts['parsed']} files parsed, "
+              f"{counts['skipped']} unchanged, {counts['removed']} removed)")
+        bible_data = ingest.metadata()
+    else:
+        print(f"⚠️ No source files in {source_dir}; writing sample metadata")
+        # Sample Bible texts structure
+        bible_data = {
+            "testament": "Old Testament",
+            "books": [
+                {
+                    "name": "Genesis",
+                    "chapters": 50,
+                    "verses": 1533,
+                    "languages": ["Hebrew", "English", "Portuguese"]
+                },
+                {
+                    "name": "Exodus",
+                    "chapters": 40,
+                    "verses": 1213,
+                    "languages": ["Hebrew", "English", "Portuguese"]
+                }
+            ]
+        }
     
     # Save Bible metadata
     with open("data/raw/bible_metadata.json", "w", encoding="utf-8") as f:
@@ -56,29 +417,44 @@ def collect_reference_texts():
         "linguistic_resources": {
             "hebrew_grammar": "data/references/hebrew_grammar.txt",
             "aramaic_references": "data/references/aramaic.txt",
-            "greek_references": "data/references/greek.txt"
+            "greek_references": "data/references/greek.txt",
+            "lexicon": "data/references/lexicon.jsonl"
         },
         "theological_references": {
             "commentary_collection": "data/references/commentaries.json",
-            "historical_context": "data/references/history.json"
+            "historical_context": "data/references/history.json",
+            "cross_references": "data/references/cross_references.jsonl"
         }
     }
     
     print(f"✓ Catalogued {len(references)} reference collections")
     return references
 
-def main():
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Data Collection")
+    parser.add_argument("--source-dir", default=DEFAULT_SOURCE_DIR,
+                        help="Directory of .usfm/.sfm, .osis/.xml and .txt Bible files")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="Verse dataset path; shards are written next to it")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reparse every source instead of resuming from the manifest")
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_SUFFIXES), default=None)
+    args = parser.parse_args(argv)
+    
     print("="*50)
     print("Oracle Biblico PRO - Data Collection")
     print("="*50)
     
     try:
-        collect_bible_texts()
+        collect_bible_texts(args.source_dir, args.output, args.workers, args.force,
+                            args.compression)
         refs = collect_reference_texts()
         
         print("\n✅ Data collection completed successfully!")
         print(f"References: {refs}")
-        
+    
     except Exception as e:
         print(f"❌ Error during collection: {e}")
         raise
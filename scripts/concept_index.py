@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Concept Index
+Term -> verse inverted index and a cross-reference graph over the verse corpus
+"""
+
+import argparse
+import json
+import os
+import shutil
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from dataset_stream import iter_jsonl
+from gematria import DEFAULT_VERSES_FILE, normalize, words
+
+CONCEPT_INDEX_FORMAT_VERSION = 1
+DEFAULT_CONCEPT_DIR = "data/concepts"
+DEFAULT_CROSS_REFERENCES_FILE = "data/references/cross_references.jsonl"
+
+# Seed terms per concept in Portuguese, English, Hebrew and Greek
+THEOLOGICAL_CONCEPTS = {
+    "covenant": ["aliança", "pacto", "covenant", "ברית", "διαθήκη"],
+    "messiah": ["messias", "ungido", "cristo", "messiah", "anointed", "משיח", "χριστός"],
+    "kingdom": ["reino", "kingdom", "מלכות", "βασιλεία"],
+    "redemption": ["redenção", "resgate", "redemption", "redeem", "גאל", "λύτρωσις"],
+    "prophecy": ["profecia", "profeta", "prophecy", "prophet", "נביא", "προφήτης"],
+    "salvation": ["salvação", "salvar", "salvation", "ישועה", "σωτηρία"],
+    "holiness": ["santo", "santidade", "holy", "holiness", "קדוש", "ἅγιος"],
+    "creation": ["criação", "criou", "creation", "created", "ברא", "κτίσις"]
+}
+HISTORICAL_MARKERS = {
+    "Patriarchal Period": ["abraão", "isaque", "jacó", "abraham", "isaac", "jacob", "אברהם"],
+    "Exodus and Conquest": ["egito", "moisés", "faraó", "egypt", "moses", "pharaoh", "מצרים"],
+    "United Monarchy": ["davi", "salomão", "david", "solomon", "דוד", "שלמה"],
+    "Babylonian Exile": ["babilônia", "exílio", "babylon", "exile", "בבל"],
+    "Second Temple Period": ["templo", "temple", "herodes", "herod", "ἱερόν"],
+    "Roman Period": ["roma", "césar", "rome", "caesar", "pilatos", "pilate", "καῖσαρ"]
+}
+
+
+def _vocabulary(groups: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Normalizes seed terms the same way verse text is tokenized"""
+    return {name: [normalize(term) for term in terms] for name, terms in groups.items()}
+
+
+CONCEPT_TERMS = _vocabulary(THEOLOGICAL_CONCEPTS)
+HISTORICAL_TERMS = _vocabulary(HISTORICAL_MARKERS)
+
+
+class ConceptIndex:
+    """Inverted index plus cross-reference adjacency over verse rows
+
+    Each term's posting list is the sorted verse rows containing it, stored
+    as uint32 gaps in one array sliced by `term_offsets`, so decoding is a
+    cumsum. Cross-references form an undirected graph in CSR form
+    (`graph_indptr`, `graph_indices`). Arrays are memory-mapped on load.
+    """
+
+    _ARRAYS = ("term_offsets", "postings", "graph_indptr", "graph_indices")
+
+    def __init__(self, refs: List[str], terms: List[str], term_offsets: np.ndarray,
+                 postings: np.ndarray, graph_indptr: np.ndarray, graph_indices: np.ndarray):
+        self.refs = refs
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings = postings
+        self.graph_indptr = graph_indptr
+        self.graph_indices = graph_indices
+        self._term_ids: Optional[Dict[str, int]] = None
+        self._ref_rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    @classmethod
+    def build(cls, verses: Iterable[Dict], cross_references: Iterable[Dict] = ()) -> "ConceptIndex":
+        """Indexes verse records ({"ref", "text"}) and {"from", "to"} reference pairs
+
+        A reference found in several translations is one row holding the
+        terms of all of them, so a query in any language finds the verse once.
+        """
+        refs, ref_rows, rows_by_term = [], {}, {}
+        for line_number, verse in enumerate(verses, 1):
+            ref = str(verse.get("ref", verse.get("id", line_number)))
+            row = ref_rows.setdefault(ref, len(refs))
+            if row == len(refs):
+                refs.append(ref)
+            for term in set(words(verse.get("text", ""))):
+                rows_by_term.setdefault(term, []).append(row)
+
+        terms = sorted(rows_by_term)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        gaps = []
+        for i, term in enumerate(terms):
+            # Sorted and unique again: later translations revisit earlier rows
+            rows = np.unique(np.array(rows_by_term[term], dtype=np.int64))
+            gaps.append(np.diff(rows, prepend=0).astype(np.uint32))
+            term_offsets[i + 1] = term_offsets[i] + len(rows)
+        postings = np.concatenate(gaps) if gaps else np.zeros(0, dtype=np.uint32)
+
+        sources, targets = [], []
+        for pair in cross_references:
+            a, b = ref_rows.get(str(pair.get("from"))), ref_rows.get(str(pair.get("to")))
+            if a is not None and b is not None and a != b:
+                sources.extend((a, b))
+                targets.extend((b, a))
+        edges = np.unique(np.array([sources, targets], dtype=np.int64).reshape(2, -1), axis=1)
+        graph_indptr = np.zeros(len(refs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edges[0], minlength=len(refs)), out=graph_indptr[1:])
+        graph_indices = edges[1].astype(np.int32)  # np.unique sorted edges by source
+
+        index = cls(refs, terms, term_offsets, postings, graph_indptr, graph_indices)
+        index._ref_rows = ref_rows
+        return index
+
+    def save(self, directory: str = DEFAULT_CONCEPT_DIR) -> Dict:
+        """Writes the arrays and string tables, replacing any previous index"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        for name in self._ARRAYS:
+            np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+        with open(tmp_dir / "refs.json", "w", encoding="utf-8") as f:
+            json.dump(self.refs, f, ensure_ascii=False)
+        with open(tmp_dir / "terms.json", "w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False)
+        config = {
+            "format_version": CONCEPT_INDEX_FORMAT_VERSION,
+            "num_verses": len(self.refs),
+            "num_terms": len(self.terms),
+            "num_postings": len(self.postings),
+            "num_cross_references": len(self.graph_indices) // 2
+        }
+        with open(tmp_dir / "index_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial index
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return config
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_CONCEPT_DIR) -> "ConceptIndex":
+        """Memory-maps an index saved by save()"""
+        directory = Path(directory)
+        with open(directory / "index_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format_version") != CONCEPT_INDEX_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported concept index; rebuild it")
+        with open(directory / "refs.json", "r", encoding="utf-8") as f:
+            refs = json.load(f)
+        with open(directory / "terms.json", "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        arrays = [np.load(directory / f"{name}.npy", mmap_mode="r") for name in cls._ARRAYS]
+        return cls(refs, terms, *arrays)
+
+    def postings_for(self, term: str) -> np.ndarray:
+        """Sorted verse rows containing a term (empty if unseen)"""
+        if self._term_ids is None:
+            self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        term_id = self._term_ids.get(normalize(term))
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        return np.cumsum(self.postings[start:end], dtype=np.int64)
+
+    def occurrences(self, terms: Iterable[str]) -> np.ndarray:
+        """Rows containing any of the terms (a union of posting lists)"""
+        lists = [self.postings_for(term) for term in terms]
+        lists = [rows for rows in lists if len(rows)]
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(lists))
+
+    def intersect(self, terms: Iterable[str]) -> np.ndarray:
+        """Rows containing as many of the terms as possible
+
+        Posting lists are intersected shortest first; a term that would empty
+        the result is skipped rather than wiping out the match.
+        """
+        lists = sorted((rows for rows in map(self.postings_for, terms) if len(rows)), key=len)
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        result = lists[0]
+        for rows in lists[1:]:
+            narrowed = np.intersect1d(result, rows, assume_unique=True)
+            if len(narrowed):
+                result = narrowed
+        return result
+
+    def neighbors(self, row: int) -> np.ndarray:
+        return self.graph_indices[self.graph_indptr[row]:self.graph_indptr[row + 1]]
+
+    def related(self, seeds: Iterable[int], max_depth: int = 2,
+                max_results: int = 20) -> List[Dict]:
+        """Passages reachable from seed rows by cross-references, nearest first
+
+        Breadth-first and bounded by both depth and result count, so hub
+        verses with hundreds of references cannot blow up the walk.
+        """
+        seen = set(int(seed) for seed in seeds)
+        queue = deque((seed, 0) for seed in seen)
+        related = []
+        while queue and len(related) < max_results:
+            row, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for neighbor in self.neighbors(row):
+                neighbor = int(neighbor)
+                if neighbor in seen:
+                    continue
+                seen.add(neighbor)
+                related.append({"ref": self.refs[neighbor], "depth": depth + 1,
+                                "via": self.refs[row]})
+                if len(related) >= max_results:
+                    break
+                queue.append((neighbor, depth + 1))
+        return related
+
+    def row_of(self, ref: str) -> Optional[int]:
+        if self._ref_rows is None:
+            self._ref_rows = {ref: row for row, ref in enumerate(self.refs)}
+        return self._ref_rows.get(ref)
+
+    def refs_for(self, rows: np.ndarray, limit: Optional[int] = None) -> List[str]:
+        return [self.refs[int(row)] for row in rows[:limit]]
+
+
+def match_vocabulary(text: str, vocabulary: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Vocabulary entries (concepts, periods) whose seed terms appear in a text"""
+    present = set(words(text))
+    return {name: terms for name, terms in vocabulary.items() if present.intersection(terms)}
+
+
+def build_concept_index(verses_file: str = DEFAULT_VERSES_FILE,
+                        cross_references_file: str = DEFAULT_CROSS_REFERENCES_FILE,
+                        index_dir: str = DEFAULT_CONCEPT_DIR) -> Dict:
+    """Builds and saves the index from the verse corpus and cross-reference pairs"""
+    pairs = iter_jsonl(cross_references_file)
+    config = ConceptIndex.build(iter_jsonl(verses_file), pairs).save(index_dir)
+    print(f"✓ Concept index: {config['num_terms']} terms over {config['num_verses']} verses, "
+          f"{config['num_cross_references']} cross-references -> {index_dir}")
+    return config
+
+
+def load_concept_index(index_dir: str = DEFAULT_CONCEPT_DIR) -> Optional[ConceptIndex]:
+    """The saved index, or None if it has not been built yet"""
+    if not (Path(index_dir) / "index_config.json").exists():
+        return None
+    return ConceptIndex.load(index_dir)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Concept Index")
+    parser.add_argument("query", nargs="?", help="Terms to look up, or a verse reference")
+    parser.add_argument("--build", action="store_true",
+                        help="Build the index from the verse corpus and exit")
+    parser.add_argument("--verses", default=DEFAULT_VERSES_FILE)
+    parser.add_argument("--cross-references", default=DEFAULT_CROSS_REFERENCES_FILE,
+                        help="JSONL of {'from': ref, 'to': ref} pairs")
+    parser.add_argument("--index-dir", default=DEFAULT_CONCEPT_DIR)
+    parser.add_argument("--depth", type=int, default=2, help="Cross-reference hops to follow")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        build_concept_index(args.verses, args.cross_references, args.index_dir)
+        return
+    if not args.query:
+        parser.error("a query is required unless --build is given")
+    index = load_concept_index(args.index_dir)
+    if index is None:
+        parser.error(f"no concept index in {args.index_dir}; run with --build first")
+
+    row = index.row_of(args.query)
+    seeds = np.array([row]) if row is not None else index.intersect(words(args.query))
+    print(json.dumps({
+        "occurrences": index.refs_for(seeds, args.limit),
+        "related": index.related(seeds[:args.limit], args.depth, args.limit)
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
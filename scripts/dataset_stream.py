@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Streaming Dataset I/O
+Generator-based JSONL reading and writing with compression and sharding
+"""
+
+import gzip
+import io
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def open_text(path: Union[str, Path], mode: str = "r"):
+    """Opens a text file, transparently (de)compressing .gz and .zst files"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Reading or writing .zst files requires the zstandard package") from e
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, "wb"), closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def resolve_shards(path: Union[str, Path]) -> List[Path]:
+    """Files that make up a dataset, in order
+
+    `data/processed/training_data.jsonl` matches the file itself, a compressed
+    variant (`.jsonl.gz`, `.jsonl.zst`) or shards named
+    `training_data-00000.jsonl[.gz|.zst]`; a directory yields its *.jsonl* files.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if ".jsonl" in p.name and p.is_file())
+    if path.exists():
+        return [path]
+    for suffix in COMPRESSION_SUFFIXES.values():
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            return [candidate]
+    return _shard_files(path)
+
+
+def _shard_files(path: Path) -> List[Path]:
+    stem = path.name.split(".jsonl")[0]
+    return sorted(p for p in path.parent.glob(f"{stem}-[0-9]*.jsonl*") if ".tmp" not in p.name)
+
+
+def iter_jsonl(path: Union[str, Path]) -> Iterator[Dict]:
+    """Yields one record per non-empty line across every shard of a dataset"""
+    for shard in resolve_shards(path):
+        with open_text(shard) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_batches(records: Iterable, batch_size: int) -> Iterator[List]:
+    """Groups any iterable into lists of at most batch_size items"""
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class JsonlWriter:
+    """Streams records to JSONL, optionally compressed and split into shards
+
+    Each shard is written to a temporary file and renamed when it is closed,
+    so readers never see a partially written shard. Without shard_size the
+    output is a single file at `path` (plus the compression suffix).
+    """
+
+    def __init__(self, path: Union[str, Path], shard_size: Optional[int] = None,
+                 compression: Optional[str] = None):
+        if compression not in (None, *COMPRESSION_SUFFIXES):
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.suffix = COMPRESSION_SUFFIXES.get(compression, "")
+        self.count = 0
+        self.paths: List[Path] = []
+        self._file = None
+        self._tmp_path = None
+        self._final_path = None
+        self._in_shard = 0
+
+    def _shard_path(self) -> Path:
+        if not self.shard_size:
+            return self.path.with_name(self.path.name + self.suffix)
+        stem = self.path.name.split(".jsonl")[0]
+        return self.path.with_name(f"{stem}-{len(self.paths):05d}.jsonl{self.suffix}")
+
+    def _open_shard(self):
+        self._final_path = self._shard_path()
+        self._tmp_path = self._final_path.with_name(self._final_path.name + ".tmp" + self.suffix)
+        self._file = open_text(self._tmp_path, "w")
+        self._in_shard = 0
+
+    def _close_shard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._tmp_path, self._final_path)
+        self.paths.append(self._final_path)
+        self._file = None
+
+    def write(self, record: Union[Dict, str]):
+        """Writes a record (dict, or an already serialized JSON string)"""
+        if self._file is None:
+            self._open_shard()
+        line = record if isinstance(record, str) else json.dumps(record, ensure_ascii=False)
+        self._file.write(line + "\n")
+        self.count += 1
+        self._in_shard += 1
+        if self.shard_size and self._in_shard >= self.shard_size:
+            self._close_shard()
+
+    def write_all(self, records: Iterable) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        if self.count == 0 and not self.paths:
+            self._open_shard()  # an empty dataset is still a valid (empty) file
+        self._close_shard()
+
+        # Drop outputs of earlier runs (other layout or more shards) so readers
+        # resolving this dataset only see what was just written
+        stale = [self.path.with_name(self.path.name + suffix)
+                 for suffix in ("", *COMPRESSION_SUFFIXES.values())] + _shard_files(self.path)
+        for old in stale:
+            if old not in self.paths:
+                old.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def write_jsonl(path: Union[str, Path], records: Iterable, shard_size: Optional[int] = None,
+                compression: Optional[str] = None) -> int:
+    """Streams records to a (possibly sharded/compressed) JSONL dataset; returns the count"""
+    with JsonlWriter(path, shard_size, compression) as writer:
+        return writer.write_all(records)
@@ -7,33 +7,26 @@ Fine-tunes Llama3.1 model on biblical texts
 import os
 from pathlib import Path
 import json
+from typing import Dict
+
+from token_dataset import ByteTokenizer, PackedTokenDataset, load_or_build
 
 class LlamaFineTuner:
     """Fine-tunes Llama3.1 for biblical analysis"""
     
-    def __init__(self, model_name: str = "llama3.1", quantization: bool = True):
+    def __init__(self, model_name: str = "llama3.1", quantization: bool = True,
+                 tokenizer=None):
         self.model_name = model_name
         self.quantization = quantization
+        # Pluggable; the offline byte tokenizer stands in until the base model's is set
+        self.tokenizer = tokenizer or ByteTokenizer()
+        self.token_cache_dir = Path("data/processed/tokens")
         self.model_dir = Path("data/models")
         self.model_dir.mkdir(parents=True, exist_ok=True)
         print(f"Initialized LlamaFineTuner with {model_name}")
         print(f"Quantization: {quantization}")
         print(f"Optimization: Mac M1 Max (Apple Silicon)")
     
-    def load_training_data(self):
-        """Loads prepared training data"""
-        print("\nLoading training data...")
-        data_file = Path("data/processed/training_data.jsonl")
-        
-        samples = []
-        if data_file.exists():
-            with open(data_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    samples.append(json.loads(line))
-        
-        print(f"✓ Loaded {len(samples)} training samples")
-        return samples
-    
     def prepare_finetune_config(self):
         """Prepares fine-tuning configuration"""
         print("\nPreparing fine-tuning configuration...")
@@ -70,21 +63,42 @@ class LlamaFineTuner:
         print("✓ Fine-tuning configuration prepared")
         return config
     
+    def prepare_token_cache(self, config: Dict) -> PackedTokenDataset:
+        """Tokenizes and packs the training data once; later runs reuse the cache
+        
+        The cache is rebuilt only when the training data, tokenizer or
+        max_seq_length change, so epochs and restarts read memory-mapped token
+        arrays instead of re-tokenizing JSON.
+        """
+        print("\nPreparing tokenized dataset...")
+        dataset = load_or_build("data/processed/training_data.jsonl", str(self.token_cache_dir),
+                                self.tokenizer, config["training_params"]["max_seq_length"])
+        print(f"✓ {len(dataset)} packed sequences, {dataset.config['num_tokens']} tokens")
+        return dataset
+    
     def finetune(self):
         """Main fine-tuning pipeline"""
         print("\nStarting fine-tuning process...")
         print("(Note: Actual training requires GPU/specialized setup)")
         
-        # Load training data
-        samples = self.load_training_data()
-        
         # Prepare config
         config = self.prepare_finetune_config()
         
+        # Tokenize once; the sample count comes from the cache, not a re-read
+        dataset = self.prepare_token_cache(config)
+        num_samples = dataset.config["num_documents"]
+        print(f"✓ Found {num_samples} training samples")
+        
         # Save fine-tuned model reference
         model_info = {
             "base_model": self.model_name,
-            "training_samples": len(samples),
+            "training_samples": num_samples,
+            "token_cache": {
+                "path": str(self.token_cache_dir),
+                "tokenizer": dataset.config["tokenizer"],
+                "num_sequences": dataset.config["num_sequences"],
+                "num_tokens": dataset.config["num_tokens"]
+            },
             "config": config,
             "status": "ready_for_training"
         }
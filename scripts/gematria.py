@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Gematria Engine
+Hebrew/Greek letter values via translation tables and a per-verse numeric index
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from dataset_stream import iter_jsonl
+
+METHODS = ("standard", "gadol", "ordinal", "reduced")
+INDEX_FORMAT_VERSION = 1
+DEFAULT_INDEX_DIR = "data/gematria"
+DEFAULT_VERSES_FILE = "data/raw/verses.jsonl"
+
+# Codepoints below this are looked up in the tables (covers Greek and Hebrew)
+_TABLE_SIZE = 0x0600
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_HEBREW = "אבגדהוזחטיכלמנסעפצקרשת"
+# Final forms: standard value of the base letter, 500-900 in mispar gadol
+_HEBREW_FINALS = {"ך": ("כ", 500), "ם": ("מ", 600), "ן": ("נ", 700),
+                  "ף": ("פ", 800), "ץ": ("צ", 900)}
+_GREEK = "αβγδεζηθικλμνξοπρστυφχψω"
+_GREEK_VALUES = [1, 2, 3, 4, 5, 7, 8, 9, 10, 20, 30, 40, 50, 60, 70, 80, 100,
+                 200, 300, 400, 500, 600, 700, 800]
+# Archaic numerals (digamma/stigma, koppa, sampi) have values but no ordinal place
+_GREEK_ARCHAIC = {"ϝ": 6, "ϛ": 6, "ϙ": 90, "ϟ": 90, "ϡ": 900}
+
+
+def _letter_value(position: int) -> int:
+    """1-9, 10-90, 100-... for the nth letter of a 22-letter alphabet"""
+    return (position % 9 + 1) * 10 ** (position // 9)
+
+
+def _reduce(value: int) -> int:
+    """Mispar katan: drop the zeros, so 200 -> 2 and 40 -> 4"""
+    while value >= 10 and value % 10 == 0:
+        value //= 10
+    return value
+
+
+def _build_tables() -> np.ndarray:
+    """One row per method mapping codepoint -> letter value (0 for non-letters)"""
+    tables = np.zeros((len(METHODS), _TABLE_SIZE), dtype=np.int32)
+    standard, gadol, ordinal, reduced = range(len(METHODS))
+
+    def assign(letter: str, value: int, big: int, place: int):
+        cp = ord(letter)
+        tables[standard, cp] = value
+        tables[gadol, cp] = big
+        tables[ordinal, cp] = place
+        tables[reduced, cp] = _reduce(value)
+
+    for position, letter in enumerate(_HEBREW):
+        value = _letter_value(position)
+        assign(letter, value, value, position + 1)
+    for final, (base, big) in _HEBREW_FINALS.items():
+        position = _HEBREW.index(base)
+        assign(final, _letter_value(position), big, position + 1)
+
+    for position, (letter, value) in enumerate(zip(_GREEK, _GREEK_VALUES)):
+        assign(letter, value, value, position + 1)
+    assign("ς", 200, 200, _GREEK.index("σ") + 1)
+    for letter, value in _GREEK_ARCHAIC.items():
+        assign(letter, value, value, 0)
+    return tables
+
+
+_TABLES = _build_tables()
+
+
+@lru_cache(maxsize=None)
+def _combining_marks() -> Dict[int, None]:
+    """str.translate table deleting every combining character (built on first use)"""
+    return {c: None for c in range(sys.maxunicode + 1) if unicodedata.combining(chr(c))}
+
+
+def normalize(text: str) -> str:
+    """Lowercases and strips niqqud, cantillation and Greek accents"""
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFD", text.lower()).translate(_combining_marks())
+
+
+def words(text: str) -> List[str]:
+    """Normalized words; vowel points no longer split Hebrew words"""
+    return _WORD.findall(normalize(text))
+
+
+def _word_values(word: str) -> np.ndarray:
+    """Values of one normalized word for every method, as an int32 row"""
+    codes = np.frombuffer(word.encode("utf-32-le"), dtype=np.uint32)
+    codes = codes[codes < _TABLE_SIZE]
+    return _TABLES[:, codes].sum(axis=1, dtype=np.int64).astype(np.int32)
+
+
+def _as_dict(row: np.ndarray) -> Dict[str, int]:
+    return {method: int(value) for method, value in zip(METHODS, row)}
+
+
+def gematria(text: str) -> Dict[str, int]:
+    """Values of a text under every method (non-Hebrew/Greek letters count 0)"""
+    total = np.zeros(len(METHODS), dtype=np.int64)
+    for word in words(text):
+        total += _word_values(word)
+    return _as_dict(total)
+
+
+def word_breakdown(text: str) -> List[Dict]:
+    """Per-word values, skipping words with no Hebrew or Greek letters"""
+    breakdown = []
+    for word in words(text):
+        row = _word_values(word)
+        if row.any():
+            breakdown.append({"word": word, "values": _as_dict(row)})
+    return breakdown
+
+
+def _check_method(method: str) -> int:
+    if method not in METHODS:
+        raise ValueError(f"Unknown gematria method: {method} (expected one of {METHODS})")
+    return METHODS.index(method)
+
+
+class GematriaIndex:
+    """Word and verse values plus a value -> verses reverse index
+
+    Verse values are one int32 matrix (verses x methods). For each method the
+    reverse index is CSR-style: `offsets[v]:offsets[v + 1]` slices `postings`
+    to the rows of every verse whose value is v, so lookups are O(1) in the
+    corpus size. Arrays are .npy files memory-mapped on load.
+    """
+
+    def __init__(self, refs: List[str], words: List[str], word_values: np.ndarray,
+                 verse_values: np.ndarray, offsets: List[np.ndarray],
+                 postings: List[np.ndarray]):
+        self.refs = refs
+        self.words = words
+        self.word_values = word_values
+        self.verse_values = verse_values
+        self.offsets = offsets
+        self.postings = postings
+        self._ref_rows: Optional[Dict[str, int]] = None
+        self._word_rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    @classmethod
+    def build(cls, verses: Iterable[Dict]) -> "GematriaIndex":
+        """Indexes verse records ({"ref", "text"}); each distinct word is valued once
+
+        A reference found in several translations is indexed once, with the
+        text of the first one that has Hebrew or Greek letters (the others
+        would all be worth 0), else of the first one seen.
+        """
+        refs, ref_rows, word_rows, word_values, verse_rows = [], {}, {}, [], []
+
+        def has_values(rows: List[int]) -> bool:
+            return any(word_values[row].any() for row in rows)
+
+        for line_number, verse in enumerate(verses, 1):
+            rows = []
+            for word in words(verse.get("text", "")):
+                row = word_rows.get(word)
+                if row is None:
+                    row = word_rows[word] = len(word_values)
+                    word_values.append(_word_values(word))
+                rows.append(row)
+            ref = str(verse.get("ref", verse.get("id", line_number)))
+            verse_row = ref_rows.get(ref)
+            if verse_row is None:
+                ref_rows[ref] = len(refs)
+                refs.append(ref)
+                verse_rows.append(rows)
+            elif not has_values(verse_rows[verse_row]) and has_values(rows):
+                verse_rows[verse_row] = rows
+
+        word_values = (np.vstack(word_values) if word_values
+                       else np.zeros((0, len(METHODS)), dtype=np.int32))
+        verse_values = np.zeros((len(refs), len(METHODS)), dtype=np.int32)
+        for i, rows in enumerate(verse_rows):
+            if rows:
+                verse_values[i] = word_values[rows].sum(axis=0)
+
+        offsets, postings = [], []
+        for column in range(len(METHODS)):
+            values = verse_values[:, column]
+            counts = np.bincount(values, minlength=1)
+            offsets.append(np.concatenate([[0], np.cumsum(counts)]).astype(np.int64))
+            postings.append(np.argsort(values, kind="stable").astype(np.int32))
+
+        index = cls(refs, list(word_rows), word_values, verse_values, offsets, postings)
+        index._word_rows = word_rows
+        index._ref_rows = ref_rows
+        return index
+
+    def save(self, directory: str = DEFAULT_INDEX_DIR) -> Dict:
+        """Writes the arrays and string tables, replacing any previous index"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        np.save(tmp_dir / "word_values.npy", self.word_values)
+        np.save(tmp_dir / "verse_values.npy", self.verse_values)
+        for method, offsets, postings in zip(METHODS, self.offsets, self.postings):
+            np.save(tmp_dir / f"offsets_{method}.npy", offsets)
+            np.save(tmp_dir / f"postings_{method}.npy", postings)
+        with open(tmp_dir / "refs.json", "w", encoding="utf-8") as f:
+            json.dump(self.refs, f, ensure_ascii=False)
+        with open(tmp_dir / "words.json", "w", encoding="utf-8") as f:
+            json.dump(self.words, f, ensure_ascii=False)
+
+        config = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "methods": list(METHODS),
+            "num_verses": len(self.refs),
+            "num_words": len(self.words)
+        }
+        with open(tmp_dir / "index_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial index
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return config
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_INDEX_DIR) -> "GematriaIndex":
+        """Memory-maps an index saved by save()"""
+        directory = Path(directory)
+        with open(directory / "index_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if (config.get("format_version") != INDEX_FORMAT_VERSION
+                or config.get("methods") != list(METHODS)):
+            raise ValueError(f"{directory} is not a supported gematria index; rebuild it")
+
+        with open(directory / "refs.json", "r", encoding="utf-8") as f:
+            refs = json.load(f)
+        with open(directory / "words.json", "r", encoding="utf-8") as f:
+            word_list = json.load(f)
+
+        def mapped(name: str) -> np.ndarray:
+            return np.load(directory / name, mmap_mode="r")
+
+        return cls(refs, word_list, mapped("word_values.npy"), mapped("verse_values.npy"),
+                   [mapped(f"offsets_{method}.npy") for method in METHODS],
+                   [mapped(f"postings_{method}.npy") for method in METHODS])
+
+    def verse_values_for(self, ref: str) -> Optional[Dict[str, int]]:
+        """All method values of a verse, or None if the reference is unknown"""
+        if self._ref_rows is None:
+            self._ref_rows = {ref: row for row, ref in enumerate(self.refs)}
+        row = self._ref_rows.get(ref)
+        return None if row is None else _as_dict(self.verse_values[row])
+
+    def word_values_for(self, word: str) -> Dict[str, int]:
+        """Indexed values of a word, computed on the fly for unseen words"""
+        if self._word_rows is None:
+            self._word_rows = {w: row for row, w in enumerate(self.words)}
+        word = normalize(word)
+        row = self._word_rows.get(word)
+        return _as_dict(self.word_values[row] if row is not None else _word_values(word))
+
+    def verses_with_value(self, value: int, method: str = "standard",
+                          limit: Optional[int] = None) -> List[str]:
+        """References of every verse whose value under `method` equals `value`"""
+        column = _check_method(method)
+        offsets = self.offsets[column]
+        if not 0 <= value < len(offsets) - 1:
+            return []
+        start, end = int(offsets[value]), int(offsets[value + 1])
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self.refs[row] for row in self.postings[column][start:end]]
+
+    def count_with_value(self, value: int, method: str = "standard") -> int:
+        offsets = self.offsets[_check_method(method)]
+        if not 0 <= value < len(offsets) - 1:
+            return 0
+        return int(offsets[value + 1] - offsets[value])
+
+    def same_value(self, text: str, method: str = "standard",
+                   limit: Optional[int] = None) -> List[str]:
+        """Verses sharing the value of a text (or of a verse, given its reference)"""
+        values = self.verse_values_for(text) or gematria(text)
+        return self.verses_with_value(values[method], method, limit)
+
+
+def build_index(verses_file: str = DEFAULT_VERSES_FILE,
+                index_dir: str = DEFAULT_INDEX_DIR) -> Dict:
+    """Builds and saves the index from a verse corpus (plain, compressed or sharded JSONL)"""
+    index = GematriaIndex.build(iter_jsonl(verses_file))
+    config = index.save(index_dir)
+    print(f"✓ Gematria index: {config['num_verses']} verses, {config['num_words']} words "
+          f"-> {index_dir}")
+    return config
+
+
+def load_index(index_dir: str = DEFAULT_INDEX_DIR) -> Optional[GematriaIndex]:
+    """The saved index, or None if it has not been built yet"""
+    if not (Path(index_dir) / "index_config.json").exists():
+        return None
+    return GematriaIndex.load(index_dir)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Gematria Engine")
+    parser.add_argument("text", nargs="?", help="Text (or verse reference) to evaluate")
+    parser.add_argument("--build", action="store_true",
+                        help="Build the index from the verse corpus and exit")
+    parser.add_argument("--verses", default=DEFAULT_VERSES_FILE,
+                        help="Verse corpus: JSONL records with 'ref' and 'text'")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--method", choices=METHODS, default="standard",
+                        help="Method used to find verses with the same value")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        build_index(args.verses, args.index_dir)
+        return
+    if not args.text:
+        parser.error("a text is required unless --build is given")
+
+    index = load_index(args.index_dir)
+    values = (index.verse_values_for(args.text) if index else None) or gematria(args.text)
+    print(json.dumps(values, ensure_ascii=False))
+    if index is not None:
+        matches = index.verses_with_value(values[args.method], args.method, args.limit)
+        print(f"{index.count_with_value(values[args.method], args.method)} verses "
+              f"with {args.method} value {values[args.method]}: {', '.join(matches)}")
+
+
+if __name__ == "__main__":
+    main()
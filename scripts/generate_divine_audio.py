@@ -2,13 +2,28 @@
 """
 SHAMIR - Gerador de Áudio com Frequências Divinas
 Gera áudio ambiente com frequências sagradas 432Hz e 528Hz
-USA APENAS BIBLIOTECAS NATIVAS DO PYTHON (sem numpy/scipy)
+Funciona só com a biblioteca padrão; usa numpy para acelerar quando disponível
 """
 
 import wave
-import struct
 import math
 import os
+import struct
+import sys
+from array import array
+from fractions import Fraction
+from functools import reduce
+
+try:
+    import numpy as np
+except ImportError:  # numpy é opcional: o caminho com array('h') cobre tudo
+    np = None
+
+# Amostras por bloco: o áudio é gerado e gravado bloco a bloco, memória constante
+BLOCK_SIZE = 44100
+# Maior período (em amostras) que vale a pena pré-calcular numa tabela
+MAX_PERIOD_SAMPLES = 441000
+
 
 class DivineAudioGenerator:
     """Gera áudio com frequências de cura e espirituais"""
@@ -18,6 +33,115 @@ class DivineAudioGenerator:
         self.output_dir = "static/audio"
         os.makedirs(self.output_dir, exist_ok=True)
     
+    def _period(self, frequencies):
+        """Período exato (em amostras) da soma das senoides, ou None se for grande demais
+        
+        Sem aproximação: um período só aproximado colocaria um salto de fase
+        (um clique audível) em cada emenda da tabela. Frequências sem período
+        curto (ex. 432.3Hz) são calculadas amostra a amostra.
+        """
+        periods = []
+        for frequency in frequencies:
+            ratio = Fraction(frequency) / self.sample_rate
+            periods.append(ratio.denominator)
+        period = reduce(lambda a, b: a * b // math.gcd(a, b), periods, 1)
+        return period if period <= MAX_PERIOD_SAMPLES else None
+    
+    def _envelope(self, i, num_samples, fade_samples):
+        """Ganho do envelope (fade in/out) na amostra i"""
+        if i < fade_samples:
+            return i / fade_samples
+        if i > num_samples - fade_samples:
+            return (num_samples - i) / fade_samples
+        return 1.0
+    
+    def _render_numpy(self, frequencies, amplitudes, num_samples, fade_samples):
+        fade_in = np.arange(fade_samples) / fade_samples
+        for start in range(0, num_samples, BLOCK_SIZE):
+            i = np.arange(start, min(start + BLOCK_SIZE, num_samples))
+            t = i / self.sample_rate
+            sample = np.zeros(len(i))
+            for frequency, amplitude in zip(frequencies, amplitudes):
+                sample += amplitude * np.sin(2 * np.pi * frequency * t)
+            
+            # Envelope pré-calculado para o fade in; fade out é o espelho
+            head = i < fade_samples
+            sample[head] *= fade_in[i[head]]
+            tail = i > num_samples - fade_samples
+            sample[tail] *= (num_samples - i[tail]) / fade_samples
+            
+            yield (sample * 32767).astype("<i2").tobytes()
+    
+    def _render_array(self, frequencies, amplitudes, num_samples, fade_samples):
+        period = self._period(frequencies)
+        
+        def value(i):
+            t = i / self.sample_rate
+            return sum(a * math.sin(2 * math.pi * f * t) for f, a in zip(frequencies, amplitudes))
+        
+        if period:
+            # Um período da onda calculado uma vez; o trecho sem envelope é só cópia
+            table = [value(i) for i in range(period)]
+            steady = array('h', (int(v * 32767) for v in table))
+            if sys.byteorder == "big":
+                steady.byteswap()
+            steady_bytes = steady.tobytes()
+        
+        for start in range(0, num_samples, BLOCK_SIZE):
+            end = min(start + BLOCK_SIZE, num_samples)
+            if period and start >= fade_samples and end - 1 <= num_samples - fade_samples:
+                offset = (start % period) * 2
+                repeats = ((end - start) * 2 + offset) // len(steady_bytes) + 1
+                yield (steady_bytes * repeats)[offset:offset + (end - start) * 2]
+                continue
+            
+            block = array('h', bytes(2 * (end - start)))
+            for i in range(start, end):
+                v = table[i % period] if period else value(i)
+                block[i - start] = int(v * self._envelope(i, num_samples, fade_samples) * 32767)
+            if sys.byteorder == "big":
+                block.byteswap()
+            yield block.tobytes()
+    
+    def render_blocks(self, frequencies, amplitudes, duration, fade_seconds):
+        """
+        Gera PCM 16-bit mono em blocos de BLOCK_SIZE amostras
+        
+        Args:
+            frequencies: Frequências em Hz a somar
+            amplitudes: Amplitude de cada frequência (0.0 a 1.0)
+            duration: Duração em segundos
+            fade_seconds: Duração do fade in/out em segundos
+        """
+        num_samples = int(self.sample_rate * duration)
+        fade_samples = max(1, int(self.sample_rate * fade_seconds))
+        if np is not None:
+            return self._render_numpy(frequencies, amplitudes, num_samples, fade_samples)
+        return self._render_array(frequencies, amplitudes, num_samples, fade_samples)
+    
+    def wav_header(self, num_samples):
+        """Cabeçalho RIFF/WAV de 44 bytes para PCM 16-bit mono"""
+        data_size = num_samples * 2
+        return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_size, b'WAVE',
+                           b'fmt ', 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16,
+                           b'data', data_size)
+    
+    def stream_wav(self, frequencies, amplitudes, duration, fade_seconds):
+        """Gera um arquivo WAV completo em pedaços: cabeçalho e depois os blocos PCM"""
+        yield self.wav_header(int(self.sample_rate * duration))
+        yield from self.render_blocks(frequencies, amplitudes, duration, fade_seconds)
+    
+    def write_wav(self, filepath, blocks, duration):
+        """Grava blocos PCM direto no arquivo WAV, sem juntar tudo em memória"""
+        with wave.open(filepath, 'wb') as wav_file:
+            wav_file.setnchannels(1)  # Mono
+            wav_file.setsampwidth(2)  # 16-bit
+            wav_file.setframerate(self.sample_rate)
+            wav_file.setnframes(int(self.sample_rate * duration))
+            for block in blocks:
+                wav_file.writeframesraw(block)
+        return filepath
+    
     def generate_sacred_tone(self, frequency, duration=60, volume=0.15):
         """
         Gera um tom senoidal puro
@@ -27,36 +151,13 @@ class DivineAudioGenerator:
             duration: Duração em segundos
             volume: Volume (0.0 a 1.0)
         """
-        num_samples = int(self.sample_rate * duration)
-        wave_data = []
-        
-        for i in range(num_samples):
-            # Gera onda senoidal
-            t = i / self.sample_rate
-            sample = volume * math.sin(2 * math.pi * frequency * t)
-            
-            # Aplica envelope suave (fade in/out)
-            if i < self.sample_rate * 2:  # 2s fade in
-                sample *= i / (self.sample_rate * 2)
-            elif i > num_samples - self.sample_rate * 2:  # 2s fade out
-                sample *= (num_samples - i) / (self.sample_rate * 2)
-            
-            # Converte para 16-bit signed integer
-            wave_data.append(struct.pack('h', int(sample * 32767)))
-        
-        return b''.join(wave_data)
+        return b''.join(self.render_blocks([frequency], [volume], duration, 2))
     
     def generate_432hz_ambient(self, duration=90):
         """Gera tom 432Hz (Frequência Natural da Terra)"""
         print("🎵 Gerando tom 432Hz (Frequência Natural)...")
-        audio_data = self.generate_sacred_tone(432, duration, 0.15)
-        
         filepath = os.path.join(self.output_dir, "ambient_432hz.wav")
-        with wave.open(filepath, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(audio_data)
+        self.write_wav(filepath, self.render_blocks([432], [0.15], duration, 2), duration)
         
         print(f"   ✅ Salvo: {filepath}")
         return filepath
@@ -64,14 +165,8 @@ class DivineAudioGenerator:
     def generate_528hz_healing(self, duration=90):
         """Gera tom 528Hz (Frequência de Cura do DNA)"""
         print("🎵 Gerando tom 528Hz (Frequência de Cura)...")
-        audio_data = self.generate_sacred_tone(528, duration, 0.15)
-        
         filepath = os.path.join(self.output_dir, "healing_528hz.wav")
-        with wave.open(filepath, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(audio_data)
+        self.write_wav(filepath, self.render_blocks([528], [0.15], duration, 2), duration)
         
         print(f"   ✅ Salvo: {filepath}")
         return filepath
@@ -79,34 +174,8 @@ class DivineAudioGenerator:
     def generate_divine_blend(self, duration=120):
         """Mistura 432Hz + 528Hz para frequência divina"""
         print("🎵 Gerando mistura divina (432Hz + 528Hz)...")
-        
-        num_samples = int(self.sample_rate * duration)
-        wave_data = []
-        
-        for i in range(num_samples):
-            t = i / self.sample_rate
-            
-            # Mistura as duas frequências
-            sample_432 = 0.10 * math.sin(2 * math.pi * 432 * t)
-            sample_528 = 0.10 * math.sin(2 * math.pi * 528 * t)
-            sample = sample_432 + sample_528
-            
-            # Envelope
-            if i < self.sample_rate * 3:  # 3s fade in
-                sample *= i / (self.sample_rate * 3)
-            elif i > num_samples - self.sample_rate * 3:  # 3s fade out
-                sample *= (num_samples - i) / (self.sample_rate * 3)
-            
-            wave_data.append(struct.pack('h', int(sample * 32767)))
-        
-        audio_data = b''.join(wave_data)
-        
         filepath = os.path.join(self.output_dir, "divine_blend.wav")
-        with wave.open(filepath, 'wb') as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(audio_data)
+        self.write_wav(filepath, self.render_blocks([432, 528], [0.10, 0.10], duration, 3), duration)
         
         print(f"   ✅ Salvo: {filepath}")
         return filepath
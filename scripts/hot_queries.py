@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Precomputed Hot Queries
+Materializes full analyses of frequent queries into a memory-mapped lookup table
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import unquote_plus
+
+import numpy as np
+
+from result_cache import cache_key, normalize_query
+
+DEFAULT_HOT_DIR = "outputs/hot_queries"
+# Bump when the on-disk layout changes so artifacts are rebuilt
+HOT_FORMAT_VERSION = 1
+DEFAULT_MAX_QUERIES = 500
+
+# Query strings in access log request lines, e.g. "GET /api/analyze/stream?query=... HTTP/1.1"
+_LOG_QUERY = re.compile(r"/api/analyze[^\s\"?]*\?(?:[^\s\"]*&)?query=([^&\s\"]+)")
+
+logger = logging.getLogger("oracle_biblico.hot_queries")
+
+
+class HotQueryStore:
+    """Read-only table of precomputed results, keyed by result cache key
+
+    keys.npy holds the sorted SHA-256 digests of the cache keys and
+    offsets.npy where each zlib-compressed JSON result starts in
+    payloads.bin; all three are memory-mapped, so a lookup is a binary search
+    plus decompressing one result, and the table costs no heap until used.
+    """
+
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, payloads: np.ndarray,
+                 config: Dict):
+        self.keys = keys
+        self.offsets = offsets
+        self.payloads = payloads
+        self.config = config
+        self.version = config["version"]
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, results: Dict[str, Dict], version: Dict, directory: str = DEFAULT_HOT_DIR,
+              queries_fingerprint: str = "") -> "HotQueryStore":
+        """Writes {cache key: result} as a new table, replacing any previous one"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        ordered = sorted((bytes.fromhex(key), result) for key, result in results.items())
+        offsets = [0]
+        with open(tmp_dir / "payloads.bin", "wb") as f:
+            for _, result in ordered:
+                payload = zlib.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"), 6)
+                f.write(payload)
+                offsets.append(offsets[-1] + len(payload))
+        np.save(tmp_dir / "keys.npy", np.array([key for key, _ in ordered], dtype="S32"))
+        np.save(tmp_dir / "offsets.npy", np.asarray(offsets, dtype=np.uint64))
+
+        config = {
+            "format_version": HOT_FORMAT_VERSION,
+            "version": version,
+            "num_results": len(ordered),
+            "payload_bytes": offsets[-1],
+            "queries_fingerprint": queries_fingerprint,
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        with open(tmp_dir / "hot_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial table
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return cls.load(str(directory))
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_HOT_DIR) -> "HotQueryStore":
+        """Memory-maps a table written by build()"""
+        directory = Path(directory)
+        with open(directory / "hot_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format_version") != HOT_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported hot query table; rebuild it")
+        if config["payload_bytes"]:
+            payloads = np.memmap(directory / "payloads.bin", dtype=np.uint8, mode="r")
+        else:
+            payloads = np.empty(0, dtype=np.uint8)  # mmap cannot map an empty file
+        return cls(np.load(directory / "keys.npy", mmap_mode="r"),
+                   np.load(directory / "offsets.npy", mmap_mode="r"), payloads, config)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """The precomputed result for a cache key, or None"""
+        # Items of an S32 array drop trailing NUL bytes, so the probe must as well
+        digest = bytes.fromhex(key).rstrip(b"\0")
+        row = int(np.searchsorted(self.keys, digest))
+        found = row < len(self.keys) and self.keys[row] == digest
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not found:
+            return None
+        payload = self.payloads[int(self.offsets[row]):int(self.offsets[row + 1])]
+        return json.loads(zlib.decompress(payload.tobytes()))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self), "hits": self.hits, "misses": self.misses,
+                    "built_at": self.config.get("built_at")}
+
+
+def load_hot_queries(directory: str = DEFAULT_HOT_DIR,
+                     version: Optional[Dict] = None) -> Optional[HotQueryStore]:
+    """The table, or None if it has not been built or was built for another pipeline version"""
+    if not (Path(directory) / "hot_config.json").exists():
+        return None
+    store = HotQueryStore.load(directory)
+    if version is not None and store.version != version:
+        logger.warning("Ignoring %s: built for pipeline version %s, running %s; "
+                       "rerun hot_queries.py", directory, store.version, version)
+        return None
+    return store
+
+
+def read_query_list(path: str) -> List[str]:
+    """Queries from a text file (one per line) or JSONL ({"query": ...} or strings)"""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                line = record if isinstance(record, str) else record.get("query", "")
+            if line:
+                queries.append(line)
+    return queries
+
+
+def mine_access_log(path: str) -> Counter:
+    """Counts analyze queries found in request lines of an access log"""
+    counts = Counter()
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            for match in _LOG_QUERY.finditer(line):
+                counts[unquote_plus(match.group(1))] += 1
+    return counts
+
+
+def rank_queries(sources: Iterable[Dict[str, int]], limit: int = DEFAULT_MAX_QUERIES) -> List[str]:
+    """The limit most frequent queries across sources, one spelling per normalized query"""
+    totals = Counter()
+    spelling = {}
+    for counts in sources:
+        for query, count in counts.items():
+            normalized = normalize_query(query)
+            if normalized:
+                totals[normalized] += count
+                spelling.setdefault(normalized, query)
+    return [spelling[normalized] for normalized, _ in totals.most_common(limit)]
+
+
+def queries_fingerprint(queries: Sequence[str], version: Dict) -> str:
+    keys = sorted({cache_key(query, version) for query in queries})
+    return hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+
+
+def materialize(pipeline, queries: Sequence[str], directory: str = DEFAULT_HOT_DIR,
+                processes: Optional[int] = None, force: bool = False) -> Optional[HotQueryStore]:
+    """Analyzes queries in parallel and writes their results as the hot table
+
+    Returns None without doing any work when the existing table was built
+    for the same pipeline version and query set (unless force). Partial
+    results (a layer failed) are left out so they are retried live. Results
+    are not written to the result store: --from-store mines it, and counting
+    these runs would keep promoting the queries already in the table.
+    """
+    fingerprint = queries_fingerprint(queries, pipeline.version)
+    config_file = Path(directory) / "hot_config.json"
+    if not force and config_file.exists():
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if (config.get("format_version") == HOT_FORMAT_VERSION
+                and config.get("version") == pipeline.version
+                and config.get("queries_fingerprint") == fingerprint):
+            return None
+
+    results = {}
+    for query, result in zip(queries, pipeline.analyze_batch(list(queries), processes,
+                                                             store=False)):
+        if "layer_errors" not in result:
+            results[cache_key(query, pipeline.version)] = result
+    return HotQueryStore.build(results, pipeline.version, directory, fingerprint)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Precomputed Hot Queries")
+    parser.add_argument("--queries", action="append", default=[],
+                        help="Query list: text (one per line) or JSONL; repeatable")
+    parser.add_argument("--from-store", action="store_true",
+                        help="Mine the most frequent queries from outputs/results.db")
+    parser.add_argument("--access-log", action="append", default=[],
+                        help="Mine ?query= values from an access log; repeatable")
+    parser.add_argument("--limit", type=int, default=DEFAULT_MAX_QUERIES,
+                        help="Most frequent mined queries to keep")
+    parser.add_argument("--output", default=DEFAULT_HOT_DIR)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even if the table is current")
+    args = parser.parse_args(argv)
+
+    # Imported here: the pipeline itself imports this module to serve the table
+    from analysis_pipeline import BiblicalAnalysisPipeline
+    pipeline = BiblicalAnalysisPipeline()
+
+    listed = [query for path in args.queries for query in read_query_list(path)]
+    mined = [mine_access_log(path) for path in args.access_log]
+    if args.from_store:
+        mined.append(dict(pipeline.store.top_queries(args.limit)))
+    # Listed queries first, in file order, then the most frequent mined ones
+    queries, seen = [], set()
+    for query in listed + rank_queries(mined, args.limit):
+        normalized = normalize_query(query)
+        if normalized and normalized not in seen:
+            seen.add(normalized)
+            queries.append(query)
+    if not queries:
+        parser.error("no queries: give --queries, --from-store or --access-log")
+
+    pipeline.warm_up()
+    started = time.perf_counter()
+    store = materialize(pipeline, queries, args.output, args.processes, args.force)
+    if store is None:
+        print(f"✓ {args.output} is current ({len(queries)} queries); nothing to do")
+        return
+    print(f"✓ Materialized {len(store)} of {len(queries)} queries in "
+          f"{time.perf_counter() - started:.1f}s -> {args.output} "
+          f"({store.config['payload_bytes'] / 1024:.0f}KB)")
+
+
+if __name__ == "__main__":
+    main()
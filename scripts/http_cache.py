@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - HTTP Caching Helpers
+Entity tags, JSON compression and content hashes for cache-busting static URLs
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli  # optional: gzip is used when it is not installed
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024  # smaller bodies are not worth the CPU or the header
+COMPRESSIBLE_TYPES = ("application/json",)
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # may be stored, but must be revalidated (cheap with an ETag)
+_HASH_CHUNK = 1 << 20
+
+
+def json_body(payload) -> bytes:
+    """Compact UTF-8 JSON, as sent to clients"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag_for(*parts) -> str:
+    """Stable (unquoted) entity tag for a resource identified by parts, e.g. a result id"""
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:24]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best content coding we can produce that the client accepts ("br", "gzip" or None)"""
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class EncodedBodyCache:
+    """LRU of compressed bodies keyed by (etag, coding)
+
+    A resource with the same ETag has the same bytes, so repeat requests for
+    it (e.g. a stored result) skip recompressing.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compress(self, etag: Optional[str], encoding: str, body: bytes) -> bytes:
+        if etag is None:
+            return compress(body, encoding)
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        encoded = compress(body, encoding)
+        with self._lock:
+            self._entries[key] = encoded
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+
+def encode_json(payload, accept_encoding: str,
+                min_bytes: int = COMPRESS_MIN_BYTES) -> Tuple[bytes, Dict[str, str]]:
+    """(body, headers) for a JSON payload, compressed when large and accepted
+
+    For servers that build responses themselves (the ASGI endpoints).
+    """
+    body = json_body(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = choose_encoding(accept_encoding) if len(body) >= min_bytes else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+class StaticVersions:
+    """Content hashes of static files, for cache-busting ?v= URLs
+
+    Hashes are remembered per (size, mtime), so a file is only read again
+    after it changes.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, filename: str) -> Optional[str]:
+        path = self.root / filename
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            known = self._hashes.get(filename)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                digest.update(chunk)
+        version = digest.hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (stat.st_size, stat.st_mtime_ns, version)
+        return version
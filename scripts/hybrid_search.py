@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Hybrid Retrieval
+BM25 sparse index, reciprocal-rank fusion with the dense index and re-ranking
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gematria import words
+
+BM25_FORMAT_VERSION = 2
+# Candidates taken from each retriever, and how many fused hits a re-ranker sees
+CANDIDATES = 100
+RERANK_DEPTH = 30
+RRF_K = 60
+
+
+def terms(text: str) -> List[str]:
+    """Accent-insensitive words plus adjacent pairs
+
+    Pairs make exact references ("joao 3", "3 16") and multi-word names
+    score above documents that merely contain the same words somewhere.
+    """
+    tokens = words(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit term hash, so the index needs no vocabulary
+
+    Wide enough that distinct terms (word pairs included) do not collide in
+    any realistic corpus; a shared hash would merge their postings and df.
+    """
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def document_text(document: Dict) -> str:
+    """What the sparse index sees: the text plus its reference, if any"""
+    ref = document.get("ref") or document.get("metadata", {}).get("ref")
+    return f"{ref} {document.get('text', '')}" if ref else document.get("text", "")
+
+
+class BM25Builder:
+    """Accumulates (id, document) pairs into compact typed arrays, then a BM25Index"""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.lengths = array("I")
+        self._rows = array("I")
+        self._terms = array("Q")
+        self._freqs = array("H")
+
+    def add(self, doc_id: int, document: Dict):
+        row = len(self.ids)
+        counts = Counter(term_hash(term) for term in terms(document_text(document)))
+        self.ids.append(doc_id)
+        self.lengths.append(sum(counts.values()))
+        self._rows.extend([row] * len(counts))
+        self._terms.extend(counts.keys())
+        self._freqs.extend(min(count, 0xFFFF) for count in counts.values())
+
+    def build(self) -> "BM25Index":
+        """Groups postings by term hash (CSR); rows stay ascending within each term"""
+        hashes = np.frombuffer(self._terms, dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+        term_hashes, counts = np.unique(hashes[order], return_counts=True)
+        offsets = np.zeros(len(term_hashes) + 1, dtype=np.uint64)
+        np.cumsum(counts, out=offsets[1:])
+        return BM25Index(np.frombuffer(self.ids, dtype=np.int64).copy(),
+                         np.frombuffer(self.lengths, dtype=np.uint32).copy(),
+                         term_hashes,
+                         offsets,
+                         np.frombuffer(self._rows, dtype=np.uint32)[order],
+                         np.frombuffer(self._freqs, dtype=np.uint16)[order])
+
+
+class BM25Index:
+    """Okapi BM25 over hashed terms with CSR postings
+
+    term_hashes is the sorted table of every indexed term's 64-bit hash and
+    `offsets[t]:offsets[t + 1]` slices that term's postings, so a query term
+    is found by binary search and only ever reads its own postings. Their
+    contributions are summed per document with one bincount over the touched
+    rows, so cost follows the query's posting lengths rather than the corpus
+    size.
+    """
+
+    _ARRAYS = ("ids", "lengths", "term_hashes", "offsets", "postings", "freqs")
+
+    def __init__(self, ids: np.ndarray, lengths: np.ndarray, term_hashes: np.ndarray,
+                 offsets: np.ndarray, postings: np.ndarray, freqs: np.ndarray,
+                 k1: float = 1.2, b: float = 0.75):
+        self.ids = ids
+        self.lengths = lengths
+        self.term_hashes = term_hashes
+        self.offsets = offsets
+        self.postings = postings
+        self.freqs = freqs
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, Dict]]) -> "BM25Index":
+        builder = BM25Builder()
+        for doc_id, document in documents:
+            builder.add(doc_id, document)
+        return builder.build()
+
+    def search(self, query: str, k: int = CANDIDATES) -> List[Tuple[int, float]]:
+        """(document id, score) of the k best matches, best first"""
+        n = len(self)
+        wanted = np.array(sorted({term_hash(term) for term in terms(query)}), dtype=np.uint64)
+        positions = np.searchsorted(self.term_hashes, wanted)
+        found = positions < len(self.term_hashes)
+        found[found] = self.term_hashes[positions[found]] == wanted[found]
+        spans = [(int(self.offsets[t]), int(self.offsets[t + 1])) for t in positions[found]]
+        if not n or not spans:
+            return []
+
+        rows = np.concatenate([self.postings[start:end] for start, end in spans])
+        freqs = np.concatenate([self.freqs[start:end] for start, end in spans]).astype(np.float32)
+        dfs = np.array([end - start for start, end in spans], dtype=np.float32)
+        idf = np.log1p((n - dfs + 0.5) / (dfs + 0.5))
+        weights = np.repeat(idf, [end - start for start, end in spans])
+
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[rows] / max(self.avg_length, 1e-9))
+        contributions = weights * freqs * (self.k1 + 1) / (freqs + norm)
+        touched, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+
+        k = min(k, len(touched))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(touched) else np.arange(len(touched))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[touched[i]]), float(scores[i])) for i in top]
+
+    def save(self, directory: str) -> Dict:
+        """Writes the arrays and config, replacing any previous index"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        for name in self._ARRAYS:
+            np.save(tmp_dir / f"{name}.npy", getattr(self, name))
+        config = {
+            "format_version": BM25_FORMAT_VERSION,
+            "num_documents": len(self),
+            "num_terms": int(len(self.term_hashes)),
+            "num_postings": int(len(self.postings)),
+            "k1": self.k1,
+            "b": self.b
+        }
+        with open(tmp_dir / "bm25_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial index
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return config
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        """Memory-maps an index saved by save()"""
+        directory = Path(directory)
+        with open(directory / "bm25_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format_version") != BM25_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported BM25 index; rebuild it")
+
+        arrays = [np.load(directory / f"{name}.npy", mmap_mode="r") for name in cls._ARRAYS]
+        return cls(*arrays, config["k1"], config["b"])
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuses ranked id lists: score(id) = sum of 1 / (k + rank) over the lists"""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class OverlapReranker:
+    """Offline re-ranker: share of the query's words and word pairs found in a hit
+
+    Pairs weigh double, so a hit containing the exact reference or name
+    ("joao 3:16", "monte sinai") outranks one that has the words apart.
+    """
+
+    name = "overlap"
+
+    def score(self, query: str, hits: List[Dict]) -> np.ndarray:
+        query_terms = set(terms(query))
+        if not query_terms or not hits:
+            return np.zeros(len(hits), dtype=np.float32)
+        weights = {term: 2.0 if " " in term else 1.0 for term in query_terms}
+        total = sum(weights.values())
+        return np.array([sum(weights[term] for term in query_terms & set(terms(document_text(hit))))
+                         / total for hit in hits], dtype=np.float32)
+
+
+class CrossEncoderReranker:
+    """Re-ranks with a sentence-transformers cross-encoder (query, passage) model"""
+
+    name = "cross-encoder"
+
+    def __init__(self, model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"):
+        from sentence_transformers import CrossEncoder  # optional dependency
+        self.model = model
+        self._encoder = CrossEncoder(model)
+
+    def score(self, query: str, hits: List[Dict]) -> np.ndarray:
+        if not hits:
+            return np.zeros(0, dtype=np.float32)
+        pairs = [(query, document_text(hit)) for hit in hits]
+        return np.asarray(self._encoder.predict(pairs), dtype=np.float32)
+
+
+class HybridRetriever:
+    """Dense + BM25 retrieval fused with reciprocal-rank fusion, then re-ranked
+
+    Each retriever contributes at most `candidates` ids and the re-ranker sees
+    at most `rerank_depth` fused hits, so per-query work is bounded no matter
+    how large the corpus is. The dense side is a VectorIndex or CompositeIndex;
+    documents for sparse-only hits are fetched from it by id.
+    """
+
+    def __init__(self, dense, sparse: Optional[BM25Index], reranker=None,
+                 candidates: int = CANDIDATES, rerank_depth: int = RERANK_DEPTH,
+                 rrf_k: int = RRF_K):
+        self.dense = dense
+        self.sparse = sparse
+        self.reranker = reranker
+        self.candidates = candidates
+        self.rerank_depth = rerank_depth
+        self.rrf_k = rrf_k
+
+    def search(self, query: str, k: int = 5, mode: str = "hybrid",
+               approximate: Optional[bool] = None) -> List[Dict]:
+        """Top-k hits; mode is "hybrid", "dense" or "sparse" """
+        if mode not in ("hybrid", "dense", "sparse"):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        if mode != "dense" and self.sparse is None:
+            raise ValueError("No BM25 index available; rebuild the RAG index")
+
+        depth = max(k, self.rerank_depth if self.reranker is not None else k)
+        dense_hits = ([] if mode == "sparse" else
+                      self.dense.search(query, max(self.candidates, depth), approximate=approximate))
+        sparse_hits = [] if mode == "dense" else self.sparse.search(query, max(self.candidates, depth))
+
+        dense_scores = {hit["id"]: hit["score"] for hit in dense_hits}
+        sparse_scores = dict(sparse_hits)
+        fused = reciprocal_rank_fusion(
+            [list(dense_scores), [doc_id for doc_id, _ in sparse_hits]], self.rrf_k)[:depth]
+
+        documents = {hit["id"]: hit for hit in dense_hits}
+        missing = [doc_id for doc_id, _ in fused if doc_id not in documents]
+        documents.update(zip(missing, self.dense.documents_for_ids(missing)))
+
+        hits = []
+        for doc_id, score in fused:
+            document = documents.get(doc_id)
+            if document is None:
+                continue  # deleted from the dense side since the sparse index was built
+            if mode != "hybrid":
+                # One retriever: keep its own score rather than the fusion score
+                score = dense_scores[doc_id] if mode == "dense" else sparse_scores[doc_id]
+            hits.append({
+                "id": doc_id,
+                "score": score,
+                "dense_score": dense_scores.get(doc_id),
+                "sparse_score": sparse_scores.get(doc_id),
+                "text": document.get("text", ""),
+                "metadata": document.get("metadata", {})
+            })
+
+        if self.reranker is not None and hits:
+            rerank_scores = self.reranker.score(query, hits)
+            for hit, rerank_score in zip(hits, rerank_scores):
+                hit["rerank_score"] = float(rerank_score)
+            order = np.argsort(-rerank_scores, kind="stable")  # ties keep fused order
+            hits = [hits[i] for i in order]
+        return hits[:k]
+
+
+def make_reranker(name: Optional[str]):
+    """"overlap" (offline), a cross-encoder model name, or None for no re-ranking"""
+    if not name:
+        return None
+    if name == OverlapReranker.name:
+        return OverlapReranker()
+    return CrossEncoderReranker(name)
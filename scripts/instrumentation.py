@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Instrumentation
+Prometheus-style metrics, sampling cProfile hook and logging configuration
+"""
+
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+SIZE_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+LOGGING_OFF = logging.CRITICAL + 1  # above every level, so nothing is emitted
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} "
+                             f"{_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, List] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            position = bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                plain = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+                lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose value is read from fn() at scrape time"""
+
+    def __init__(self, name: str, help_text: str, kind: str, fn: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}",
+                f"{self.name} {_format_value(self.fn())}"]
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def callback(self, name: str, help_text: str, fn: Callable[[], float],
+                 kind: str = "gauge") -> CallbackMetric:
+        """Exports a value kept elsewhere (cache stats, coalescing counters)"""
+        with self._lock:
+            metric = self._metrics[name] = CallbackMetric(name, help_text, kind, fn)
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestProfiler:
+    """Opt-in sampling profiler for analysis requests
+
+    A request is profiled when it asks for it (e.g. ?profile=1) or when it is
+    every Nth request (every=N, 0 disables sampling). Profiles of sampled
+    requests are only written if the request took at least slow_seconds;
+    requested profiles are always written. Output is a .prof file (for
+    snakeviz/pstats) plus a text summary of the top functions.
+    """
+
+    def __init__(self, every: int = 0, slow_seconds: float = 1.0,
+                 output_dir: str = "outputs/profiles", top: int = 40):
+        self.every = every
+        self.slow_seconds = slow_seconds
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """ORACLE_PROFILE_EVERY and ORACLE_PROFILE_SLOW_MS configure sampling"""
+        return cls(every=int(os.environ.get("ORACLE_PROFILE_EVERY", "0")),
+                   slow_seconds=float(os.environ.get("ORACLE_PROFILE_SLOW_MS", "1000")) / 1000)
+
+    def should_profile(self, requested: bool = False) -> bool:
+        if requested:
+            return True
+        if not self.every:
+            return False
+        with self._lock:
+            self._requests += 1
+            return self._requests % self.every == 0
+
+    def dump(self, profiles: Dict, seconds: float, requested: bool, label: str) -> Optional[str]:
+        """Merges per-layer cProfile data and writes it if requested or slow; returns the path"""
+        if not profiles or (not requested and seconds < self.slow_seconds):
+            return None
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        base = self.output_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{label}"
+
+        merged = None
+        for profile in profiles.values():
+            if merged is None:
+                merged = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+        merged.dump_stats(str(base.with_suffix(".prof")))
+
+        summary = io.StringIO()
+        pstats.Stats(str(base.with_suffix(".prof")), stream=summary) \
+            .sort_stats("cumulative").print_stats(self.top)
+        with open(base.with_suffix(".txt"), "w", encoding="utf-8") as f:
+            f.write(f"Layers: {', '.join(profiles)}; wall time {seconds * 1000:.1f}ms\n")
+            f.write(summary.getvalue())
+        logging.getLogger("oracle_biblico.profiler").info(
+            "Wrote profile %s (%.1fms)", base.with_suffix(".prof"), seconds * 1000)
+        return str(base.with_suffix(".prof"))
+
+
+def configure_logging(level: Optional[str] = None):
+    """Leveled logging for the oracle_biblico.* loggers
+
+    The level comes from the argument or ORACLE_LOG_LEVEL (default INFO);
+    "OFF" silences them entirely. Modules log through child loggers, which
+    inherit the level (a disabled flag would only cover the parent).
+    """
+    level = (level or os.environ.get("ORACLE_LOG_LEVEL", "INFO")).upper()
+    logger = logging.getLogger("oracle_biblico")
+    logger.disabled = False
+    if level == "OFF":
+        logger.setLevel(LOGGING_OFF)
+        return
+    logger.setLevel(level)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
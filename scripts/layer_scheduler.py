@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Layer Scheduler
+Runs independent analysis layers concurrently on a thread pool
+"""
+
+import asyncio
+import cProfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+# on_layer(name, result, error): exactly one of result/error is set
+LayerCallback = Callable[[str, Optional[Dict], Optional[str]], None]
+
+# From Python 3.12 cProfile sits on the process-wide sys.monitoring and only
+# one profiler can be enabled at a time, so profiled layers run one by one
+_PROFILING = threading.Lock()
+
+
+class Layer:
+    """An analysis layer, the layers whose output it needs and the resources it uses
+
+    resources names entries of a ResourceRegistry (indexes, lexicon, models)
+    so they can be warmed up ahead of the first request.
+    """
+
+    def __init__(self, name: str, fn: Callable, depends_on: Optional[List[str]] = None,
+                 timeout: Optional[float] = None, resources: Optional[List[str]] = None):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on or [])
+        self.timeout = timeout
+        self.resources = list(resources or [])
+
+    def run(self, query: str, dep_results: Dict[str, Dict]) -> Dict:
+        """Layers without dependencies receive the query only"""
+        if self.depends_on:
+            return self.fn(query, dep_results)
+        return self.fn(query)
+
+
+def _measured_run(layer: Layer, query: str, dep_results: Dict[str, Dict], profile: bool,
+                  started: Dict[str, float]):
+    """Runs a layer on its worker thread; returns (result, CPU seconds, profile or None)
+
+    Records in started when the layer actually began, which is when its
+    timeout starts counting (it may have waited for a free worker first).
+    Profiled layers also wait for any other profiled layer to finish.
+    """
+    with _PROFILING if profile else nullcontext():
+        started[layer.name] = time.perf_counter()
+        profiler = cProfile.Profile() if profile else None
+        start = time.thread_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = layer.run(query, dep_results)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        return result, time.thread_time() - start, profiler
+
+
+class LayerRun:
+    """Outcome of one scheduler run: successful results plus per-layer errors
+
+    timings holds wall seconds per layer, cpu_timings the CPU seconds spent on
+    the layer's worker thread (layers that timed out have none) and profiles a
+    cProfile.Profile per layer when the run was profiled.
+    """
+
+    def __init__(self):
+        self.results: Dict[str, Dict] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+        self.cpu_timings: Dict[str, float] = {}
+        self.profiles: Dict[str, cProfile.Profile] = {}
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.errors)
+
+
+class LayerScheduler:
+    """Executes layers as soon as their dependencies have finished
+
+    Layers whose dependencies failed still run, receiving only the results
+    that are available, so a slow or broken layer degrades the answer instead
+    of failing the whole request. A layer's timeout counts from when it
+    starts running, so time spent queued behind other requests' layers does
+    not use it up; a layer still waiting for a worker after queue_timeout
+    seconds is dropped. Either is reported as an error; a running worker
+    thread cannot be interrupted and finishes in the background.
+    """
+
+    def __init__(self, layers: List[Layer], max_workers: int = 8,
+                 default_timeout: Optional[float] = 30.0,
+                 queue_timeout: Optional[float] = 60.0):
+        self.layers = {layer.name: layer for layer in layers}
+        self.order = [layer.name for layer in layers]
+        self.default_timeout = default_timeout
+        self.queue_timeout = queue_timeout
+        self._validate()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="analysis-layer")
+
+    def _validate(self):
+        for layer in self.layers.values():
+            for dep in layer.depends_on:
+                if dep not in self.layers:
+                    raise ValueError(f"Layer '{layer.name}' depends on unknown layer '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at layer '{name}'")
+            visiting.add(name)
+            for dep in self.layers[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.order:
+            visit(name)
+
+    def _timeout_for(self, layer: Layer) -> Optional[float]:
+        return layer.timeout if layer.timeout is not None else self.default_timeout
+
+    def run(self, query: str, on_layer: Optional[LayerCallback] = None,
+            profile: bool = False) -> LayerRun:
+        """Runs every layer, returning once all have finished, failed or timed out
+
+        on_layer(name, result, error) is called as each layer completes, in
+        completion order, so callers can stream layers before the run ends.
+        profile=True runs each layer under cProfile on its worker thread,
+        one profiled layer at a time.
+        """
+        progress = _RunProgress(self, query, on_layer, profile=profile)
+        progress.submit_ready()
+        while progress.running:
+            done, _ = wait(list(progress.running), timeout=progress.wait_timeout(),
+                           return_when=FIRST_COMPLETED)
+            progress.complete(done)
+            progress.submit_ready()
+        return progress.outcome
+
+    async def run_async(self, query: str, on_layer: Optional[LayerCallback] = None,
+                        profile: bool = False) -> LayerRun:
+        """Same as run(), awaited on the event loop instead of blocking a thread
+
+        Layers still execute on the worker pool; only the bookkeeping moves to
+        the event loop, so many concurrent requests need no thread each.
+        """
+        progress = _RunProgress(self, query, on_layer, profile=profile, wrap=asyncio.wrap_future)
+        progress.submit_ready()
+        while progress.running:
+            done, _ = await asyncio.wait(list(progress.running),
+                                         timeout=progress.wait_timeout(),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            progress.complete(done)
+            progress.submit_ready()
+        return progress.outcome
+
+    def shutdown(self):
+        """Stops the worker pool without waiting for abandoned layers"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _RunProgress:
+    """Bookkeeping for one run, shared by the blocking and asyncio loops"""
+
+    def __init__(self, scheduler: LayerScheduler, query: str,
+                 on_layer: Optional[LayerCallback], profile: bool = False,
+                 wrap: Callable = lambda future: future):
+        self.scheduler = scheduler
+        self.query = query
+        self.on_layer = on_layer
+        self.profile = profile
+        self.wrap = wrap
+        self.outcome = LayerRun()
+        self.submitted, self.finished = set(), set()
+        self.running = {}  # future -> (layer name, submit time)
+        self.started: Dict[str, float] = {}  # set by the worker threads
+
+    def submit_ready(self):
+        for name in self.scheduler.order:
+            if name in self.submitted:
+                continue
+            layer = self.scheduler.layers[name]
+            if not all(dep in self.finished for dep in layer.depends_on):
+                continue
+            dep_results = {dep: self.outcome.results[dep]
+                           for dep in layer.depends_on if dep in self.outcome.results}
+            future = self.wrap(self.scheduler._executor.submit(
+                _measured_run, layer, self.query, dep_results, self.profile, self.started))
+            self.submitted.add(name)
+            self.running[future] = (name, time.perf_counter())
+
+    def _deadline(self, name: str, submitted: float) -> Optional[float]:
+        """Layer timeout counted from its start, or the queue timeout while it waits"""
+        if name in self.started:
+            timeout = self.scheduler._timeout_for(self.scheduler.layers[name])
+            return self.started[name] + timeout if timeout is not None else None
+        queue_timeout = self.scheduler.queue_timeout
+        return submitted + queue_timeout if queue_timeout is not None else None
+
+    def wait_timeout(self) -> Optional[float]:
+        now = time.perf_counter()
+        deadlines = []
+        for name, submitted in self.running.values():
+            deadlines.append(self._deadline(name, submitted))
+            if name not in self.started:
+                # It may start any moment: look again before its timeout could run out
+                timeout = self.scheduler._timeout_for(self.scheduler.layers[name])
+                deadlines.append(now + timeout if timeout is not None else None)
+        deadlines = [d for d in deadlines if d is not None]
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _finish(self, name: str, submitted: float, now: float,
+                result: Optional[Dict] = None, error: Optional[str] = None):
+        self.outcome.timings[name] = now - self.started.get(name, submitted)
+        if error is None:
+            self.outcome.results[name] = result
+        else:
+            self.outcome.errors[name] = error
+        self.finished.add(name)
+        if self.on_layer is not None:
+            self.on_layer(name, result, error)
+
+    def complete(self, done):
+        """Records finished futures, then times out any layer past its deadline"""
+        now = time.perf_counter()
+        for future in done:
+            name, submitted = self.running.pop(future)
+            try:
+                (result, cpu, profiler), error = future.result(), None
+                self.outcome.cpu_timings[name] = cpu
+                if profiler is not None:
+                    self.outcome.profiles[name] = profiler
+            except Exception as e:
+                result, error = None, f"{type(e).__name__}: {e}"
+            self._finish(name, submitted, now, result, error)
+
+        for future, (name, submitted) in list(self.running.items()):
+            deadline = self._deadline(name, submitted)
+            if deadline is None or now < deadline:
+                continue
+            self.running.pop(future)
+            future.cancel()
+            if name in self.started:
+                timeout = self.scheduler._timeout_for(self.scheduler.layers[name])
+                self._finish(name, submitted, now, error=f"Timed out after {timeout:.1f}s")
+            else:
+                self._finish(name, submitted, now, error=f"No free worker within "
+                                                         f"{self.scheduler.queue_timeout:.1f}s")
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Lexicon
+Strong's-style lemma/morphology tables compiled into a compact, memory-mapped store
+"""
+
+import argparse
+import json
+import mmap
+import os
+import shutil
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from dataset_stream import iter_jsonl
+from gematria import normalize, words
+
+LEXICON_FORMAT_VERSION = 1
+DEFAULT_LEXICON_DIR = "data/lexicon"
+DEFAULT_LEXICON_SOURCE = "data/references/lexicon.jsonl"
+LANGUAGES = ("Hebrew", "Aramaic", "Greek")
+
+
+def script_language(word: str) -> Optional[str]:
+    """Hebrew or Greek by script (Aramaic shares the Hebrew script)"""
+    for c in word:
+        if "֐" <= c <= "׿":
+            return "Hebrew"
+        if "Ͱ" <= c <= "Ͽ" or "ἀ" <= c <= "῿":
+            return "Greek"
+    return None
+
+
+class StringTable:
+    """Interned strings: each distinct value is stored once and referenced by id
+
+    On disk the strings are one UTF-8 blob plus an offset table; loaded tables
+    memory-map the blob and decode a string only when it is asked for.
+    """
+
+    def __init__(self, blob=b"", offsets: Optional[np.ndarray] = None):
+        self._blob = blob
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.uint64)
+        self._ids: Optional[Dict[str, int]] = None
+        self._pending: List[str] = []
+
+    @classmethod
+    def builder(cls) -> "StringTable":
+        table = cls()
+        table._ids = {}
+        return table
+
+    def intern(self, value: str) -> int:
+        """Id of a string, adding it on first sight (builder tables only)"""
+        value = value or ""
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self._ids)
+            self._pending.append(value)
+        return string_id
+
+    def __len__(self) -> int:
+        return len(self._pending) if self._ids is not None else len(self.offsets) - 1
+
+    def __getitem__(self, string_id: int) -> str:
+        if self._ids is not None:
+            return self._pending[string_id]
+        start, end = int(self.offsets[string_id]), int(self.offsets[string_id + 1])
+        return self._blob[start:end].decode("utf-8")
+
+    def save(self, directory: Path):
+        encoded = [value.encode("utf-8") for value in self._pending]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        with open(directory / "strings.bin", "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(directory / "string_offsets.npy", offsets)
+
+    @classmethod
+    def load(cls, directory: Path) -> "StringTable":
+        with open(directory / "strings.bin", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return cls(blob, np.load(directory / "string_offsets.npy", mmap_mode="r"))
+
+
+class Lexicon:
+    """Surface forms -> (lemma, Strong's number, gloss, morphology)
+
+    Every string lives once in a StringTable; lemmas and entries are parallel
+    int32 arrays of string ids. Surface forms are held in an array-backed trie
+    (BFS-ordered nodes, each node's edges a sorted slice of `labels`) that also
+    drives tokenization, so attached Hebrew prefixes such as ו or ב split off
+    by longest match. All arrays are memory-mapped .npy files, so web workers
+    loading the same lexicon share its pages.
+    """
+
+    _ARRAYS = ("lemma_text", "lemma_strongs", "lemma_gloss", "lemma_domain", "lemma_language",
+               "entry_lemma", "entry_morph", "form_entries",
+               "trie_edges", "trie_labels", "trie_targets", "trie_terminal")
+
+    def __init__(self, strings: StringTable, arrays: Dict[str, np.ndarray]):
+        self.strings = strings
+        self.arrays = arrays
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        # Python-level views: scalar indexing without numpy scalar overhead
+        self._edges = memoryview(np.ascontiguousarray(self.trie_edges))
+        self._labels = memoryview(np.ascontiguousarray(self.trie_labels))
+        self._targets = memoryview(np.ascontiguousarray(self.trie_targets))
+        self._terminal = memoryview(np.ascontiguousarray(self.trie_terminal))
+
+    def __len__(self) -> int:
+        return len(self.entry_lemma)
+
+    @classmethod
+    def build(cls, records: Iterable[Dict]) -> "Lexicon":
+        """Compiles lexicon records
+
+        Each record has a surface "form" plus its "lemma", "strongs", "gloss",
+        "morph", optional "domain" and "language" (Hebrew, Aramaic or Greek).
+        A form may appear in several records (homographs).
+        """
+        strings = StringTable.builder()
+        lemma_rows: Dict[tuple, int] = {}
+        lemma_columns = ([], [], [], [], [])
+        by_form: Dict[str, List[tuple]] = {}
+
+        for record in records:
+            form = normalize(record.get("form", ""))
+            if not form:
+                continue
+            lemma = record.get("lemma") or form
+            language = record.get("language") or script_language(form) or ""
+            key = (lemma, record.get("strongs", ""))
+            row = lemma_rows.get(key)
+            if row is None:
+                row = lemma_rows[key] = len(lemma_columns[0])
+                lemma_columns[0].append(strings.intern(lemma))
+                lemma_columns[1].append(strings.intern(record.get("strongs", "")))
+                lemma_columns[2].append(strings.intern(record.get("gloss", "")))
+                lemma_columns[3].append(strings.intern(record.get("domain", "")))
+                lemma_columns[4].append(LANGUAGES.index(language) + 1
+                                        if language in LANGUAGES else 0)
+            by_form.setdefault(form, []).append((row, strings.intern(record.get("morph", ""))))
+
+        forms = sorted(by_form)
+        entry_lemma, entry_morph, form_entries = [], [], [0]
+        for form in forms:
+            for row, morph in by_form[form]:
+                entry_lemma.append(row)
+                entry_morph.append(morph)
+            form_entries.append(len(entry_lemma))
+
+        arrays = {
+            "lemma_text": np.array(lemma_columns[0], dtype=np.int32),
+            "lemma_strongs": np.array(lemma_columns[1], dtype=np.int32),
+            "lemma_gloss": np.array(lemma_columns[2], dtype=np.int32),
+            "lemma_domain": np.array(lemma_columns[3], dtype=np.int32),
+            "lemma_language": np.array(lemma_columns[4], dtype=np.uint8),
+            "entry_lemma": np.array(entry_lemma, dtype=np.int32),
+            "entry_morph": np.array(entry_morph, dtype=np.int32),
+            "form_entries": np.array(form_entries, dtype=np.int32)
+        }
+        arrays.update(_build_trie(forms))
+        return cls(strings, arrays)
+
+    def save(self, directory: str = DEFAULT_LEXICON_DIR) -> Dict:
+        """Writes the string table and arrays, replacing any previous lexicon"""
+        directory = Path(directory)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        self.strings.save(tmp_dir)
+        for name in self._ARRAYS:
+            np.save(tmp_dir / f"{name}.npy", self.arrays[name])
+        config = {
+            "format_version": LEXICON_FORMAT_VERSION,
+            "num_lemmas": len(self.lemma_text),
+            "num_entries": len(self.entry_lemma),
+            "num_forms": len(self.form_entries) - 1,
+            "num_strings": len(self.strings),
+            "trie_nodes": len(self.trie_terminal)
+        }
+        with open(tmp_dir / "lexicon_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial lexicon
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return config
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_LEXICON_DIR) -> "Lexicon":
+        """Memory-maps a lexicon saved by save()"""
+        directory = Path(directory)
+        with open(directory / "lexicon_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format_version") != LEXICON_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported lexicon; rebuild it")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r")
+                  for name in cls._ARRAYS}
+        return cls(StringTable.load(directory), arrays)
+
+    def _match(self, word: str, start: int) -> tuple:
+        """(end, form id) of the longest form starting at word[start], or (start, -1)"""
+        node, best = 0, (start, -1)
+        for i in range(start, len(word)):
+            lo, hi = self._edges[node], self._edges[node + 1]
+            cp = ord(word[i])
+            j = bisect_left(self._labels, cp, lo, hi)
+            if j == hi or self._labels[j] != cp:
+                break
+            node = self._targets[j]
+            if self._terminal[node] >= 0:
+                best = (i + 1, self._terminal[node])
+        return best
+
+    def segment(self, word: str) -> List[tuple]:
+        """Splits a normalized word into (text, form id or -1) pieces by longest match"""
+        whole_end, whole_form = self._match(word, 0)
+        if whole_end == len(word):
+            return [(word, whole_form)]
+
+        pieces, start, unknown_from = [], 0, None
+        while start < len(word):
+            end, form = self._match(word, start)
+            if form < 0:
+                unknown_from = start if unknown_from is None else unknown_from
+                start += 1
+                continue
+            if unknown_from is not None:
+                pieces.append((word[unknown_from:start], -1))
+                unknown_from = None
+            pieces.append((word[start:end], form))
+            start = end
+        if unknown_from is not None:
+            pieces.append((word[unknown_from:], -1))
+        # Matching a few letters inside an unknown word is noise, not analysis
+        if all(form < 0 or len(text) == 1 for text, form in pieces) and whole_form < 0:
+            return [(word, -1)]
+        return pieces
+
+    def entries(self, form_id: int) -> List[Dict]:
+        """Every analysis of a surface form"""
+        start, end = int(self.form_entries[form_id]), int(self.form_entries[form_id + 1])
+        analyses = []
+        for entry in range(start, end):
+            lemma = int(self.entry_lemma[entry])
+            language = int(self.lemma_language[lemma])
+            analyses.append({
+                "lemma": self.strings[int(self.lemma_text[lemma])],
+                "strongs": self.strings[int(self.lemma_strongs[lemma])],
+                "gloss": self.strings[int(self.lemma_gloss[lemma])],
+                "domain": self.strings[int(self.lemma_domain[lemma])],
+                "language": LANGUAGES[language - 1] if language else None,
+                "morph": self.strings[int(self.entry_morph[entry])]
+            })
+        return analyses
+
+    def analyze(self, text: str) -> List[Dict]:
+        """Tokens of a text with their lexicon analyses (empty for unknown tokens)"""
+        tokens = []
+        for word in words(text):
+            for piece, form in self.segment(word):
+                tokens.append({
+                    "token": piece,
+                    "language": script_language(piece),
+                    "analyses": self.entries(form) if form >= 0 else []
+                })
+        return tokens
+
+
+def _build_trie(forms: List[str]) -> Dict[str, np.ndarray]:
+    """Flattens sorted forms into BFS-ordered trie arrays"""
+    root: Dict = {}
+    for form_id, form in enumerate(forms):
+        node = root
+        for c in form:
+            node = node.setdefault(c, {})
+        node[None] = form_id
+
+    queue, edges, labels, targets, terminal = [root], [0], [], [], []
+    for node in queue:  # the queue grows while it is walked
+        terminal.append(node.get(None, -1))
+        for c in sorted(k for k in node if k is not None):
+            labels.append(ord(c))
+            targets.append(len(queue))
+            queue.append(node[c])
+        edges.append(len(labels))
+
+    return {
+        "trie_edges": np.array(edges, dtype=np.int32),
+        "trie_labels": np.array(labels, dtype=np.uint32),
+        "trie_targets": np.array(targets, dtype=np.int32),
+        "trie_terminal": np.array(terminal, dtype=np.int32)
+    }
+
+
+def build_lexicon(source: str = DEFAULT_LEXICON_SOURCE,
+                  lexicon_dir: str = DEFAULT_LEXICON_DIR) -> Dict:
+    """Compiles a lexicon JSONL (plain, compressed or sharded) into the binary store"""
+    config = Lexicon.build(iter_jsonl(source)).save(lexicon_dir)
+    print(f"✓ Lexicon: {config['num_entries']} entries, {config['num_lemmas']} lemmas, "
+          f"{config['num_strings']} strings -> {lexicon_dir}")
+    return config
+
+
+def load_lexicon(lexicon_dir: str = DEFAULT_LEXICON_DIR) -> Optional[Lexicon]:
+    """The compiled lexicon, or None if it has not been built yet"""
+    if not (Path(lexicon_dir) / "lexicon_config.json").exists():
+        return None
+    return Lexicon.load(lexicon_dir)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Lexicon")
+    parser.add_argument("text", nargs="?", help="Text to tokenize and look up")
+    parser.add_argument("--build", action="store_true",
+                        help="Compile the lexicon source and exit")
+    parser.add_argument("--source", default=DEFAULT_LEXICON_SOURCE,
+                        help="Lexicon JSONL: form, lemma, strongs, gloss, morph, language")
+    parser.add_argument("--lexicon-dir", default=DEFAULT_LEXICON_DIR)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        build_lexicon(args.source, args.lexicon_dir)
+        return
+    if not args.text:
+        parser.error("a text is required unless --build is given")
+    lexicon = load_lexicon(args.lexicon_dir)
+    if lexicon is None:
+        parser.error(f"no lexicon in {args.lexicon_dir}; run with --build first")
+    print(json.dumps(lexicon.analyze(args.text), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Load Test
+Measures /api/analyze throughput against servers started with 1..N worker processes
+"""
+
+import argparse
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_WORKERS = (1, 2, 4)
+READY_TIMEOUT_SECONDS = 120
+
+_WORDS = ("amor deus fé graça aliança profecia cometa estrela reino messias luz vida "
+          "espírito paz templo lei coração glória sinal povo terra céu").split()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(workers: int, port: int) -> List[str]:
+    """gunicorn with the production profile, or uvicorn --workers if gunicorn is missing"""
+    if importlib.util.find_spec("gunicorn") is not None:
+        return [sys.executable, "-m", "gunicorn", "-c", str(ROOT / "gunicorn.conf.py"),
+                "--pythonpath", str(ROOT), "--workers", str(workers),
+                "--bind", f"127.0.0.1:{port}"]
+    print("⚠️ gunicorn not installed: using uvicorn --workers (no preload before fork)")
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--app-dir", str(ROOT),
+            "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+
+
+def wait_ready(host: str, port: int, timeout: float = READY_TIMEOUT_SECONDS):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            conn.request("GET", "/api/health/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"server on port {port} not ready after {timeout:.0f}s")
+
+
+def make_queries(count: int, hot_ratio: float, seed: int = 0) -> List[str]:
+    """A request mix: hot_ratio of requests repeat a few popular queries, the rest are new
+
+    New queries run every analysis layer; repeated ones are cache hits in
+    whichever worker (or the shared cache tier) has seen them.
+    """
+    rng = random.Random(seed)
+    popular = [" ".join(rng.sample(_WORDS, 3)) for _ in range(20)]
+    return [rng.choice(popular) if rng.random() < hot_ratio
+            else f"{' '.join(rng.sample(_WORDS, 4))} {seed}-{i}"
+            for i in range(count)]
+
+
+def run_load(host: str, port: int, queries: Sequence[str], concurrency: int,
+             duration: float) -> Dict:
+    """POSTs queries from concurrency keep-alive clients for duration seconds"""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = itertools.count()  # shared by the clients; next() is atomic
+    deadline = time.perf_counter() + duration
+
+    def client():
+        nonlocal errors
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            query = queries[next(counter) % len(queries)]
+            body = json.dumps({"query": query})
+            start = time.perf_counter()
+            try:
+                conn.request("POST", "/api/analyze", body,
+                             {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 \
+            if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(0.50), 2),
+        "p95_ms": round(percentile(0.95), 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0
+    }
+
+
+def measure(workers: int, queries: Sequence[str], concurrency: int, duration: float,
+            workdir: str) -> Dict:
+    """Starts a server with this many workers, loads it and stops it"""
+    port = free_port()
+    env = dict(os.environ, ORACLE_LOG_LEVEL=os.environ.get("ORACLE_LOG_LEVEL", "WARNING"))
+    server = subprocess.Popen(server_command(workers, port), cwd=workdir, env=env,
+                              start_new_session=True)
+    try:
+        wait_ready("127.0.0.1", port)
+        return dict(run_load("127.0.0.1", port, queries, concurrency, duration),
+                    workers=workers)
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Load Test")
+    parser.add_argument("--workers", default=",".join(map(str, DEFAULT_WORKERS)),
+                        help="Comma-separated worker counts to start servers with")
+    parser.add_argument("--url", default=None,
+                        help="Load an already running server instead (e.g. http://localhost:5000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--hot-ratio", type=float, default=0.0,
+                        help="Share of requests repeating popular (cacheable) queries")
+    parser.add_argument("--workdir", default=".",
+                        help="Server working directory (its data/ and outputs/ are used)")
+    parser.add_argument("--output", default=None, help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = []
+    if args.url:
+        target = urlsplit(args.url)
+        queries = make_queries(100_000, args.hot_ratio, seed=int(time.time()))
+        runs.append(run_load(target.hostname, target.port or 80, queries,
+                             args.concurrency, args.duration))
+    else:
+        for workers in (int(w) for w in args.workers.split(",") if w.strip()):
+            # A fresh seed per run, so new queries are not hits from the previous run
+            queries = make_queries(100_000, args.hot_ratio, seed=int(time.time()) + workers)
+            run = measure(workers, queries, args.concurrency, args.duration, args.workdir)
+            runs.append(run)
+            print(f"✓ {workers} worker(s): {run['rps']} req/s")
+
+    base = runs[0]["rps"] or 1.0
+    print(f"\n{'workers':>8} {'req/s':>9} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for run in runs:
+        print(f"{run.get('workers', '-'):>8} {run['rps']:>9.1f} {run['rps'] / base:>7.2f}x "
+              f"{run['p50_ms']:>9.2f} {run['p95_ms']:>9.2f} {run['errors']:>7}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"concurrency": args.concurrency, "duration": args.duration,
+                       "hot_ratio": args.hot_ratio, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,17 @@ Oracle Biblico PRO - Training Data Preparation
 Processes Bible texts into training dataset format
 """
 
+import argparse
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterator, Optional, Sequence
+
+from concept_index import build_concept_index
+from dataset_stream import JsonlWriter, resolve_shards
+from gematria import build_index
+from lexicon import build_lexicon
+from training_samples import (NEAR_DUP_THRESHOLD, SAMPLE_KINDS, VALIDATION_FRACTION,
+                              SampleGenerator)
 
 class TrainingDataPreparator:
     """Prepares biblical texts for fine-tuning Llama3.1"""
@@ -26,10 +34,9 @@ class TrainingDataPreparator:
                 return json.load(f)
         return {"books": []}
     
-    def create_training_samples(self, data: Dict) -> List[str]:
-        """Creates training samples from Bible texts"""
+    def create_training_samples(self, data: Dict) -> Iterator[Dict]:
+        """Creates training samples from Bible texts, one at a time"""
         print("Creating training samples...")
-        samples = []
         
         for book in data.get("books", []):
             sample = {
@@ -41,25 +48,88 @@ class TrainingDataPreparator:
                     "verse_count": book['verses']
                 }
             }
-            samples.append(json.dumps(sample, ensure_ascii=False))
+            yield sample
+    
+    def generate_corpus_samples(self, shard_size: Optional[int] = None,
+                                compression: Optional[str] = None,
+                                workers: Optional[int] = None,
+                                kinds: Sequence[str] = SAMPLE_KINDS,
+                                window: int = 5, stride: int = 3,
+                                validation_fraction: float = VALIDATION_FRACTION,
+                                near_dup_threshold: float = NEAR_DUP_THRESHOLD) -> Optional[Dict]:
+        """Verse, passage and Q/A samples from the whole verse corpus (data/raw/verses*.jsonl)
         
-        return samples
+        Built across worker processes, deduplicated (exact and MinHash near
+        duplicates) and split deterministically into training_data.jsonl and
+        validation_data.jsonl; see training_samples.SampleGenerator.
+        """
+        verses_file = self.data_dir / "raw" / "verses.jsonl"
+        if not resolve_shards(verses_file):
+            return None
+        print("Creating training samples from the verse corpus...")
+        generator = SampleGenerator(str(verses_file), str(self.processed_dir), workers, kinds,
+                                    window, stride, validation_fraction, near_dup_threshold)
+        stats = generator.generate(shard_size, compression)
+        print(f"✓ {stats['generated']} samples generated from {stats['shards']} verse shard(s) "
+              f"in {stats['parts']} part(s), "
+              f"{stats['exact_duplicates']} exact and {stats['near_duplicates']} near duplicates "
+              f"removed in {stats['seconds']}s")
+        print(f"✓ Saved {stats['train']} training samples to {', '.join(stats['train_files'])}")
+        print(f"✓ Saved {stats['validation']} validation samples to "
+              f"{', '.join(stats['validation_files'])}")
+        return stats
     
-    def save_training_data(self, samples: List[str]):
-        """Saves training data to processed directory"""
+    def save_training_data(self, samples, shard_size: Optional[int] = None,
+                           compression: Optional[str] = None) -> int:
+        """Streams training data to processed directory"""
         output_file = self.processed_dir / "training_data.jsonl"
         
-        with open(output_file, "w", encoding="utf-8") as f:
-            for sample in samples:
-                f.write(sample + "\n")
+        with JsonlWriter(output_file, shard_size, compression) as writer:
+            writer.write_all(samples)
         
-        print(f"✓ Saved {len(samples)} training samples to {output_file}")
+        print(f"✓ Saved {writer.count} training samples to {', '.join(map(str, writer.paths))}")
+        return writer.count
+    
+    def build_gematria_index(self) -> Optional[Dict]:
+        """Precomputes word/verse gematria values from data/raw/verses.jsonl (or its shards)"""
+        verses_file = self.data_dir / "raw" / "verses.jsonl"
+        if not resolve_shards(verses_file):
+            print(f"⚠️ {verses_file} not found, skipping the gematria index")
+            return None
+        return build_index(str(verses_file), str(self.data_dir / "gematria"))
+    
+    def build_concept_index(self) -> Optional[Dict]:
+        """Builds the term and cross-reference index over data/raw/verses.jsonl (or its shards)"""
+        verses_file = self.data_dir / "raw" / "verses.jsonl"
+        if not resolve_shards(verses_file):
+            print(f"⚠️ {verses_file} not found, skipping the concept index")
+            return None
+        return build_concept_index(str(verses_file),
+                                   str(self.data_dir / "references" / "cross_references.jsonl"),
+                                   str(self.data_dir / "concepts"))
     
-    def prepare(self):
-        """Main preparation pipeline"""
-        data = self.load_raw_data()
-        samples = self.create_training_samples(data)
-        self.save_training_data(samples)
+    def build_lexicon(self) -> Optional[Dict]:
+        """Compiles data/references/lexicon.jsonl into the compact lexicon store"""
+        source = self.data_dir / "references" / "lexicon.jsonl"
+        if not source.exists():
+            print(f"⚠️ {source} not found, skipping the lexicon")
+            return None
+        return build_lexicon(str(source), str(self.data_dir / "lexicon"))
+    
+    def prepare(self, shard_size: Optional[int] = None, compression: Optional[str] = None,
+                **sample_options):
+        """Main preparation pipeline
+        
+        Samples come from the verse corpus when one has been ingested, else
+        from the book metadata (one sample per book).
+        """
+        if self.generate_corpus_samples(shard_size, compression, **sample_options) is None:
+            data = self.load_raw_data()
+            samples = self.create_training_samples(data)
+            self.save_training_data(samples, shard_size, compression)
+        self.build_gematria_index()
+        self.build_lexicon()
+        self.build_concept_index()
         print("\n✅ Training data preparation complete!")
 
 def main():
@@ -67,8 +137,29 @@ def main():
     print("Oracle Biblico PRO - Training Data Preparation")
     print("="*50)
     
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Training Data Preparation")
+    parser.add_argument("--shard-size", type=int, default=None,
+                        help="Samples per output shard (default: single file)")
+    parser.add_argument("--compression", choices=["gzip", "zstd"], default=None,
+                        help="Compress the output JSONL")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes generating samples (default: CPU count)")
+    parser.add_argument("--kinds", default=",".join(SAMPLE_KINDS),
+                        help="Sample kinds to generate: verse, passage, qa")
+    parser.add_argument("--window", type=int, default=5, help="Verses per passage sample")
+    parser.add_argument("--stride", type=int, default=3, help="Verses between passage starts")
+    parser.add_argument("--validation-fraction", type=float, default=VALIDATION_FRACTION,
+                        help="Share of chapters held out for validation")
+    parser.add_argument("--near-dup-threshold", type=float, default=NEAR_DUP_THRESHOLD,
+                        help="Estimated Jaccard similarity above which samples are near duplicates")
+    args = parser.parse_args()
+    
     preparator = TrainingDataPreparator()
-    preparator.prepare()
+    preparator.prepare(args.shard_size, args.compression, workers=args.workers,
+                       kinds=[kind.strip() for kind in args.kinds.split(",") if kind.strip()],
+                       window=args.window, stride=args.stride,
+                       validation_fraction=args.validation_fraction,
+                       near_dup_threshold=args.near_dup_threshold)
 
 if __name__ == "__main__":
     main()
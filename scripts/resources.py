@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Lazy Resource Registry
+Heavy resources (indexes, lexicon, stores, models) loaded on first use or at warm-up
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+logger = logging.getLogger("oracle_biblico.resources")
+
+
+class Resource:
+    """One named resource and its loader; loads at most once"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.state = PENDING
+        self.value = None
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """The loaded value; concurrent first callers wait for a single load
+
+        A failed load is retried on the next call, so a resource that becomes
+        available later (e.g. an index built after startup) recovers.
+        """
+        if self.state == READY:
+            return self.value
+        with self._lock:
+            if self.state != READY:
+                self.state = LOADING
+                start = time.perf_counter()
+                try:
+                    self.value = self.loader()
+                except Exception as e:
+                    self.state = FAILED
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    self.load_seconds = time.perf_counter() - start
+                self.state, self.error = READY, None
+                logger.info("Loaded %s in %.1fms", self.name, self.load_seconds * 1000)
+        return self.value
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            # Optional data (an index not built yet) loads as None
+            "available": self.state == READY and self.value is not None,
+            "error": self.error
+        }
+
+
+class ResourceRegistry:
+    """Named resources that are loaded lazily, or all at once by warm_up()
+
+    Layers declare the resources they use, so readiness can be reported per
+    layer; a process is live as soon as it starts and ready once every
+    declared resource has loaded.
+    """
+
+    def __init__(self):
+        self._resources: Dict[str, Resource] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._resources[name] = Resource(name, loader)
+
+    def provide(self, name: str, value: Any):
+        """Registers an already built resource (e.g. one injected by a caller)"""
+        resource = Resource(name, lambda: value)
+        resource.value, resource.state, resource.load_seconds = value, READY, 0.0
+        self._resources[name] = resource
+
+    def get(self, name: str) -> Any:
+        return self._resources[name].get()
+
+    def _names(self, names: Optional[Iterable[str]]) -> Iterable[str]:
+        return list(self._resources) if names is None else names
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, parallel: bool = True) -> Dict:
+        """Loads resources now (all by default); failures are reported, not raised"""
+        pending = [self._resources[name] for name in self._names(names)]
+
+        def load(resource: Resource):
+            try:
+                resource.get()
+            except Exception as e:
+                logger.warning("Failed to load %s: %s", resource.name, e)
+
+        if parallel and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=len(pending),
+                                    thread_name_prefix="resource-warmup") as executor:
+                list(executor.map(load, pending))
+        else:
+            for resource in pending:
+                load(resource)
+        return self.status()
+
+    def ready(self, names: Optional[Iterable[str]] = None) -> bool:
+        return all(self._resources[name].state == READY for name in self._names(names))
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: resource.status() for name, resource in self._resources.items()}
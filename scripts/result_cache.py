@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Analysis Result Cache
+Content-addressed LRU cache for BiblicalAnalysisPipeline results
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normalizes a query so equivalent inputs share one cache entry"""
+    text = unicodedata.normalize("NFC", query or "")
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def cache_key(query: str, version: Dict) -> str:
+    """Builds a content-addressed key from the normalized query and pipeline version"""
+    payload = json.dumps(
+        {"query": normalize_query(query), "version": version},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SharedCacheTier:
+    """Cache tier in one SQLite file, shared by every process that opens it
+
+    Server worker processes each keep their own in-memory LRU, but all point
+    this tier at the same file (WAL mode: readers never block the writer), so
+    a result computed by one worker is a hit in all of them. Connections are
+    per thread and per process, so the tier is safe to create before a fork.
+    Beyond max_entries the oldest entries are pruned, checked every
+    prune_every puts.
+    """
+
+    def __init__(self, db_path: str = "outputs/cache/results.sqlite",
+                 max_entries: int = 50_000, prune_every: int = 256):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._puts = 0
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, "
+                     "stored_at REAL NOT NULL, payload TEXT NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored_at ON cache (stored_at)")
+        conn.commit()
+        conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT stored_at, payload FROM cache WHERE key = ?", (key,)).fetchone()
+        return {"stored_at": row[0], "result": json.loads(row[1])} if row else None
+
+    def put(self, key: str, entry: Dict):
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO cache (key, stored_at, payload) VALUES (?, ?, ?)",
+                         (key, entry["stored_at"],
+                          json.dumps(entry["result"], ensure_ascii=False)))
+        self._puts += 1
+        if self._puts % self.prune_every == 0:
+            self.prune()
+
+    def delete(self, key: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def prune(self):
+        """Drops the oldest entries beyond max_entries"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                         "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResultCache:
+    """In-memory LRU cache with TTL and an optional second tier
+
+    The second tier is either a directory of JSON files (disk_dir) or a
+    SharedCacheTier (shared), which also serves hits across processes.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600,
+                 disk_dir: Optional[str] = None, shared: Optional[SharedCacheTier] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self.shared = shared
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if self.shared is not None:
+            try:
+                entry = self.shared.get(key)
+                if entry is not None and self._expired(entry["stored_at"]):
+                    self.shared.delete(key)
+                    return None
+                return entry
+            except sqlite3.Error:
+                return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry.get("stored_at", 0)):
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict):
+        if self.shared is not None:
+            self.shared.put(key, entry)
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _store(self, key: str, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the cached result for key, or None on a miss
+
+        Cached results are shared between callers and must be treated as read-only.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry["stored_at"]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["result"]
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.disk_dir or self.shared is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self._store(key, entry)
+                    self.disk_hits += 1
+                return entry["result"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict):
+        """Stores a result in memory and, when enabled, on disk"""
+        entry = {"stored_at": time.time(), "result": result}
+        with self._lock:
+            self._store(key, entry)
+        if self.disk_dir or self.shared is not None:
+            try:
+                self._write_disk(key, entry)
+            except (OSError, sqlite3.Error):
+                pass
+
+    def clear(self):
+        """Drops every in-memory entry (the disk tier is left untouched)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Returns hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": self.disk_dir is not None or self.shared is not None,
+                "shared": self.shared is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Analysis Result Store
+Persists analysis results to SQLite from a background writer thread
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at);
+"""
+
+_STOP = object()
+
+logger = logging.getLogger("oracle_biblico.result_store")
+
+
+class ResultStore:
+    """Append-only result store with writes batched off the request thread
+
+    put() only assigns an id and enqueues the result; a single writer thread
+    commits queued results in batches. Results that are still queued are
+    served from memory so a client can read its result back immediately.
+    """
+
+    def __init__(self, db_path: str = "outputs/results.db", batch_size: int = 64):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+        self._queue = queue.Queue()
+        self._pending: Dict[str, Dict] = {}
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.write_errors = 0
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop,
+                                                name="result-store-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = []
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    rows.append(item)
+
+            if rows:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT OR REPLACE INTO results (id, query, created_at, payload) "
+                            "VALUES (?, ?, ?, ?)",
+                            [(r["id"], r["query"], r["created_at"],
+                              json.dumps(r["result"], ensure_ascii=False)) for r in rows])
+                except sqlite3.Error:
+                    self.write_errors += len(rows)
+                    logger.exception("Result store write failed (%d results dropped)", len(rows))
+                with self._pending_lock:
+                    for r in rows:
+                        self._pending.pop(r["id"], None)
+
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def put(self, result: Dict, result_id: Optional[str] = None) -> str:
+        """Queues a result for persistence and returns its id without blocking"""
+        result_id = result_id or uuid.uuid4().hex
+        row = {"id": result_id, "query": result.get("query", ""),
+               "created_at": time.time(), "result": result}
+        with self._pending_lock:
+            self._pending[result_id] = row
+        self._ensure_writer()
+        self._queue.put(row)
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict]:
+        """Returns a stored result by id, or None"""
+        with self._pending_lock:
+            row = self._pending.get(result_id)
+        if row is not None:
+            return row["result"]
+
+        found = self._reader().execute(
+            "SELECT payload FROM results WHERE id = ?", (result_id,)).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        """Returns the most recent results, newest first"""
+        with self._pending_lock:
+            pending = sorted(self._pending.values(), key=lambda r: r["created_at"], reverse=True)
+        results = [r["result"] for r in pending[:limit]]
+        pending_ids = {r["id"] for r in pending}
+
+        if len(results) < limit:
+            rows = self._reader().execute(
+                "SELECT id, payload FROM results ORDER BY created_at DESC LIMIT ?",
+                (limit + len(pending_ids),)).fetchall()
+            for result_id, payload in rows:
+                if result_id in pending_ids:
+                    continue
+                results.append(json.loads(payload))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def recent_ids(self, limit: int = 10) -> List[str]:
+        """Ids of the most recent results, newest first, without decoding their payloads"""
+        with self._pending_lock:
+            pending = sorted(self._pending.values(), key=lambda r: r["created_at"], reverse=True)
+        ids = [r["id"] for r in pending[:limit]]
+        pending_ids = {r["id"] for r in pending}
+
+        if len(ids) < limit:
+            rows = self._reader().execute(
+                "SELECT id FROM results ORDER BY created_at DESC LIMIT ?",
+                (limit + len(pending_ids),)).fetchall()
+            ids.extend(result_id for (result_id,) in rows
+                       if result_id not in pending_ids)
+        return ids[:limit]
+
+    def top_queries(self, limit: int = 500) -> List[Tuple[str, int]]:
+        """(query, times analyzed) for the most frequently stored queries"""
+        self.flush()
+        return self._reader().execute(
+            "SELECT query, COUNT(*) AS n FROM results GROUP BY query "
+            "ORDER BY n DESC, MAX(created_at) DESC LIMIT ?", (limit,)).fetchall()
+
+    def flush(self):
+        """Blocks until every queued result has been written"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flushes queued results and stops the writer thread"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(_STOP)
+            writer.join()
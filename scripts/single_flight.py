@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Single-Flight Request Coalescing
+Identical in-flight calls share one computation, across threads and event loops
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time
+
+    The first caller for a key (the leader) computes; callers arriving while
+    it runs wait on the same concurrent.futures.Future and get its result or
+    exception. The future is shared by do() and do_async(), so a request on a
+    Flask thread and one on the ASGI event loop coalesce too. Nothing is kept
+    once the leader finishes; remembering results is the cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """The in-flight future for key and whether this caller must compute it"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _settle(self, key: str, future: Future, result=None, error: BaseException = None):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if error is not None:
+                self.failures += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Returns (result, shared); shared is True when another caller computed it"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, future, error=e)
+            raise
+        self._settle(key, future, result)
+        return result, False
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """do() for coroutines; followers await the leader without blocking a thread"""
+        future, leader = self._join(key)
+        if not leader:
+            # shield: a follower that gives up must not cancel the leader's future
+            return await asyncio.shield(asyncio.wrap_future(future)), True
+        # The work runs as its own task so followers still get a result if the
+        # leader's request is cancelled (e.g. its client disconnects)
+        task = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._settle_task(key, future, done))
+        return await asyncio.shield(task), False
+
+    def _settle_task(self, key: str, future: Future, task: asyncio.Future):
+        if task.cancelled():
+            self._settle(key, future, error=asyncio.CancelledError())
+        elif task.exception() is not None:
+            self._settle(key, future, error=task.exception())
+        else:
+            self._settle(key, future, task.result())
+
+    def stats(self) -> Dict:
+        """Leader/coalesced counters; coalesced calls did no work of their own"""
+        with self._lock:
+            calls = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._in_flight),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "coalesce_rate": self.coalesced / calls if calls else 0.0,
+            }
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Packed Token Dataset
+Tokenizes training data once into memory-mapped, packed sequences for fine-tuning
+"""
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dataset_stream import iter_jsonl, resolve_shards
+
+DEFAULT_SOURCE = "data/processed/training_data.jsonl"
+DEFAULT_CACHE_DIR = "data/processed/tokens"
+# Bump when the on-disk layout or packing changes so caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+_WRITE_CHUNK = 1 << 20  # tokens buffered before each write to tokens.bin
+
+
+class ByteTokenizer:
+    """Offline UTF-8 byte tokenizer: ids 0-255 are bytes, then BOS, EOS and PAD
+
+    Good enough for tests and for measuring the data pipeline; real runs plug
+    in the base model's tokenizer (HFTokenizer).
+    """
+
+    name = "byte"
+    bos_id, eos_id, pad_id = 256, 257, 258
+    vocab_size = 259
+
+    def encode(self, text: str) -> List[int]:
+        return list(text.encode("utf-8"))
+
+    def decode(self, ids: Sequence[int]) -> str:
+        return bytes(i for i in ids if i < 256).decode("utf-8", errors="replace")
+
+    def config(self) -> Dict:
+        return {"name": self.name}
+
+
+class HFTokenizer:
+    """Tokenizes with a Hugging Face tokenizer (e.g. the base Llama model's)"""
+
+    name = "hf"
+
+    def __init__(self, model: str):
+        from transformers import AutoTokenizer  # optional dependency, only needed here
+        self.model = model
+        self._tokenizer = AutoTokenizer.from_pretrained(model)
+        self.bos_id = self._tokenizer.bos_token_id
+        self.eos_id = self._tokenizer.eos_token_id
+        pad_id = self._tokenizer.pad_token_id
+        self.pad_id = pad_id if pad_id is not None else self.eos_id
+        self.vocab_size = len(self._tokenizer)
+
+    def encode(self, text: str) -> List[int]:
+        return self._tokenizer.encode(text, add_special_tokens=False)
+
+    def decode(self, ids: Sequence[int]) -> str:
+        return self._tokenizer.decode(list(ids))
+
+    def config(self) -> Dict:
+        return {"name": self.name, "model": self.model}
+
+
+def make_tokenizer(config: Dict):
+    """Recreates a tokenizer from its config (as stored alongside a cache)"""
+    if config.get("name") == HFTokenizer.name:
+        return HFTokenizer(config["model"])
+    return ByteTokenizer()
+
+
+def token_dtype(vocab_size: int) -> np.dtype:
+    """Smallest unsigned dtype that holds every token id"""
+    return np.dtype(np.uint16 if vocab_size <= np.iinfo(np.uint16).max + 1 else np.uint32)
+
+
+def source_fingerprint(source: str) -> List[Dict]:
+    """Name, size and mtime of every shard of the source dataset"""
+    fingerprint = []
+    for shard in resolve_shards(source):
+        stat = shard.stat()
+        fingerprint.append({"file": shard.name, "size": stat.st_size,
+                            "mtime_ns": stat.st_mtime_ns})
+    return fingerprint
+
+
+def pack_documents(documents: Iterable[List[int]], max_seq_length: int) -> Iterator[List[int]]:
+    """Packs tokenized documents into sequences of at most max_seq_length tokens
+
+    Documents are appended to the current sequence while they fit; one that
+    does not starts the next sequence, and documents longer than a whole
+    sequence are split. Packing keeps order, so it is deterministic.
+    """
+    current: List[int] = []
+    for tokens in documents:
+        if current and len(current) + len(tokens) > max_seq_length:
+            yield current
+            current = []
+        while len(tokens) > max_seq_length:
+            yield tokens[:max_seq_length]
+            tokens = tokens[max_seq_length:]
+        current.extend(tokens)
+    if current:
+        yield current
+
+
+class PackedTokenDataset:
+    """Packed sequences backed by a memory-mapped token file and an offsets index
+
+    Sequence i is tokens[offsets[i]:offsets[i + 1]], a view into the mapped
+    file, so reading a sequence copies nothing; only assembling a padded batch
+    does (into one buffer per batch).
+    """
+
+    def __init__(self, tokens: np.ndarray, offsets: np.ndarray, config: Dict):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.config = config
+        self.max_seq_length = config["max_seq_length"]
+        self.pad_id = config["pad_id"]
+
+    @classmethod
+    def build(cls, documents: Iterable[str], cache_dir: str = DEFAULT_CACHE_DIR,
+              tokenizer=None, max_seq_length: int = 512,
+              fingerprint: Optional[List[Dict]] = None) -> "PackedTokenDataset":
+        """Tokenizes and packs documents, streaming tokens to disk; replaces any previous cache"""
+        tokenizer = tokenizer or ByteTokenizer()
+        dtype = token_dtype(tokenizer.vocab_size)
+        directory = Path(cache_dir)
+        tmp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        num_documents = 0
+
+        def tokenized() -> Iterator[List[int]]:
+            nonlocal num_documents
+            for text in documents:
+                num_documents += 1
+                ids = tokenizer.encode(text)
+                yield ([tokenizer.bos_id] if tokenizer.bos_id is not None else []) + ids \
+                    + ([tokenizer.eos_id] if tokenizer.eos_id is not None else [])
+
+        offsets = [0]
+        buffer: List[int] = []
+        with open(tmp_dir / "tokens.bin", "wb") as f:
+            for sequence in pack_documents(tokenized(), max_seq_length):
+                buffer.extend(sequence)
+                offsets.append(offsets[-1] + len(sequence))
+                if len(buffer) >= _WRITE_CHUNK:
+                    f.write(np.asarray(buffer, dtype=dtype).tobytes())
+                    buffer = []
+            f.write(np.asarray(buffer, dtype=dtype).tobytes())
+        np.save(tmp_dir / "offsets.npy", np.asarray(offsets, dtype=np.uint64))
+
+        config = {
+            "format_version": CACHE_FORMAT_VERSION,
+            "tokenizer": tokenizer.config(),
+            "dtype": dtype.name,
+            "max_seq_length": max_seq_length,
+            "pad_id": tokenizer.pad_id,
+            "num_documents": num_documents,
+            "num_sequences": len(offsets) - 1,
+            "num_tokens": offsets[-1],
+            "source": fingerprint or []
+        }
+        with open(tmp_dir / "cache_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Swap the finished directory in so readers never see a partial cache
+        old_dir = directory.with_name(directory.name + ".old")
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if directory.exists():
+            os.replace(directory, old_dir)
+        os.replace(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return cls.load(str(directory))
+
+    @classmethod
+    def load(cls, cache_dir: str = DEFAULT_CACHE_DIR) -> "PackedTokenDataset":
+        """Memory-maps a cache written by build()"""
+        directory = Path(cache_dir)
+        with open(directory / "cache_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if config.get("format_version") != CACHE_FORMAT_VERSION:
+            raise ValueError(f"{directory} is not a supported token cache; rebuild it")
+        if config["num_tokens"]:
+            tokens = np.memmap(directory / "tokens.bin", dtype=config["dtype"], mode="r",
+                               shape=(config["num_tokens"],))
+        else:
+            tokens = np.empty(0, dtype=config["dtype"])  # mmap cannot map an empty file
+        return cls(tokens, np.load(directory / "offsets.npy", mmap_mode="r"), config)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.tokens[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def order(self, epoch: int = 0, seed: int = 0, shuffle: bool = True) -> np.ndarray:
+        """Sequence order for an epoch; the same (seed, epoch) always gives the same order"""
+        if not shuffle:
+            return np.arange(len(self))
+        return np.random.default_rng([seed, epoch]).permutation(len(self))
+
+    def batch(self, indices: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(input_ids padded to max_seq_length with pad_id, lengths) for some sequences"""
+        input_ids = np.full((len(indices), self.max_seq_length), self.pad_id,
+                            dtype=self.tokens.dtype)
+        lengths = np.empty(len(indices), dtype=np.int64)
+        for row, i in enumerate(indices):
+            sequence = self[i]
+            input_ids[row, :len(sequence)] = sequence
+            lengths[row] = len(sequence)
+        return input_ids, lengths
+
+    def batches(self, batch_size: int, epoch: int = 0, seed: int = 0, shuffle: bool = True,
+                drop_last: bool = False) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields padded batches in a deterministic (seeded, per-epoch) shuffled order"""
+        order = self.order(epoch, seed, shuffle)
+        stop = len(order) - len(order) % batch_size if drop_last else len(order)
+        for start in range(0, stop, batch_size):
+            yield self.batch(order[start:start + batch_size])
+
+
+def _texts(source: str, text_field: str) -> Iterator[str]:
+    for record in iter_jsonl(source):
+        text = record.get(text_field)
+        if text:
+            yield text
+
+
+def load_or_build(source: str = DEFAULT_SOURCE, cache_dir: str = DEFAULT_CACHE_DIR,
+                  tokenizer=None, max_seq_length: int = 512, text_field: str = "text",
+                  rebuild: bool = False) -> PackedTokenDataset:
+    """The cached dataset if it matches the source, tokenizer and length; else a fresh build"""
+    tokenizer = tokenizer or ByteTokenizer()
+    fingerprint = source_fingerprint(source)
+    config_file = Path(cache_dir) / "cache_config.json"
+    if not rebuild and config_file.exists():
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if (config.get("format_version") == CACHE_FORMAT_VERSION
+                and config.get("tokenizer") == tokenizer.config()
+                and config.get("max_seq_length") == max_seq_length
+                and config.get("source") == fingerprint):
+            return PackedTokenDataset.load(cache_dir)
+    return PackedTokenDataset.build(_texts(source, text_field), cache_dir, tokenizer,
+                                    max_seq_length, fingerprint)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Oracle Biblico PRO - Packed Token Dataset")
+    parser.add_argument("--source", default=DEFAULT_SOURCE,
+                        help="Training data (plain, compressed or sharded JSONL)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-seq-length", type=int, default=512)
+    parser.add_argument("--tokenizer", default="byte",
+                        help='"byte" (offline) or a Hugging Face model name')
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args(argv)
+
+    tokenizer = ByteTokenizer() if args.tokenizer == "byte" else HFTokenizer(args.tokenizer)
+    dataset = load_or_build(args.source, args.cache_dir, tokenizer, args.max_seq_length,
+                            rebuild=args.rebuild)
+    config = dataset.config
+    fill = config["num_tokens"] / max(1, config["num_sequences"] * config["max_seq_length"])
+    print(f"✓ {config['num_documents']} documents -> {config['num_sequences']} sequences, "
+          f"{config['num_tokens']} tokens ({config['dtype']}, {fill:.0%} packed) "
+          f"in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
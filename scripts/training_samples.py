@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Training Sample Generation
+Verse, passage and question/answer samples from the verse corpus, built in
+parallel, deduplicated (exact and MinHash near-duplicates) and split by hash
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dataset_stream import JsonlWriter, iter_jsonl, open_text, resolve_shards
+from gematria import words
+
+SAMPLE_KINDS = ("verse", "passage", "qa")
+# (question, answer) templates; {ref} and {text} come from the verse
+QA_TEMPLATES = [
+    ("O que diz {ref}?", "{text}"),
+    ("Em que passagem está escrito: \"{text}\"?", "{ref}"),
+]
+NUM_PERM = 64
+BANDS = 8  # 8 bands of 8 rows: pairs above ~0.77 estimated Jaccard usually collide
+SHINGLE_SIZE = 3  # words per shingle
+NEAR_DUP_THRESHOLD = 0.8
+VALIDATION_FRACTION = 0.02
+_PRIME = np.uint64(4294967291)  # largest prime below 2**32: a * x + b cannot overflow uint64
+_SPLIT_BUCKETS = 10_000
+# Uncompressed shards are split into chapter-aligned byte ranges of at least this size
+MIN_CHUNK_BYTES = 1 << 20
+# Older verse files only carry "ref" and "text": book, chapter and verse come from the ref
+_REF = re.compile(r"^(?P<book>.+?)\s+(?P<chapter>\d+):(?P<verse>\d+)$")
+
+
+def _permutations(seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64),
+            rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64))
+
+
+_PERM_A, _PERM_B = _permutations()
+_BAND_MIX = np.random.default_rng(2).integers(1, 2 ** 63, NUM_PERM // BANDS,
+                                              dtype=np.uint64) | np.uint64(1)
+
+
+def fingerprint(text: str) -> Tuple[int, np.ndarray]:
+    """(content hash, MinHash signature) of a sample's normalized words
+
+    The 64-bit content hash makes case and punctuation variants exact
+    duplicates; the signature (NUM_PERM uint32 minima over word shingles)
+    estimates Jaccard similarity for near duplicates.
+    """
+    tokens = words(text)
+    exact = int.from_bytes(hashlib.blake2b(" ".join(tokens).encode("utf-8"),
+                                           digest_size=8).digest(), "little")
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE])
+                for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))}
+    x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64,
+                    count=len(shingles))
+    signature = ((np.outer(_PERM_A, x) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+    return exact, signature.astype(np.uint32)
+
+
+def band_hashes(signature: np.ndarray, salt: str = "") -> np.ndarray:
+    """One uint64 per LSH band; similar signatures share at least one band with high probability
+
+    Only signatures with the same salt can collide (samples are compared
+    within their kind: a Q/A pair quoting a verse is not a copy of it).
+    """
+    rows = signature.astype(np.uint64).reshape(BANDS, -1)
+    return (rows * _BAND_MIX).sum(axis=1) ^ np.uint64(zlib.crc32(salt.encode("utf-8")))
+
+
+def in_validation(group: str, fraction: float) -> bool:
+    """Deterministic split: a group (book and chapter) always lands on the same side"""
+    bucket = zlib.crc32(group.encode("utf-8")) % _SPLIT_BUCKETS
+    return bucket < fraction * _SPLIT_BUCKETS
+
+
+def _located(verse: Dict) -> Dict:
+    if verse.get("chapter") is None:
+        match = _REF.match(verse.get("ref", ""))
+        if match:
+            return dict(verse, book=match["book"], chapter=int(match["chapter"]),
+                        verse=int(match["verse"]))
+    return verse
+
+
+def _usable(verse: Dict) -> Optional[Dict]:
+    """The verse located and with a ref, or None if it cannot make a sample
+
+    Records without text, or with neither a ref nor book, chapter and verse,
+    are unusable. A verse with a chapter but no verse number cannot be placed
+    in a passage, so it is treated like one whose chapter is unknown.
+    """
+    verse = _located(verse)
+    if not verse.get("text"):
+        return None
+    if not verse.get("ref"):
+        if None in (verse.get("book"), verse.get("chapter"), verse.get("verse")):
+            return None
+        verse = dict(verse, ref=f"{verse['book']} {verse['chapter']}:{verse['verse']}")
+    if verse.get("chapter") is not None and verse.get("verse") is None:
+        verse = dict(verse, chapter=None)
+    return verse
+
+
+def _chapter_key(verse: Dict):
+    return (verse.get("translation"), verse.get("book"), verse.get("chapter")) \
+        if verse.get("chapter") is not None else verse.get("ref")
+
+
+def _chapters(verses: Iterator[Dict]) -> Iterator[List[Dict]]:
+    """Runs of consecutive (usable) verses from the same translation, book and chapter
+
+    A verse whose chapter cannot be told is a run of its own.
+    """
+    current: List[Dict] = []
+    current_key = None
+    for verse in verses:
+        key = _chapter_key(verse)
+        if current and key != current_key:
+            yield current
+            current = []
+        current.append(verse)
+        current_key = key
+    if current:
+        yield current
+
+
+def chapter_samples(chapter: List[Dict], kinds: Sequence[str] = SAMPLE_KINDS,
+                    window: int = 5, stride: int = 3) -> Iterator[Dict]:
+    """Samples for one chapter: each verse, sliding passages and Q/A pairs"""
+    first = chapter[0]
+    book, number = first.get("book"), first.get("chapter")
+    base = {"translation": first.get("translation"), "language": first.get("language"),
+            "book": book, "chapter": number}
+    for verse in chapter:
+        ref, text = verse["ref"], verse["text"]
+        if "verse" in kinds:
+            yield {"text": f"{ref} {text}", "kind": "verse",
+                   "metadata": dict(base, ref=ref, verses=[verse.get("verse")] * 2)}
+        if "qa" in kinds:
+            for template, (question, answer) in enumerate(QA_TEMPLATES):
+                yield {"text": f"Pergunta: {question.format(ref=ref, text=text)}\n"
+                               f"Resposta: {answer.format(ref=ref, text=text)}",
+                       "kind": "qa",
+                       "metadata": dict(base, ref=ref, verses=[verse.get("verse")] * 2,
+                                        template=template)}
+    if "passage" in kinds and number is not None and len(chapter) > 1:
+        starts = range(0, max(1, len(chapter) - window + stride), stride)
+        for start in starts:
+            passage = chapter[start:start + window]
+            if len(passage) < 2:
+                break
+            span = [passage[0]["verse"], passage[-1]["verse"]]
+            ref = f"{book} {number}:{span[0]}-{span[1]}"
+            yield {"text": f"{ref} " + " ".join(v["text"] for v in passage), "kind": "passage",
+                   "metadata": dict(base, ref=ref, verses=span)}
+            if start + window >= len(chapter):
+                break
+
+
+def plan_chunks(shard: Path, chunk_bytes: int) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Byte ranges covering a verse shard, each starting where a chapter starts
+
+    Ranges are about chunk_bytes long; a chapter never spans two ranges, so
+    passages come out the same as from the whole file. Compressed shards
+    cannot be entered mid-stream and are a single range (None, None).
+    """
+    size = shard.stat().st_size
+    if shard.suffix in (".gz", ".zst") or size <= chunk_bytes:
+        return [(None, None)]
+    bounds = [0]
+    with open(shard, "rb") as f:
+        while bounds[-1] + chunk_bytes < size:
+            f.seek(bounds[-1] + chunk_bytes - 1)
+            f.readline()  # the next line starts at or after the target offset
+            boundary = _next_chapter_start(f)
+            if boundary is None:
+                break
+            bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _next_chapter_start(f) -> Optional[int]:
+    """Offset of the first line, from f's position on, whose chapter differs from the one before"""
+    first = None
+    while True:
+        position = f.tell()
+        line = f.readline()
+        if not line:
+            return None
+        if not line.strip():
+            continue
+        key = _chapter_key(_located(json.loads(line)))
+        if first is None:
+            first = key
+        elif key != first:
+            return position
+
+
+def _read_range(shard: str, start: Optional[int], end: Optional[int]) -> Iterator[Dict]:
+    """Verse records of a whole shard, or of the lines starting in [start, end)"""
+    if start is None:
+        yield from iter_jsonl(shard)
+        return
+    with open(shard, "rb") as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                return
+            position += len(line)
+            if line.strip():
+                yield json.loads(line)
+
+
+def _generate_part(shard: str, start: Optional[int], end: Optional[int], part: int,
+                   work_dir: str, kinds: Sequence[str], window: int, stride: int,
+                   validation_fraction: float) -> Tuple[int, int]:
+    """Worker: writes the samples of one shard range plus their hashes and signatures
+
+    Runs in a separate process. Outputs part-NNNNN.jsonl and .npz arrays
+    (exact hash, LSH bands, MinHash signature, validation flag per sample).
+    Returns (samples written, unusable verse records skipped).
+    """
+    work = Path(work_dir)
+    exact, bands, signatures, validation = [], [], [], []
+    skipped = 0
+
+    def usable_verses() -> Iterator[Dict]:
+        nonlocal skipped
+        for record in _read_range(shard, start, end):
+            verse = _usable(record)
+            if verse is None:
+                skipped += 1
+            else:
+                yield verse
+
+    with JsonlWriter(work / f"part-{part:05d}.jsonl") as writer:
+        for chapter in _chapters(usable_verses()):
+            first = chapter[0]
+            group = f"{first.get('book')} {first.get('chapter')}" \
+                if first.get("chapter") is not None else first["ref"]
+            held_out = in_validation(group, validation_fraction)
+            for sample in chapter_samples(chapter, kinds, window, stride):
+                content, signature = fingerprint(sample["text"])
+                exact.append(content)
+                bands.append(band_hashes(signature, sample["kind"]))
+                signatures.append(signature)
+                validation.append(held_out)
+                writer.write(sample)
+    np.savez(work / f"part-{part:05d}.npz",
+             exact=np.asarray(exact, dtype=np.uint64),
+             bands=np.asarray(bands, dtype=np.uint64).reshape(-1, BANDS),
+             signatures=np.asarray(signatures, dtype=np.uint32).reshape(-1, NUM_PERM),
+             validation=np.asarray(validation, dtype=bool))
+    return writer.count, skipped
+
+
+def deduplicate(exact: np.ndarray, bands: np.ndarray, signatures: np.ndarray,
+                threshold: float = NEAR_DUP_THRESHOLD) -> Tuple[np.ndarray, int, int]:
+    """(keep mask, exact duplicates, near duplicates); the first occurrence always wins
+
+    Exact duplicates share a content hash. Near-duplicate candidates share an
+    LSH band with an earlier kept sample and are dropped when their estimated
+    Jaccard similarity to it reaches threshold. Works on sorted hash columns,
+    one band at a time, so memory is a few 8-byte arrays per sample.
+    """
+    keep = np.zeros(len(exact), dtype=bool)
+    keep[np.unique(exact, return_index=True)[1]] = True
+    exact_dups = len(exact) - int(keep.sum())
+
+    near_dups = 0
+    for band in range(bands.shape[1]):
+        kept = np.flatnonzero(keep)
+        column = bands[kept, band]
+        order = np.argsort(column, kind="stable")  # equal hashes stay in sample order
+        ranked = column[order]
+        starts = np.ones(len(ranked), dtype=bool)
+        starts[1:] = ranked[1:] != ranked[:-1]
+        if starts.all():
+            continue
+        leaders = kept[order[np.maximum.accumulate(np.where(starts, np.arange(len(ranked)), 0))]]
+        candidates = kept[order][~starts]
+        leaders = leaders[~starts]
+        similarity = (signatures[candidates] == signatures[leaders]).mean(axis=1)
+        duplicates = candidates[similarity >= threshold]
+        keep[duplicates] = False
+        near_dups += len(duplicates)
+    return keep, exact_dups, near_dups
+
+
+class SampleGenerator:
+    """Parallel, deduplicating generator of fine-tuning samples from verse shards
+
+    1. Verse shards, split into chapter-aligned byte ranges so even a single
+       verses.jsonl keeps every worker busy, are turned into samples by
+       worker processes, which stream them to part files with their hashes
+       and MinHash signatures.
+    2. The parent deduplicates using only the hash arrays.
+    3. Kept samples are streamed, in corpus order, to the train or validation
+       dataset (sharded/compressed by JsonlWriter); the split is by a hash of
+       book and chapter, so overlapping passages never straddle it.
+    Sample content is never held in memory in full, only per-sample hashes.
+    """
+
+    def __init__(self, verses: str = "data/raw/verses.jsonl", output_dir: str = "data/processed",
+                 workers: Optional[int] = None, kinds: Sequence[str] = SAMPLE_KINDS,
+                 window: int = 5, stride: int = 3,
+                 validation_fraction: float = VALIDATION_FRACTION,
+                 near_dup_threshold: float = NEAR_DUP_THRESHOLD,
+                 chunk_bytes: Optional[int] = None):
+        unknown = set(kinds) - set(SAMPLE_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown sample kinds: {', '.join(sorted(unknown))}")
+        self.verses = verses
+        self.output_dir = Path(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.kinds = tuple(kinds)
+        self.window = window
+        self.stride = stride
+        self.validation_fraction = validation_fraction
+        self.near_dup_threshold = near_dup_threshold
+        self.chunk_bytes = chunk_bytes
+
+    def _ranges(self, shards: List[Path]) -> List[Tuple[Path, Optional[int], Optional[int]]]:
+        """(shard, start, end) work items in corpus order, about four per worker"""
+        if self.workers <= 1:
+            return [(shard, None, None) for shard in shards]
+        chunk_bytes = self.chunk_bytes or max(
+            MIN_CHUNK_BYTES, sum(shard.stat().st_size for shard in shards) // (self.workers * 4))
+        return [(shard, start, end) for shard in shards
+                for start, end in plan_chunks(shard, chunk_bytes)]
+
+    def _generate_parts(self, ranges: List[Tuple[Path, Optional[int], Optional[int]]],
+                        work_dir: Path) -> List[Tuple[int, int]]:
+        args = [(str(shard), start, end, part, str(work_dir), self.kinds, self.window,
+                 self.stride, self.validation_fraction)
+                for part, (shard, start, end) in enumerate(ranges)]
+        if self.workers <= 1 or len(ranges) <= 1:
+            return [_generate_part(*a) for a in args]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(ranges))) as executor:
+            futures = [executor.submit(_generate_part, *a) for a in args]
+            return [future.result() for future in futures]
+
+    def generate(self, shard_size: Optional[int] = None,
+                 compression: Optional[str] = None) -> Dict:
+        """Writes training_data.jsonl and validation_data.jsonl; returns counts"""
+        started = time.perf_counter()
+        shards = resolve_shards(self.verses)
+        work_dir = self.output_dir / ".samples.tmp"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        try:
+            ranges = self._ranges(shards)
+            counts = self._generate_parts(ranges, work_dir)
+            skipped = sum(part_skipped for _, part_skipped in counts)
+            if skipped:
+                print(f"⚠️ Skipped {skipped} verse records without text or reference")
+            arrays = [np.load(work_dir / f"part-{part:05d}.npz") for part in range(len(counts))]
+            exact = np.concatenate([a["exact"] for a in arrays]) if arrays else \
+                np.empty(0, dtype=np.uint64)
+            bands = np.concatenate([a["bands"] for a in arrays]) if arrays else \
+                np.empty((0, BANDS), dtype=np.uint64)
+            validation = np.concatenate([a["validation"] for a in arrays]) if arrays else \
+                np.empty(0, dtype=bool)
+            signatures = self._signatures(arrays, work_dir, len(exact))
+            keep, exact_dups, near_dups = deduplicate(exact, bands, signatures,
+                                                      self.near_dup_threshold)
+            del arrays, bands, signatures
+
+            row = 0
+            with JsonlWriter(self.output_dir / "training_data.jsonl", shard_size,
+                             compression) as train, \
+                    JsonlWriter(self.output_dir / "validation_data.jsonl", shard_size,
+                                compression) as held_out:
+                for part in range(len(counts)):
+                    with open_text(work_dir / f"part-{part:05d}.jsonl") as f:
+                        for line in f:
+                            if keep[row]:
+                                (held_out if validation[row] else train).write(line.rstrip("\n"))
+                            row += 1
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return {"shards": len(shards), "parts": len(ranges), "skipped": skipped,
+                "generated": int(len(keep)),
+                "exact_duplicates": exact_dups, "near_duplicates": near_dups,
+                "train": train.count, "validation": held_out.count,
+                "train_files": [str(p) for p in train.paths],
+                "validation_files": [str(p) for p in held_out.paths],
+                "seconds": round(time.perf_counter() - started, 2)}
+
+    @staticmethod
+    def _signatures(arrays, work_dir: Path, total: int) -> np.ndarray:
+        """All signatures in one memory-mapped file, filled one part at a time"""
+        if not total:
+            return np.empty((0, NUM_PERM), dtype=np.uint32)
+        signatures = np.lib.format.open_memmap(work_dir / "signatures.npy", mode="w+",
+                                               dtype=np.uint32, shape=(total, NUM_PERM))
+        row = 0
+        for a in arrays:
+            part = a["signatures"]
+            signatures[row:row + len(part)] = part
+            row += len(part)
+        return signatures
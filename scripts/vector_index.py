@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Oracle Biblico PRO - Vector Index
+Embedders and a float32 cosine-similarity index with an IVF approximate mode
+"""
+
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from dataset_stream import iter_batches
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# index.bin layout: magic, format version, dtype code, count, dimension, nlist,
+# then byte offsets of the vector, id, document offset, centroid and list blocks
+_MAGIC = b"OBVINDEX"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQII5Q")
+_ALIGNMENT = 64
+_DTYPE_CODES = {"float32": 0, "float16": 1}
+_DTYPE_NAMES = {code: name for name, code in _DTYPE_CODES.items()}
+_SCORE_CHUNK = 16384
+IVF_THRESHOLD = 20_000
+
+
+def _align(position: int) -> int:
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (Unicode aware, so Hebrew/Greek work too)"""
+    return _TOKEN.findall(text.lower())
+
+
+class HashingEmbedder:
+    """Deterministic offline embedder using the hashing trick
+
+    Unigrams and bigrams are hashed (CRC32, stable across processes) into a
+    fixed number of signed buckets with sublinear term frequency, then the
+    vector is L2-normalized so dot products are cosine similarities.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension: int = 768):
+        self.dimension = dimension
+        self._bucket = lru_cache(maxsize=200_000)(self._bucket_uncached)
+
+    def _bucket_uncached(self, feature: str):
+        h = zlib.crc32(feature.encode("utf-8"))
+        return h % self.dimension, 1.0 if (h // self.dimension) & 1 else -1.0
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows, cols, values = [], [], []
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self._features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, count in counts.items():
+                bucket, sign = self._bucket(feature)
+                rows.append(row)
+                cols.append(bucket)
+                values.append(sign * (1.0 + math.log(count)))
+
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if rows:
+            np.add.at(vectors, (rows, cols), values)
+        return normalize_rows(vectors)
+
+    def config(self) -> Dict:
+        return {"name": self.name, "dimension": self.dimension}
+
+
+class OllamaEmbedder:
+    """Embeds texts with a local Ollama embedding model (e.g. nomic-embed-text)"""
+
+    name = "ollama"
+
+    def __init__(self, model: str = "nomic-embed-text", dimension: Optional[int] = None):
+        import ollama  # optional dependency, only needed for this embedder
+        self._client = ollama
+        self.model = model
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        rows = [self._client.embeddings(model=self.model, prompt=text)["embedding"]
+                for text in texts]
+        vectors = np.asarray(rows, dtype=np.float32).reshape(len(texts), -1)
+        self.dimension = vectors.shape[1] if len(texts) else self.dimension
+        return normalize_rows(vectors)
+
+    def config(self) -> Dict:
+        return {"name": self.name, "model": self.model, "dimension": self.dimension}
+
+
+def make_embedder(config: Dict):
+    """Recreates an embedder from its config (as stored alongside an index)"""
+    if config.get("name") == OllamaEmbedder.name:
+        return OllamaEmbedder(config.get("model", "nomic-embed-text"), config.get("dimension"))
+    return HashingEmbedder(config.get("dimension", 768))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes rows in place; all-zero rows stay zero"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first, without a full sort"""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class VectorIndex:
+    """Cosine-similarity index over a contiguous float32 matrix
+
+    Exact search is a single matrix-vector product. For large corpora an IVF
+    (inverted file) structure clusters the vectors with spherical k-means and
+    stores each cluster's rows contiguously, so approximate search only scores
+    the `nprobe` clusters closest to the query.
+    """
+
+    def __init__(self, embedder, vectors: np.ndarray, documents: List[Dict],
+                 ids: Optional[np.ndarray] = None):
+        self.embedder = embedder
+        if vectors.dtype not in (np.float32, np.float16) or not vectors.flags.c_contiguous:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.vectors = vectors
+        self.documents = documents
+        self.ids = ids if ids is not None else np.arange(len(documents), dtype=np.int64)
+        self.centroids = None
+        self.list_offsets = None
+        self.deleted: Optional[np.ndarray] = None  # boolean mask of tombstoned rows
+        self._id_order: Optional[np.ndarray] = None  # row order by id, for id lookups
+        self._sorted_ids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, embedder, documents: Iterable[Dict], batch_size: int = 1024,
+              ivf_threshold: int = IVF_THRESHOLD, ids: Optional[np.ndarray] = None) -> "VectorIndex":
+        """Embeds documents (each with a "text" key) and builds the index
+
+        Documents may be any iterable, e.g. a stream from iter_jsonl, and are
+        embedded batch by batch as they arrive.
+        """
+        kept, blocks = [], []
+        for batch in iter_batches(documents, batch_size):
+            blocks.append(embedder.embed([d.get("text", "") for d in batch]))
+            kept.extend(batch)
+        dimension = blocks[0].shape[1] if blocks else (embedder.dimension or 0)
+        vectors = np.vstack(blocks) if blocks else np.zeros((0, dimension), dtype=np.float32)
+        index = cls(embedder, vectors, kept, ids)
+        if len(index) >= ivf_threshold:
+            index.build_ivf()
+        return index
+
+    @classmethod
+    def merge(cls, embedder, indexes: List["VectorIndex"], exclude_ids: np.ndarray,
+              ivf_threshold: int = IVF_THRESHOLD) -> "VectorIndex":
+        """Combines existing indexes without re-embedding, dropping excluded ids"""
+        vectors, documents, ids = [], [], []
+        for index in indexes:
+            keep = np.flatnonzero(~np.isin(index.ids, exclude_ids))
+            vectors.append(np.asarray(index.vectors[keep], dtype=np.float32))
+            documents.extend(index.documents[int(row)] for row in keep)
+            ids.append(np.asarray(index.ids[keep], dtype=np.int64))
+        dimension = indexes[0].vectors.shape[1] if indexes else (embedder.dimension or 0)
+        merged = cls(embedder,
+                     np.vstack(vectors) if vectors else np.zeros((0, dimension), np.float32),
+                     documents,
+                     np.concatenate(ids) if ids else np.zeros(0, np.int64))
+        if len(merged) >= ivf_threshold:
+            merged.build_ivf()
+        return merged
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0):
+        """Clusters vectors and reorders them so each cluster is one contiguous slice"""
+        n = len(self)
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+
+        assign = np.concatenate([np.argmax(self.vectors[i:i + 65536] @ centroids.T, axis=1)
+                                 for i in range(0, n, 65536)])
+        order = np.argsort(assign, kind="stable")
+        self.vectors = np.ascontiguousarray(self.vectors[order])
+        self.ids = self.ids[order]
+        self._id_order = None
+        self.documents = [self.documents[i] for i in order]
+        self.centroids = centroids
+        self.list_offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+
+    def _score(self, start: int, end: int, query_vector: np.ndarray) -> np.ndarray:
+        """Cosine scores for rows [start, end); float16 rows are upcast in chunks"""
+        block = self.vectors[start:end]
+        if block.dtype == np.float32:
+            return block @ query_vector
+        if block.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate([block[i:i + _SCORE_CHUNK].astype(np.float32) @ query_vector
+                               for i in range(0, block.shape[0], _SCORE_CHUNK)])
+
+    def search_vector(self, query_vector: np.ndarray, k: int = 5,
+                      approximate: Optional[bool] = None, nprobe: int = 8) -> List[Dict]:
+        """Top-k documents for an already-normalized query vector"""
+        use_ivf = self.centroids is not None if approximate is None else approximate
+        if use_ivf and self.centroids is None:
+            raise ValueError("Approximate search requested but no IVF structure was built")
+
+        if use_ivf:
+            probe = _top_k(self.centroids @ query_vector, nprobe)
+            spans = [(self.list_offsets[c], self.list_offsets[c + 1]) for c in probe]
+            rows = np.concatenate([np.arange(start, end) for start, end in spans])
+            scores = np.concatenate([self._score(start, end, query_vector)
+                                     for start, end in spans])
+        else:
+            rows = None
+            scores = self._score(0, len(self), query_vector)
+
+        if self.deleted is not None:
+            hidden = self.deleted[rows] if rows is not None else self.deleted
+            scores = np.where(hidden, -np.inf, scores)
+        top = _top_k(scores, k)
+        top = top[np.isfinite(scores[top])]
+        best = rows[top] if rows is not None else top
+        best_scores = scores[top]
+
+        return [{
+            "id": int(self.ids[row]),
+            "score": float(score),
+            "text": self.documents[row].get("text", ""),
+            "metadata": self.documents[row].get("metadata", {})
+        } for row, score in zip(best, best_scores)]
+
+    def rows_for_ids(self, ids: Sequence[int]) -> np.ndarray:
+        """Row of each id (-1 when absent or tombstoned); ids are not in row order after IVF"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._id_order]
+        positions = np.minimum(np.searchsorted(self._sorted_ids, ids), len(self) - 1)
+        rows = np.where(self._sorted_ids[positions] == ids, self._id_order[positions], -1)
+        if self.deleted is not None:
+            rows = np.where((rows >= 0) & self.deleted[np.maximum(rows, 0)], -1, rows)
+        return rows
+
+    def documents_for_ids(self, ids: Sequence[int]) -> List[Optional[Dict]]:
+        """Stored documents by id, None for ids this index does not hold"""
+        return [self.documents[int(row)] if row >= 0 else None
+                for row in self.rows_for_ids(ids)]
+
+    def search(self, query: str, k: int = 5, approximate: Optional[bool] = None,
+               nprobe: int = 8) -> List[Dict]:
+        """Top-k documents by cosine similarity to the query text"""
+        if len(self) == 0:
+            return []
+        return self.search_vector(self.embedder.embed([query])[0], k, approximate, nprobe)
+
+    def save(self, directory: str, dtype: str = "float32") -> Dict:
+        """Writes the binary index, document file and config to a directory
+
+        index.bin holds a fixed header followed by 64-byte aligned blocks:
+        vectors (float32 or float16), ids (int64), document byte offsets
+        (uint64, n + 1 entries) and, for IVF, centroids and list offsets.
+        Documents are compact JSON lines in documents.jsonl, addressed by the
+        offset table so they are only decoded when returned from a search.
+        float16 halves the file and page-cache footprint but rows are upcast
+        while scoring, so exact search is slower; pair it with IVF.
+        """
+        if dtype not in _DTYPE_CODES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        doc_offsets = np.zeros(len(self) + 1, dtype=np.uint64)
+        with open(directory / "documents.jsonl.tmp", "wb") as f:
+            for i, doc in enumerate(self.documents):
+                f.write(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                f.write(b"\n")
+                doc_offsets[i + 1] = f.tell()
+
+        has_ivf = self.centroids is not None
+        blocks = [
+            self.vectors.astype(dtype, copy=False),
+            self.ids.astype(np.int64, copy=False),
+            doc_offsets,
+            self.centroids.astype(np.float32, copy=False) if has_ivf else np.zeros(0, np.float32),
+            self.list_offsets.astype(np.int64, copy=False) if has_ivf else np.zeros(0, np.int64)
+        ]
+        offsets, position = [], _align(_HEADER.size)
+        for block in blocks:
+            offsets.append(position)
+            position = _align(position + block.nbytes)
+
+        with open(directory / "index.bin.tmp", "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, _DTYPE_CODES[dtype], len(self),
+                                 int(self.vectors.shape[1]),
+                                 int(self.centroids.shape[0]) if has_ivf else 0, *offsets))
+            for offset, block in zip(offsets, blocks):
+                f.seek(offset)
+                f.write(np.ascontiguousarray(block).tobytes())
+            f.truncate(position)
+
+        config = {
+            "index_type": "ivf_flat" if has_ivf else "flat",
+            "embedder": self.embedder.config(),
+            "num_vectors": len(self),
+            "vector_dimension": int(self.vectors.shape[1]),
+            "vector_dtype": dtype,
+            "nlist": int(self.centroids.shape[0]) if has_ivf else 0,
+            "metric": "cosine_similarity",
+            "format_version": _FORMAT_VERSION
+        }
+        with open(directory / "index_config.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+        # Rename last so readers never see a half-written index
+        for name in ("documents.jsonl", "index.bin", "index_config.json"):
+            os.replace(directory / f"{name}.tmp", directory / name)
+        return config
+
+    @classmethod
+    def load(cls, directory: str, embedder=None) -> "VectorIndex":
+        """Memory-maps an index saved by save()
+
+        Nothing is copied: vectors, ids and the IVF arrays are read-only views
+        over the mapped file, so worker processes opening the same index share
+        the page cache and start-up cost does not grow with corpus size.
+        """
+        directory = Path(directory)
+        with open(directory / "index_config.json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        with open(directory / "index.bin", "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, dtype_code, count, dimension, nlist,
+         vectors_at, ids_at, docs_at, centroids_at, lists_at) = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"{directory / 'index.bin'} is not a supported vector index")
+
+        dtype = _DTYPE_NAMES[dtype_code]
+        vectors = np.frombuffer(mapped, dtype=dtype, count=count * dimension,
+                                offset=vectors_at).reshape(count, dimension)
+        ids = np.frombuffer(mapped, dtype=np.int64, count=count, offset=ids_at)
+        doc_offsets = np.frombuffer(mapped, dtype=np.uint64, count=count + 1, offset=docs_at)
+
+        index = cls(embedder or make_embedder(config["embedder"]), vectors,
+                    MappedDocuments(directory / "documents.jsonl", doc_offsets), ids)
+        if nlist:
+            index.centroids = np.frombuffer(mapped, dtype=np.float32, count=nlist * dimension,
+                                            offset=centroids_at).reshape(nlist, dimension)
+            index.list_offsets = np.frombuffer(mapped, dtype=np.int64, count=nlist + 1,
+                                               offset=lists_at)
+        return index
+
+
+class MappedDocuments:
+    """Read-only document sequence decoded lazily from a memory-mapped JSONL file"""
+
+    def __init__(self, path: Path, offsets: np.ndarray):
+        self.offsets = offsets
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Dict:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return json.loads(self._mapped[start:end])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class CompositeIndex:
+    """Searches a base index plus delta segments, hiding tombstoned ids
+
+    Produced by incremental builds: unchanged segments stay in the base
+    index, new and edited ones live in a small delta index, and deleted or
+    superseded ids are tombstoned until the next compaction.
+    """
+
+    def __init__(self, segments: List[VectorIndex], tombstones: np.ndarray):
+        self.segments = [segment for segment in segments if len(segment)]
+        self.tombstones = tombstones
+        # Segments share one embedder; empty ones still carry it
+        self.embedder = next((segment.embedder for segment in segments), None)
+        for segment in self.segments:
+            hidden = np.isin(segment.ids, tombstones)
+            segment.deleted = hidden if hidden.any() else None
+
+    def __len__(self) -> int:
+        return sum(len(segment) - (int(segment.deleted.sum()) if segment.deleted is not None else 0)
+                   for segment in self.segments)
+
+    def documents_for_ids(self, ids: Sequence[int]) -> List[Optional[Dict]]:
+        """Stored documents by id from whichever live segment holds them"""
+        documents: List[Optional[Dict]] = [None] * len(ids)
+        for segment in self.segments:
+            for i, document in enumerate(segment.documents_for_ids(ids)):
+                if document is not None:
+                    documents[i] = document
+        return documents
+
+    def search(self, query: str, k: int = 5, approximate: Optional[bool] = None,
+               nprobe: int = 8) -> List[Dict]:
+        """Top-k documents across all segments"""
+        if not self.segments:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        hits = []
+        for segment in self.segments:
+            use_ivf = approximate if segment.centroids is not None else False
+            hits.extend(segment.search_vector(query_vector, k, use_ivf, nprobe))
+        return sorted(hits, key=lambda hit: hit["score"], reverse=True)[:k]
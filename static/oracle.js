@@ -39,6 +39,11 @@ async function handleAnalysis() {
         statusDiv.innerHTML = '⏳ Processando...';
     }
 
+    // Stream layers as they finish; fall back to a single request if streaming fails
+    if (window.EventSource && await streamAnalysis(query, statusDiv)) {
+        return;
+    }
+
     try {
         const response = await fetch('/api/analyze', {
             method: 'POST',
@@ -64,6 +69,79 @@ async function handleAnalysis() {
     }
 }
 
+// Layer slots in display order; the stream delivers them in completion order
+const STREAM_LAYERS = ['linguistic', 'numerical', 'historical', 'theological', 'synthesis'];
+
+// Render each layer from /api/analyze/stream as soon as the server finishes it.
+// Resolves false if the stream failed before any layer arrived.
+function streamAnalysis(query, statusDiv) {
+    return new Promise((resolve) => {
+        const resultsDiv = document.getElementById('results');
+        if (!resultsDiv) {
+            resolve(false);
+            return;
+        }
+
+        let received = 0;
+        resultsDiv.innerHTML = STREAM_LAYERS
+            .map(name => `<div class="result-item" id="layer-${name}"><p>⏳</p></div>`)
+            .join('');
+        resultsDiv.style.opacity = '1';
+
+        const source = new EventSource('/api/analyze/stream?query=' + encodeURIComponent(query));
+
+        source.addEventListener('layer', (event) => {
+            const data = JSON.parse(event.data);
+            const slot = document.getElementById(`layer-${data.layer}`);
+            received++;
+            if (!slot) return;
+            if (data.error) {
+                slot.innerHTML = `<h3>${escapeHtml(data.layer)}</h3><p>⚠️ ${escapeHtml(data.error)}</p>`;
+            } else {
+                slot.outerHTML = renderLayer(data.result);
+            }
+            if (statusDiv) {
+                statusDiv.innerHTML = `⏳ Processando... (${received}/${STREAM_LAYERS.length})`;
+            }
+        });
+
+        source.addEventListener('done', () => {
+            source.close();
+            if (statusDiv) {
+                statusDiv.innerHTML = '✅ Análise concluída';
+            }
+            resolve(true);
+        });
+
+        source.addEventListener('error', (event) => {
+            source.close();
+            if (event.data) {
+                showError(JSON.parse(event.data).message || 'Erro ao processar a análise');
+                resolve(true);
+            } else if (received === 0) {
+                resolve(false);
+            } else {
+                showError('Conexão interrompida durante a análise');
+                resolve(true);
+            }
+        });
+    });
+}
+
+// Render one layer object, e.g. {"language_layer": {...}}
+function renderLayer(layer) {
+    let html = '';
+    for (const [layerKey, layerData] of Object.entries(layer || {})) {
+        const layerTitle = formatLayerTitle(layerKey);
+        html += `<div class="result-item">`;
+        html += `<h3>${layerTitle}</h3>`;
+        html += `<button class="voice-btn" onclick="if(audioManager) audioManager.speakAnalysis('${layerTitle}', '${formatLayerContent(layerData).replace(/'/g, "\\'")}')" title="Ouvir com voz celestial">🔊</button>`;
+        html += `<p>${formatLayerContent(layerData)}</p>`;
+        html += `</div>`;
+    }
+    return html;
+}
+
 // Display results from API
 function displayResults(data) {
     const resultsDiv = document.getElementById('results');
@@ -80,16 +158,9 @@ function displayResults(data) {
                      : [];
                      
     if (layers.length > 0) {
-        layers.forEach((layer, index) => {
+        layers.forEach((layer) => {
             // Each layer is an object with one key (e.g., {"language_layer": {...}})
-            for (const [layerKey, layerData] of Object.entries(layer)) {
-                const layerTitle = formatLayerTitle(layerKey);
-                html += `<div class="result-item">`;
-                html += `<h3>${layerTitle}</h3>`;
-                html += `<button class="voice-btn" onclick="if(audioManager) audioManager.speakAnalysis('${layerTitle}', '${formatLayerContent(layerData).replace(/'/g, "\\'")}')" title="Ouvir com voz celestial">🔊</button>`;
-                html += `<p>${formatLayerContent(layerData)}</p>`;
-                html += `</div>`;
-            }
+            html += renderLayer(layer);
         });
     }
 
@@ -196,8 +267,8 @@ class DivineAudioManager {
     }
 
     initializeAudio() {
-        // Carregar áudio ambiente (será gerado pelo script Python)
-        this.ambientAudio = new Audio('/static/audio/divine_blend.wav');
+        // Carregar áudio ambiente (renderizado sob demanda e cacheado pelo servidor)
+        this.ambientAudio = new Audio('/api/audio?freq=432,528&volume=0.1&duration=120&fade=3');
         this.ambientAudio.loop = true;
         this.ambientAudio.volume = 0.15; // Volume baixo e ambiente
         
@@ -227,7 +298,7 @@ class DivineAudioManager {
             this.isPlaying = true;
             console.log('🎵 Áudio divino iniciado (432Hz + 528Hz)');
         }).catch(err => {
-            console.log('⚠️ Áudio não disponível (executar: python3 scripts/generate_divine_audio.py)');
+            console.log('⚠️ Áudio não disponível:', err);
         });
     }
 
@@ -0,0 +1,28 @@
+"""Shared test setup: the pipeline modules live in scripts/ and import each other by name"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The Flask app module, imported in a scratch directory
+
+    It creates outputs/ and static/audio/ on import; routes that only use
+    absolute paths (static files, health, audio) are safe to call afterwards.
+    """
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from analysis_pipeline import BiblicalAnalysisPipeline, iter_jsonl_queries, run_batch_file
+from result_cache import ResultCache
+from result_store import ResultStore
+
+
+class ThreadRecordingCache(ResultCache):
+    def __init__(self):
+        super().__init__(max_entries=16)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, result):
+        self.threads.append(threading.get_ident())
+        super().put(key, result)
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline(cache=ThreadRecordingCache(),
+                                        store=ResultStore(str(tmp_path / "results.db")))
+    yield pipeline
+    pipeline.store.close()
+    pipeline.scheduler.shutdown()
+
+
+def test_second_analyze_is_a_cache_hit(pipeline):
+    first = pipeline.analyze("No princípio era o Verbo")
+    assert first["metrics"]["cache"] == "miss"
+    assert len(first["analysis_layers"]) == 4 and "layer_errors" not in first
+    second = pipeline.analyze("  no princípio era o verbo ")
+    assert second["metrics"]["cache"] == "hit"
+    assert second["result_id"] == first["result_id"]
+
+
+def test_streamed_layers_match_the_result(pipeline):
+    streamed = []
+    result = pipeline.analyze("amor", on_layer=lambda name, layer, error: streamed.append(name))
+    assert sorted(streamed) == sorted(["linguistic", "numerical", "historical", "theological",
+                                       "synthesis"])
+    pipeline.store.flush()
+    assert pipeline.store.get(result["result_id"])["query"] == "amor"
+
+
+def test_analyze_async_keeps_cache_io_off_the_event_loop(pipeline):
+    async def run():
+        loop_thread = threading.get_ident()
+        miss = await pipeline.analyze_async("graça")
+        hit = await pipeline.analyze_async("graça")
+        return loop_thread, miss, hit
+
+    loop_thread, miss, hit = asyncio.run(run())
+    assert (miss["metrics"]["cache"], hit["metrics"]["cache"]) == ("miss", "hit")
+    assert len(pipeline.cache.threads) == 3  # get (miss), put, get (hit)
+    assert loop_thread not in pipeline.cache.threads
+
+
+def test_batch_keeps_order_and_computes_duplicates_once(pipeline):
+    first = pipeline.analyze("fé")
+    results = pipeline.analyze_batch(["amor", "Fé", " amor ", "luz"])
+    assert [r["query"] for r in results] == ["amor", "fé", "amor", "luz"]
+    assert results[0] is results[2]
+    assert results[1]["result_id"] == first["result_id"]  # a cache hit, not recomputed
+    pipeline.store.flush()
+    assert pipeline.store.get(results[3]["result_id"])["query"] == "luz"
+
+
+def test_batch_file_round_trip(pipeline, tmp_path):
+    source = tmp_path / "queries.jsonl"
+    source.write_text('"amor"\n\n{"id": "q2", "query": "luz"}\n', encoding="utf-8")
+    assert [r["id"] for r in iter_jsonl_queries(str(source))] == [1, "q2"]
+
+    output = tmp_path / "out" / "results.jsonl"
+    assert run_batch_file(pipeline, str(source), str(output), processes=1) == 2
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [(row["id"], row["query"]) for row in rows] == [(1, "amor"), ("q2", "luz")]
+    assert all(len(row["analysis"]["analysis_layers"]) == 4 for row in rows)
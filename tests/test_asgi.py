@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from result_store import ResultStore
+
+
+@pytest.fixture
+def client(server, tmp_path, monkeypatch):
+    import asgi
+
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline(store=ResultStore(str(tmp_path / "results.db")))
+    monkeypatch.setattr(asgi, "pipeline", pipeline)
+    yield TestClient(asgi.app)  # no lifespan: the app-wide pipeline is not warmed up
+    pipeline.store.close()
+    pipeline.scheduler.shutdown()
+
+
+def sse_events(body: str):
+    for frame in body.strip().split("\n\n"):
+        event, data = frame.split("\n")
+        yield event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_async_analyze(client):
+    response = client.post("/api/analyze", json={"query": "aliança"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "success" and response.json()["result_id"]
+    assert client.post("/api/analyze", json={}).status_code == 400
+
+
+def test_stream_sends_each_layer_then_done(client):
+    response = client.get("/api/analyze/stream", params={"query": "luz"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = list(sse_events(response.text))
+    assert [event for event, _ in events] == ["layer"] * 5 + ["done"]
+    assert {data["layer"] for _, data in events[:-1]} == {
+        "linguistic", "numerical", "historical", "theological", "synthesis"}
+    assert events[-1][1]["layer_errors"] == {}
+
+
+def test_batch_validation_and_fallthrough_to_flask(client):
+    assert client.post("/api/analyze/batch", json={"queries": ["fé", ""]}).status_code == 400
+    response = client.post("/api/analyze/batch", json={"queries": ["fé", "Fé"]})
+    assert response.json()["count"] == 2
+    assert client.get("/api/health").json()["status"] == "healthy"
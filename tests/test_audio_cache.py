@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from audio_cache import AudioRenderCache
+
+PARAMS = {"frequencies": [432.0, 528.0], "amplitudes": [0.1, 0.1], "duration": 0.5,
+          "fade": 0.1}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the generator creates static/audio/
+    return AudioRenderCache(str(tmp_path / "cache"))
+
+
+def test_streamed_render_is_cached(cache):
+    assert cache.get(PARAMS) is None
+    streamed = b"".join(cache.render_stream(PARAMS))
+    assert len(streamed) == cache.size_for(PARAMS)
+    path = cache.get(PARAMS)
+    assert path == cache.path_for(PARAMS) and path.read_bytes() == streamed
+    assert cache.key(dict(reversed(PARAMS.items()))) == cache.key(PARAMS)
+
+
+def test_abandoned_stream_leaves_nothing_behind(cache):
+    stream = cache.render_stream(PARAMS)
+    next(stream)
+    stream.close()
+    assert cache.get(PARAMS) is None
+    assert os.listdir(cache.cache_dir) == []
+
+
+def test_least_recently_used_renders_are_evicted(cache):
+    other = dict(PARAMS, frequencies=[639.0, 741.0])
+    cache.render(PARAMS)
+    cache.max_bytes = cache.size_for(PARAMS)
+    os.utime(cache.path_for(PARAMS), (0, 0))
+    cache.render(other)
+    assert cache.get(PARAMS) is None and cache.get(other) is not None
+
+
+def test_audio_endpoint_serves_and_revalidates(server):
+    client = server.app.test_client()
+    url = "/api/audio?freq=432&volume=0.2&duration=0.25&fade=0"
+    first = client.get(url)
+    assert first.status_code == 200 and first.mimetype == "audio/wav"
+    body = first.get_data()
+    assert len(body) == int(first.headers["Content-Length"])
+
+    cached = client.get(url, headers={"Range": "bytes=0-3"})
+    assert cached.status_code == 206 and cached.get_data() == body[:4]
+    assert client.get(url, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert client.get("/api/audio?freq=5").status_code == 400
@@ -0,0 +1,48 @@
+import json
+import logging
+
+import pytest
+
+import benchmark
+
+
+def report(**values):
+    return {"format_version": benchmark.FORMAT_VERSION, "benchmarks": {
+        name: {"kind": kind, "unit": "s", "value": value}
+        for name, (kind, value) in values.items()}}
+
+
+def test_compare_flags_slower_latency_and_lower_throughput():
+    baseline = report(search=("latency", 1.0), write=("throughput", 100.0),
+                      gone=("latency", 1.0))
+    current = report(search=("latency", 1.1), write=("throughput", 50.0), new=("latency", 9.0))
+    rows = {row["name"]: row for row in benchmark.compare(baseline, current, threshold=0.15)}
+    assert set(rows) == {"search", "write"}
+    assert rows["search"]["slowdown"] == pytest.approx(0.1) and not rows["search"]["regression"]
+    assert rows["write"]["slowdown"] == pytest.approx(1.0) and rows["write"]["regression"]
+
+
+def test_small_run_writes_a_comparable_report(tmp_path, capsys):
+    output = tmp_path / "latest.json"
+    current = benchmark.run([50], output, only=["jsonl", "indexes"])
+    assert json.loads(output.read_text(encoding="utf-8")) == current
+    assert "jsonl.read.gzip[50]" in current["benchmarks"]
+    assert all(entry["value"] > 0 for entry in current["benchmarks"].values())
+
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark.main(["compare", str(output), str(output)])
+    assert exit_info.value.code == 0
+    assert "0 regression(s)" in capsys.readouterr().out
+
+
+def test_quiet_silences_child_loggers_and_restores_the_level(caplog):
+    parent = logging.getLogger("oracle_biblico")
+    level = parent.level
+    parent.addHandler(caplog.handler)
+    try:
+        with benchmark.quiet():
+            logging.getLogger("oracle_biblico.resources").warning("inside a timed section")
+            print("progress")
+        assert caplog.records == [] and parent.level == level
+    finally:
+        parent.removeHandler(caplog.handler)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from build_rag import RAGBuilder
+from vector_index import CompositeIndex, HashingEmbedder, VectorIndex
+
+TEXTS = [{"id": i, "text": text} for i, text in enumerate(
+    ["In the beginning God created the heaven", "And the earth was without form",
+     "Let there be light", "Melchizedek king of Salem"])]
+
+
+class LearningEmbedder(HashingEmbedder):
+    """Like OllamaEmbedder: the dimension is unknown until the first embed"""
+
+    name = "learning"
+
+    def __init__(self):
+        super().__init__(32)
+        self.learned = None
+
+    def embed(self, texts):
+        self.learned = self.dimension
+        return super().embed(texts)
+
+    def config(self):
+        return {"name": self.name, "model": "test", "dimension": self.learned}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_incremental_build_reuses_unchanged_segments(workdir):
+    RAGBuilder(embedder=LearningEmbedder()).full_build(TEXTS)
+
+    edited = TEXTS[:2] + [{"id": 2, "text": "Let there be light and it was good"}]
+    builder = RAGBuilder(embedder=LearningEmbedder())
+    stats = builder.incremental_build(edited)
+    assert stats == {"reused": 2, "recomputed": 1, "deleted": 1, "total": 3}
+    if builder.compaction_thread is not None:
+        builder.compaction_thread.join()
+
+    builder = RAGBuilder(embedder=LearningEmbedder())
+    assert sorted(hit["text"] for hit in builder.search("light", k=5, mode="dense")) == sorted(
+        record["text"] for record in edited)
+
+
+def test_incremental_build_rebuilds_for_another_embedder(workdir):
+    RAGBuilder(embedder=HashingEmbedder(32)).full_build(TEXTS)
+    stats = RAGBuilder(embedder=HashingEmbedder(16)).incremental_build(TEXTS)
+    assert stats["reused"] == 0 and stats["recomputed"] == len(TEXTS)
+
+
+def test_composite_index_tolerates_no_segments():
+    embedder = HashingEmbedder(16)
+    empty = VectorIndex.build(embedder, [])
+    assert CompositeIndex([], np.zeros(0, np.int64)).search("light") == []
+    composite = CompositeIndex([empty], np.zeros(0, np.int64))
+    assert len(composite) == 0 and composite.embedder is embedder
+
+
+def test_tombstoned_ids_are_hidden():
+    index = VectorIndex.build(HashingEmbedder(64), TEXTS)
+    composite = CompositeIndex([index], np.array([3], dtype=np.int64))
+    assert len(composite) == 3
+    assert all(hit["text"] != TEXTS[3]["text"]
+               for hit in composite.search("Melchizedek king of Salem", k=4))
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from collect_data import CorpusIngest, parse_osis, parse_text, parse_usfm
+from dataset_stream import iter_jsonl
+
+USFM = """\\id GEN
+\\h Genesis
+\\c 1
+\\p \\v 1 In the beginning\\f + \\ft a note\\f* God created.
+\\v 2 And the earth was \\w void|strong="H922"\\w*.
+"""
+OSIS = """<osis xmlns="http://www.bibletechnologies.net/2003/OSIS/namespace">
+<osisText osisIDWork="WLC" xml:lang="hbo"><div type="book" osisID="Gen">
+<verse osisID="Gen.1.1">בראשית ברא<note>n</note></verse>
+<verse sID="Gen.1.2" osisID="Gen.1.2"/>והארץ היתה<verse eID="Gen.1.2"/>
+</div></osisText></osis>"""
+
+
+def test_parse_usfm_drops_notes_and_unwraps_words():
+    assert list(parse_usfm(USFM)) == [("Gen", 1, 1, "In the beginning God created."),
+                                      ("Gen", 1, 2, "And the earth was void.")]
+
+
+def test_parse_osis_container_and_milestone_verses():
+    meta, verses = parse_osis(OSIS)
+    assert meta == {"translation": "WLC", "language": "hbo"}
+    assert [verse[:3] for verse in verses] == [("Gen", 1, 1), ("Gen", 1, 2)]
+
+
+def test_parse_text_lines():
+    assert list(parse_text("Gen 1:1 In the beginning\nnot a verse\n1 John 3.16 - For God")) == [
+        ("Gen", 1, 1, "In the beginning"), ("1 John", 3, 16, "For God")]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    source_dir = tmp_path / "sources"
+    (source_dir / "kjv").mkdir(parents=True)
+    (source_dir / "kjv" / "GEN.usfm").write_text(USFM, encoding="utf-8")
+    (source_dir / "wlc.osis").write_text(OSIS, encoding="utf-8")
+    return source_dir
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_ingest_resumes_and_records_written_shards(tmp_path, sources, compression):
+    output = tmp_path / "raw" / "verses.jsonl"
+    first = CorpusIngest(str(sources), str(output), workers=1, compression=compression).run()
+    assert first["parsed"] == 2 and first["verses"] == 4
+
+    manifest = json.loads((output.parent / "ingest_manifest.json").read_text(encoding="utf-8"))
+    shards = sorted(entry["shard"] for entry in manifest["sources"].values())
+    written = sorted(str(path) for path in output.parent.glob("verses-*"))
+    assert shards == written
+    assert all(not name.endswith(".gz.gz") for name in written)
+
+    second = CorpusIngest(str(sources), str(output), workers=1, compression=compression).run()
+    assert (second["parsed"], second["skipped"]) == (0, 2)
+    assert sorted(str(path) for path in output.parent.glob("verses-*")) == written
+    assert sorted(record["ref"] for record in iter_jsonl(output)) == [
+        "Gen 1:1", "Gen 1:1", "Gen 1:2", "Gen 1:2"]
+
+
+def test_ingest_reparses_changed_and_drops_removed_sources(tmp_path, sources):
+    output = tmp_path / "raw" / "verses.jsonl"
+    CorpusIngest(str(sources), str(output), workers=1).run()
+    (sources / "wlc.osis").unlink()
+    (sources / "kjv" / "GEN.usfm").write_text(USFM + "\\v 3 And God said.\n", encoding="utf-8")
+
+    counts = CorpusIngest(str(sources), str(output), workers=1).run()
+    assert (counts["parsed"], counts["removed"], counts["verses"]) == (1, 1, 3)
+    assert len(list(output.parent.glob("verses-*"))) == 1
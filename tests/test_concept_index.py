@@ -0,0 +1,46 @@
+import pytest
+
+from concept_index import (CONCEPT_TERMS, ConceptIndex, load_concept_index,
+                           match_vocabulary)
+
+VERSES = [{"ref": "Gen 1:1", "text": "In the beginning God created the heaven"},
+          {"ref": "Gen 15:18", "text": "the Lord made a covenant with Abram"},
+          {"ref": "Jer 31:31", "text": "I will make a new covenant"},
+          {"ref": "Heb 8:8", "text": "a new covenant with the house of Israel"},
+          {"ref": "Heb 9:15", "text": "the mediator of the new testament"}]
+PAIRS = [{"from": "Jer 31:31", "to": "Heb 8:8"}, {"from": "Heb 8:8", "to": "Heb 9:15"},
+         {"from": "Heb 8:8", "to": "Jer 31:31"}, {"from": "Gen 1:1", "to": "Unknown 1:1"}]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("concepts")
+    config = ConceptIndex.build(VERSES, PAIRS).save(str(directory))
+    assert config["num_cross_references"] == 2  # duplicates and unknown refs dropped
+    return load_concept_index(str(directory))
+
+
+def test_posting_lists_round_trip(index):
+    assert index.refs_for(index.postings_for("Covenant")) == ["Gen 15:18", "Jer 31:31", "Heb 8:8"]
+    assert len(index.postings_for("unseen")) == 0
+    assert index.refs_for(index.occurrences(["beginning", "testament"])) == ["Gen 1:1", "Heb 9:15"]
+
+
+def test_intersection_skips_terms_that_would_empty_it(index):
+    assert index.refs_for(index.intersect(["new", "covenant"])) == ["Jer 31:31", "Heb 8:8"]
+    assert index.refs_for(index.intersect(["new", "covenant", "abram"])) == ["Gen 15:18"]
+    assert index.refs_for(index.intersect(["covenant", "israel", "egypt"])) == ["Heb 8:8"]
+
+
+def test_related_walks_cross_references_nearest_first(index):
+    assert index.related([index.row_of("Jer 31:31")]) == [
+        {"ref": "Heb 8:8", "depth": 1, "via": "Jer 31:31"},
+        {"ref": "Heb 9:15", "depth": 2, "via": "Heb 8:8"}]
+    assert index.related([index.row_of("Jer 31:31")], max_depth=1) == [
+        {"ref": "Heb 8:8", "depth": 1, "via": "Jer 31:31"}]
+    assert index.related([index.row_of("Gen 1:1")]) == []
+
+
+def test_vocabulary_matching_is_accent_insensitive():
+    assert set(match_vocabulary("Uma nova aliança e a criação", CONCEPT_TERMS)) == {
+        "covenant", "creation"}
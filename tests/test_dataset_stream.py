@@ -0,0 +1,41 @@
+import pytest
+
+from dataset_stream import iter_batches, iter_jsonl, resolve_shards, write_jsonl
+
+RECORDS = [{"ref": f"Gen 1:{i}", "text": f"verso {i}"} for i in range(1, 8)]
+
+
+@pytest.mark.parametrize("shard_size,compression", [(None, None), (None, "gzip"), (3, "gzip")])
+def test_written_datasets_read_back_in_order(tmp_path, shard_size, compression):
+    path = tmp_path / "verses.jsonl"
+    assert write_jsonl(path, iter(RECORDS), shard_size, compression) == len(RECORDS)
+    assert list(iter_jsonl(path)) == RECORDS
+    expected = 3 if shard_size else 1
+    assert len(resolve_shards(path)) == expected
+
+
+def test_rewriting_drops_the_previous_layout(tmp_path):
+    path = tmp_path / "verses.jsonl"
+    write_jsonl(path, RECORDS, shard_size=2)
+    write_jsonl(path, RECORDS[:3], compression="gzip")
+    assert [p.name for p in resolve_shards(path)] == ["verses.jsonl.gz"]
+    assert list(iter_jsonl(path)) == RECORDS[:3]
+
+
+def test_failed_write_leaves_no_dataset(tmp_path):
+    path = tmp_path / "verses.jsonl"
+
+    def records():
+        yield RECORDS[0]
+        raise RuntimeError("source went away")
+
+    with pytest.raises(RuntimeError):
+        write_jsonl(path, records())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_empty_and_missing_datasets(tmp_path):
+    write_jsonl(tmp_path / "empty.jsonl", [])
+    assert list(iter_jsonl(tmp_path / "empty.jsonl")) == []
+    assert resolve_shards(tmp_path / "missing.jsonl") == []
+    assert [len(batch) for batch in iter_batches(range(5), 2)] == [2, 2, 1]
@@ -0,0 +1,16 @@
+import json
+
+from dataset_stream import write_jsonl
+from finetune_llama import LlamaFineTuner
+
+
+def test_finetune_reads_the_data_through_the_token_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_jsonl("data/processed/training_data.jsonl",
+                [{"text": "No princípio era o Verbo"}, {"text": "Haja luz"}], shard_size=1)
+    LlamaFineTuner().finetune()
+
+    model_info = json.loads((tmp_path / "data/models/finetuned_model.json").read_text("utf-8"))
+    assert model_info["training_samples"] == 2
+    assert model_info["token_cache"]["num_sequences"] == 1
+    assert (tmp_path / "data/processed/tokens/tokens.bin").exists()
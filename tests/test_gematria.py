@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from gematria import GematriaIndex, gematria, load_index, word_breakdown
+
+VERSES = [{"ref": "Gen 1:1", "text": "בְּרֵאשִׁית בָּרָא אֱלֹהִים"},
+          {"ref": "Gen 1:26", "text": "אלהים"},
+          {"ref": "Mat 1:21", "text": "Ἰησοῦν"},
+          {"ref": "Gen 1:3", "text": "Let there be light"}]
+
+
+def test_letter_values_for_every_method():
+    # Final mem counts 40 in the standard method and 600 in mispar gadol
+    assert gematria("אלהים") == {"standard": 86, "gadol": 646, "ordinal": 41, "reduced": 14}
+    assert gematria("Ἰησοῦς")["standard"] == 888  # accents and breathings are stripped
+    assert gematria("light") == {"standard": 0, "gadol": 0, "ordinal": 0, "reduced": 0}
+
+
+def test_vowel_points_do_not_change_values_or_split_words():
+    assert gematria("אֱלֹהִים") == gematria("אלהים")
+    assert [entry["word"] for entry in word_breakdown("בָּרָא light אֱלֹהִים")] == ["ברא", "אלהים"]
+
+
+def test_reverse_index_survives_save_and_load(tmp_path):
+    GematriaIndex.build(VERSES).save(str(tmp_path / "gematria"))
+    index = load_index(str(tmp_path / "gematria"))
+    assert len(index) == 4
+    assert index.verses_with_value(86) == ["Gen 1:26"]
+    assert index.count_with_value(0) == 1
+    assert index.verses_with_value(10 ** 9) == []
+    assert index.same_value("אֱלֹהִים") == ["Gen 1:26"]
+    assert index.verse_values_for("Gen 1:26") == gematria("אלהים")
+    assert index.word_values_for("ברא")["standard"] == 203
+    with pytest.raises(ValueError):
+        index.verses_with_value(86, method="atbash")
+
+
+def test_stale_format_must_be_rebuilt(tmp_path):
+    GematriaIndex.build(VERSES).save(str(tmp_path))
+    config_file = tmp_path / "index_config.json"
+    config = json.loads(config_file.read_text(encoding="utf-8"))
+    config_file.write_text(json.dumps(dict(config, format_version=0)), encoding="utf-8")
+    with pytest.raises(ValueError, match="rebuild"):
+        GematriaIndex.load(str(tmp_path))
+    assert load_index(str(tmp_path / "missing")) is None
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import generate_divine_audio
+from generate_divine_audio import DivineAudioGenerator
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return DivineAudioGenerator()
+
+
+def pcm(blocks):
+    return np.frombuffer(b"".join(blocks), dtype="<i2").astype(np.int32)
+
+
+def test_period_is_exact_or_none(generator):
+    assert generator._period([432]) == 1225
+    assert generator._period([432, 528]) == 3675
+    assert generator._period([432.3]) is None
+
+
+@pytest.mark.parametrize("frequencies", [[432.0], [432, 528], [432.3]])
+def test_stdlib_path_matches_numpy(generator, frequencies, monkeypatch):
+    amplitudes = [0.3] * len(frequencies)
+    expected = pcm(generator.render_blocks(frequencies, amplitudes, 3, 0.5))
+    monkeypatch.setattr(generate_divine_audio, "np", None)
+    rendered = pcm(generator.render_blocks(frequencies, amplitudes, 3, 0.5))
+    assert len(rendered) == len(expected) == 3 * 44100
+    assert np.abs(rendered - expected).max() <= 1
+
+
+def test_stream_wav_header_matches_the_data(generator):
+    chunks = list(generator.stream_wav([432], [0.2], 1.5, 0.1))
+    header, data = chunks[0], b"".join(chunks[1:])
+    assert header[:4] == b"RIFF" and int.from_bytes(header[40:44], "little") == len(data)
@@ -0,0 +1,74 @@
+import pytest
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from hot_queries import (HotQueryStore, load_hot_queries, materialize, mine_access_log,
+                         rank_queries)
+from result_store import ResultStore
+
+VERSION = {"pipeline": "test", "layers": {}}
+
+
+def test_lookup_by_key_including_digests_ending_in_nul(tmp_path):
+    keys = {"ab" * 32: {"query": "amor"}, "cd" * 31 + "00": {"query": "fé"}}
+    store = HotQueryStore.build(keys, VERSION, str(tmp_path / "hot"))
+    assert len(store) == 2
+    for key, result in keys.items():
+        assert store.get(key) == result
+    assert store.get("ef" * 32) is None
+    assert store.stats()["hits"] == 2 and store.stats()["misses"] == 1
+
+
+def test_tables_of_another_version_are_ignored(tmp_path):
+    HotQueryStore.build({"ab" * 32: {}}, VERSION, str(tmp_path / "hot"))
+    assert load_hot_queries(str(tmp_path / "hot"), VERSION) is not None
+    assert load_hot_queries(str(tmp_path / "hot"), {"pipeline": "other"}) is None
+    assert load_hot_queries(str(tmp_path / "missing"), VERSION) is None
+
+
+def test_queries_are_mined_and_ranked(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_text('1.2.3.4 - - "GET /api/analyze/stream?query=amor+de+deus HTTP/1.1" 200\n'
+                   '1.2.3.4 - - "GET /api/analyze/stream?profile=1&query=Amor%20de%20Deus '
+                   'HTTP/1.1" 200\n'
+                   '1.2.3.4 - - "GET /api/results HTTP/1.1" 200\n', encoding="utf-8")
+    mined = mine_access_log(str(log))
+    assert sum(mined.values()) == 2
+    assert rank_queries([mined, {"fé": 1}], limit=5) == ["amor de deus", "fé"]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline(store=ResultStore(str(tmp_path / "results.db")))
+    yield pipeline
+    pipeline.store.close()
+    pipeline.scheduler.shutdown()
+
+
+def test_materialize_does_not_feed_the_result_store(tmp_path, pipeline):
+    directory = str(tmp_path / "hot")
+    store = materialize(pipeline, ["amor", "fé"], directory, processes=1)
+    assert len(store) == 2
+    assert pipeline.store.top_queries() == []
+    assert materialize(pipeline, ["fé", "amor"], directory, processes=1) is None
+
+    fresh = BiblicalAnalysisPipeline(store=pipeline.store,
+                                     hot_queries=load_hot_queries(directory, pipeline.version))
+    assert fresh.analyze("amor")["metrics"]["cache"] == "precomputed"
+    fresh.scheduler.shutdown()
+
+
+def test_cache_stats_survive_an_unloadable_table(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    HotQueryStore.build({"ab" * 32: {}}, VERSION, "outputs/hot_queries")
+    config_file = tmp_path / "outputs" / "hot_queries" / "hot_config.json"
+    config_file.write_text('{"format_version": 0}', encoding="utf-8")
+    pipeline = BiblicalAnalysisPipeline(store=ResultStore(str(tmp_path / "results.db")))
+    monkeypatch.setattr(server, "pipeline", pipeline)
+    try:
+        response = server.app.test_client().get("/api/cache/stats")
+        assert response.status_code == 200 and response.get_json()["precomputed"] is None
+        assert pipeline.readiness()["resources"]["hot_queries"]["state"] == "failed"
+    finally:
+        pipeline.store.close()
+        pipeline.scheduler.shutdown()
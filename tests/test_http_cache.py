@@ -0,0 +1,53 @@
+import gzip
+import json
+
+from flask import url_for
+
+from http_cache import IMMUTABLE, REVALIDATE, choose_encoding, encode_json
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("") is None
+
+
+def test_encode_json_compresses_large_bodies_only():
+    body, headers = encode_json({"ok": True}, "gzip")
+    assert json.loads(body) == {"ok": True} and "Content-Encoding" not in headers
+    payload = {"text": "x" * 5000}
+    body, headers = encode_json(payload, "gzip")
+    assert headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body)) == payload
+
+
+def test_static_is_immutable_only_at_its_current_hash(server):
+    client = server.app.test_client()
+    version = server.static_versions.version("oracle.css")
+    with server.app.test_request_context():
+        assert url_for("static", filename="oracle.css").endswith(f"?v={version}")
+
+    response = client.get(f"/static/oracle.css?v={version}")
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    response.close()
+    response = client.get("/static/oracle.css?v=0123456789ab")
+    assert response.headers["Cache-Control"] == REVALIDATE
+    response.close()
+
+
+def test_json_gets_an_etag_and_304(server):
+    client = server.app.test_client()
+    response = client.get("/api/health")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == REVALIDATE
+    assert client.get("/api/health", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_large_json_is_gzipped_with_a_weak_etag(server):
+    payload = {"text": "y" * 5000}
+    with server.app.test_request_context("/api/results", headers={"Accept-Encoding": "gzip"}):
+        response = server.finalize_response(server.app.response_class(
+            json.dumps(payload), mimetype="application/json"))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.get_etag()[1] is True
+    assert json.loads(gzip.decompress(response.get_data())) == payload
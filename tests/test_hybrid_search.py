@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+from hybrid_search import (BM25Index, HybridRetriever, OverlapReranker, reciprocal_rank_fusion,
+                           terms)
+from vector_index import HashingEmbedder, VectorIndex
+
+DOCUMENTS = [
+    {"text": "No princípio criou Deus os céus e a terra", "metadata": {"ref": "Gênesis 1:1"}},
+    {"text": "Porque Deus amou o mundo de tal maneira", "metadata": {"ref": "João 3:16"}},
+    {"text": "Melquisedeque rei de Salém trouxe pão e vinho", "metadata": {"ref": "Gênesis 14:18"}},
+    {"text": "O Senhor é o meu pastor nada me faltará", "metadata": {"ref": "Salmos 23:1"}},
+]
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(enumerate(DOCUMENTS, 100))
+
+
+def test_rare_name_and_exact_reference_rank_first(index):
+    assert index.search("melquisedeque")[0][0] == 102
+    assert index.search("joão 3:16")[0][0] == 101
+
+
+def test_scores_follow_okapi_bm25(index):
+    doc_terms = [terms(f"{d['metadata']['ref']} {d['text']}") for d in DOCUMENTS]
+    avg = sum(map(len, doc_terms)) / len(doc_terms)
+    df = sum("deus" in t for t in doc_terms)
+    idf = math.log1p((len(DOCUMENTS) - df + 0.5) / (df + 0.5))
+    expected = {}
+    for doc_id, t in enumerate(doc_terms, 100):
+        tf = t.count("deus")
+        if tf:
+            expected[doc_id] = idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * len(t) / avg))
+    assert dict(index.search("deus")) == pytest.approx(expected)
+
+
+def test_terms_absent_from_the_corpus_match_nothing(index):
+    # With hashed buckets, unrelated terms used to share postings
+    assert all(index.search(f"ausente{i}") == [] for i in range(500))
+
+
+def test_save_and_load(tmp_path, index):
+    config = index.save(str(tmp_path / "bm25"))
+    loaded = BM25Index.load(str(tmp_path / "bm25"))
+    assert config["num_documents"] == 4 and config["num_terms"] == len(loaded.term_hashes)
+    assert loaded.search("pastor") == index.search("pastor")
+
+
+def test_empty_index():
+    assert BM25Index.build([]).search("deus") == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = dict(reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60))
+    assert list(fused) == [1, 3, 2]
+    assert fused[1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+def test_hybrid_finds_sparse_only_hits_and_reranks():
+    dense = VectorIndex.build(HashingEmbedder(64), DOCUMENTS)
+    sparse = BM25Index.build(enumerate(DOCUMENTS))
+    hits = HybridRetriever(dense, sparse, OverlapReranker()).search("rei de Salém", k=2)
+    assert hits[0]["metadata"]["ref"] == "Gênesis 14:18"
+    assert hits[0]["sparse_score"] > 0 and "rerank_score" in hits[0]
+    with pytest.raises(ValueError):
+        HybridRetriever(dense, None).search("deus", mode="sparse")
@@ -0,0 +1,66 @@
+import logging
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from instrumentation import MetricsRegistry, RequestProfiler, configure_logging, metrics
+from result_store import ResultStore
+
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors", ["layer"])
+    errors.inc(layer="numerical")
+    errors.inc(2, layer="numerical")
+    seconds = registry.histogram("seconds", "Latency", ["layer"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        seconds.observe(value, layer="synthesis")
+    registry.callback("cache_entries", "Entries", lambda: 7)
+
+    lines = registry.render().splitlines()
+    assert 'errors_total{layer="numerical"} 3' in lines
+    assert 'seconds_bucket{layer="synthesis",le="0.1"} 1' in lines
+    assert 'seconds_bucket{layer="synthesis",le="1"} 2' in lines
+    assert 'seconds_bucket{layer="synthesis",le="+Inf"} 3' in lines
+    assert 'seconds_count{layer="synthesis"} 3' in lines
+    assert "cache_entries 7" in lines
+
+
+def test_profiler_samples_every_nth_request():
+    profiler = RequestProfiler(every=3)
+    assert [profiler.should_profile() for _ in range(6)] == [False, False, True] * 2
+    assert RequestProfiler().should_profile(requested=True)
+
+
+def test_requested_profile_and_layer_metrics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline(
+        store=ResultStore(str(tmp_path / "results.db")),
+        profiler=RequestProfiler(output_dir=str(tmp_path / "profiles")))
+    try:
+        result = pipeline.analyze("luz do mundo", profile=True)
+    finally:
+        pipeline.store.close()
+        pipeline.scheduler.shutdown()
+
+    assert set(result["metrics"]["layers"]) >= {"linguistic", "synthesis"}
+    assert len(list((tmp_path / "profiles").glob("*.prof"))) == 1
+    assert "Layers:" in next((tmp_path / "profiles").glob("*.txt")).read_text(encoding="utf-8")
+    assert 'layer="numerical"' in metrics.render()
+
+
+def test_logging_off_silences_child_loggers(caplog):
+    parent = logging.getLogger("oracle_biblico")
+    level, handlers, propagate = parent.level, list(parent.handlers), parent.propagate
+    try:
+        configure_logging("INFO")
+        parent.addHandler(caplog.handler)
+        configure_logging("OFF")
+        logging.getLogger("oracle_biblico.pipeline").warning("should not be emitted")
+        assert caplog.records == []
+
+        configure_logging("WARNING")
+        logging.getLogger("oracle_biblico.pipeline").warning("emitted again")
+        assert [record.getMessage() for record in caplog.records] == ["emitted again"]
+    finally:
+        parent.setLevel(level)
+        parent.handlers[:] = handlers
+        parent.propagate = propagate
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from layer_scheduler import Layer, LayerScheduler
+
+
+def sleeper(seconds, value=None):
+    def run(query, deps=None):
+        time.sleep(seconds)
+        return {"value": value, "deps": sorted(deps or {})}
+    return run
+
+
+def test_dependencies_receive_results_and_independent_layers_overlap():
+    barrier = threading.Barrier(2, timeout=2)
+
+    def meet(query):
+        barrier.wait()
+        return {"query": query}
+
+    scheduler = LayerScheduler([Layer("a", meet), Layer("b", meet),
+                                Layer("c", sleeper(0), depends_on=["a", "b"])])
+    completed = []
+    run = scheduler.run("amor", on_layer=lambda name, result, error: completed.append(name))
+    assert not run.partial
+    assert run.results["c"]["deps"] == ["a", "b"]
+    assert completed[-1] == "c"
+    scheduler.shutdown()
+
+
+def test_failing_layer_degrades_the_run():
+    def broken(query):
+        raise RuntimeError("index missing")
+
+    scheduler = LayerScheduler([Layer("broken", broken),
+                                Layer("after", sleeper(0), depends_on=["broken"])])
+    run = scheduler.run("amor")
+    assert run.errors == {"broken": "RuntimeError: index missing"}
+    assert run.results["after"]["deps"] == []
+    scheduler.shutdown()
+
+
+def test_slow_layer_times_out():
+    scheduler = LayerScheduler([Layer("slow", sleeper(1.0), timeout=0.1),
+                                Layer("fast", sleeper(0))])
+    started = time.perf_counter()
+    run = scheduler.run("amor")
+    assert time.perf_counter() - started < 0.8
+    assert run.errors == {"slow": "Timed out after 0.1s"}
+    assert "fast" in run.results
+    scheduler.shutdown()
+
+
+def test_queued_layer_timeout_starts_when_it_runs():
+    # One worker: "second" waits 0.3s for it, longer than its own 0.2s timeout
+    scheduler = LayerScheduler([Layer("first", sleeper(0.3)),
+                                Layer("second", sleeper(0.05), timeout=0.2)], max_workers=1)
+    run = scheduler.run("amor")
+    assert not run.partial
+    assert run.timings["second"] < 0.2
+    scheduler.shutdown()
+
+
+def test_layer_waiting_past_its_timeout_for_a_worker_is_dropped():
+    scheduler = LayerScheduler([Layer("hog", sleeper(0.6)), Layer("starved", sleeper(0))],
+                               max_workers=1, queue_timeout=0.1)
+    run = scheduler.run("amor")
+    assert run.errors == {"starved": "No free worker within 0.1s"}
+    scheduler.shutdown()
+
+
+def test_run_async_matches_run():
+    scheduler = LayerScheduler([Layer("a", sleeper(0, 1)), Layer("b", sleeper(0.5), timeout=0.1),
+                                Layer("c", sleeper(0, 3), depends_on=["a"])])
+    run = asyncio.run(scheduler.run_async("amor"))
+    assert run.results["c"] == {"value": 3, "deps": ["a"]}
+    assert run.errors == {"b": "Timed out after 0.1s"}
+    scheduler.shutdown()
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        LayerScheduler([Layer("a", sleeper(0), depends_on=["b"]),
+                        Layer("b", sleeper(0), depends_on=["a"])])
+
+
+def test_layer_that_hangs_after_queueing_still_times_out():
+    scheduler = LayerScheduler([Layer("first", sleeper(0.2)),
+                                Layer("hangs", sleeper(2.0), timeout=0.3)], max_workers=1)
+    started = time.perf_counter()
+    run = scheduler.run("amor")
+    assert time.perf_counter() - started < 1.0
+    assert run.errors == {"hangs": "Timed out after 0.3s"}
+    scheduler.shutdown()
+
+
+def test_profiled_layers_do_not_overlap():
+    intervals = {}
+
+    def record(name):
+        def run(query):
+            start = time.perf_counter()
+            time.sleep(0.05)
+            intervals[name] = (start, time.perf_counter())
+            return {}
+        return run
+
+    scheduler = LayerScheduler([Layer("a", record("a")), Layer("b", record("b"))])
+    run = scheduler.run("amor", profile=True)
+    assert not run.partial and set(run.profiles) == {"a", "b"}
+    (a_start, a_end), (b_start, b_end) = intervals["a"], intervals["b"]
+    assert a_end <= b_start or b_end <= a_start
+    scheduler.shutdown()
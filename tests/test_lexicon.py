@@ -0,0 +1,46 @@
+import pytest
+
+from lexicon import Lexicon, load_lexicon
+
+RECORDS = [
+    {"form": "אֱלֹהִים", "lemma": "אֱלֹהִים", "strongs": "H430", "gloss": "God", "morph": "Ncmpa",
+     "domain": "deity"},
+    {"form": "ו", "lemma": "ו", "strongs": "H9001", "gloss": "and", "morph": "C"},
+    {"form": "ברא", "lemma": "ברא", "strongs": "H1254", "gloss": "create", "morph": "Vqp3ms"},
+    {"form": "ברא", "lemma": "ברא", "strongs": "H1254", "gloss": "create", "morph": "Vqv2ms"},
+    {"form": "λόγος", "lemma": "λόγος", "strongs": "G3056", "gloss": "word", "morph": "N-NSM"},
+]
+
+
+@pytest.fixture(scope="module")
+def lexicon(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("lexicon")
+    config = Lexicon.build(RECORDS).save(str(directory))
+    assert (config["num_lemmas"], config["num_entries"], config["num_forms"]) == (4, 5, 4)
+    return load_lexicon(str(directory))
+
+
+def test_attached_prefixes_split_off(lexicon):
+    tokens = lexicon.analyze("וֵאלֹהִים")
+    assert [token["token"] for token in tokens] == ["ו", "אלהים"]
+    assert tokens[1]["analyses"][0]["strongs"] == "H430"
+    assert tokens[1]["analyses"][0]["language"] == "Hebrew"
+
+
+def test_homographs_share_one_lemma(lexicon):
+    [token] = lexicon.analyze("ברא")
+    assert [analysis["morph"] for analysis in token["analyses"]] == ["Vqp3ms", "Vqv2ms"]
+    assert {analysis["gloss"] for analysis in token["analyses"]} == {"create"}
+
+
+def test_strings_are_stored_once(lexicon):
+    values = [lexicon.strings[i] for i in range(len(lexicon.strings))]
+    assert len(values) == len(set(values)) and "create" in values
+
+
+def test_unknown_words_are_not_split_into_letters(lexicon):
+    assert lexicon.analyze("λόγος ignotum") == [
+        {"token": "λογος", "language": "Greek", "analyses": lexicon.analyze("λόγος")[0]["analyses"]},
+        {"token": "ignotum", "language": None, "analyses": []}]
+    # A single known letter inside an unknown word is not a prefix
+    assert [token["token"] for token in lexicon.analyze("זוה")] == ["זוה"]
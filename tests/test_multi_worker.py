@@ -0,0 +1,59 @@
+import json
+import multiprocessing
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from load_test import make_queries, run_load
+from result_cache import ResultCache, SharedCacheTier
+
+
+def read_in_child(tier, key, results):
+    results.put(ResultCache(shared=tier).get(key))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(),
+                    reason="workers are forked")
+def test_shared_tier_created_before_fork_serves_forked_workers(tmp_path):
+    tier = SharedCacheTier(str(tmp_path / "results.sqlite"))
+    ResultCache(shared=tier).put("k", {"n": 1})  # opens a connection in the parent
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=read_in_child, args=(tier, "k", results))
+    child.start()
+    child.join(30)
+    assert child.exitcode == 0 and results.get(timeout=5) == {"n": 1}
+
+
+def test_query_mix_repeats_popular_queries():
+    assert make_queries(500, 0.0, seed=3) == make_queries(500, 0.0, seed=3)
+    assert len(set(make_queries(500, 0.0))) == 500
+    assert len(set(make_queries(500, 1.0))) <= 20
+
+
+class AnalyzeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["query"]
+        body = json.dumps({"status": "success", "query": query}).encode("utf-8")
+        self.send_response(200 if query else 400)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_load_run_reports_throughput():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AnalyzeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run = run_load("127.0.0.1", server.server_port, ["amor", ""], concurrency=2,
+                       duration=0.3)
+    finally:
+        server.shutdown()
+    assert run["requests"] > 0 and run["errors"] > 0
+    assert run["rps"] > 0 and run["p50_ms"] <= run["p95_ms"]
@@ -0,0 +1,50 @@
+import json
+
+from concept_index import ConceptIndex, load_concept_index
+from dataset_stream import write_jsonl
+from gematria import GematriaIndex, load_index
+from prepare_training_data import TrainingDataPreparator
+
+KJV = [{"ref": "Gen 1:1", "text": "In the beginning God created", "translation": "KJV"},
+       {"ref": "Gen 1:2", "text": "And the earth was void", "translation": "KJV"}]
+WLC = [{"ref": "Gen 1:1", "text": "בראשית ברא אלהים", "translation": "WLC"},
+       {"ref": "Gen 1:2", "text": "והארץ היתה תהו", "translation": "WLC"}]
+
+
+def test_indexes_are_built_from_ingested_shards(tmp_path):
+    raw = tmp_path / "raw"
+    write_jsonl(raw / "verses-00000.jsonl", KJV)
+    write_jsonl(raw / "verses-00001.jsonl", WLC)
+    (tmp_path / "references").mkdir()
+    (tmp_path / "references" / "cross_references.jsonl").write_text(
+        json.dumps({"from": "Gen 1:1", "to": "Gen 1:2"}) + "\n", encoding="utf-8")
+
+    preparator = TrainingDataPreparator(str(tmp_path))
+    assert preparator.build_gematria_index()["num_verses"] == 2
+    assert preparator.build_concept_index()["num_cross_references"] == 1
+
+    concepts = load_concept_index(str(tmp_path / "concepts"))
+    assert concepts.refs == ["Gen 1:1", "Gen 1:2"]
+    assert concepts.refs_for(concepts.occurrences(["beginning", "בראשית"])) == ["Gen 1:1"]
+    assert load_index(str(tmp_path / "gematria")).refs == ["Gen 1:1", "Gen 1:2"]
+
+
+def test_gematria_keeps_the_translation_with_letter_values():
+    index = GematriaIndex.build(KJV + WLC)
+    assert len(index) == 2
+    assert index.verse_values_for("Gen 1:1")["standard"] > 0
+    assert index.same_value("Gen 1:1") == ["Gen 1:1"]
+
+
+def test_concept_rows_merge_translations():
+    index = ConceptIndex.build(WLC + KJV, [{"from": "Gen 1:1", "to": "Gen 1:2"}])
+    assert len(index) == 2
+    assert list(index.postings_for("earth")) == [1]
+    assert index.related([index.row_of("Gen 1:1")]) == [
+        {"ref": "Gen 1:2", "depth": 1, "via": "Gen 1:1"}]
+
+
+def test_missing_corpus_skips_indexes(tmp_path):
+    preparator = TrainingDataPreparator(str(tmp_path))
+    assert preparator.build_gematria_index() is None
+    assert preparator.build_concept_index() is None
@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from resources import FAILED, PENDING, READY, ResourceRegistry
+
+
+def test_concurrent_first_calls_load_once():
+    loads = []
+    gate = threading.Event()
+
+    def loader():
+        loads.append(1)
+        gate.wait(5)
+        return "index"
+
+    registry = ResourceRegistry()
+    registry.register("index", loader)
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(registry.get, "index") for _ in range(4)]
+        gate.set()
+        assert [future.result() for future in futures] == ["index"] * 4
+    assert len(loads) == 1 and registry.status()["index"]["state"] == READY
+
+
+def test_failed_loads_are_reported_and_retried():
+    attempts = []
+
+    def loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise FileNotFoundError("not built yet")
+        return None  # optional data that is absent still counts as loaded
+
+    registry = ResourceRegistry()
+    registry.register("index", loader)
+    status = registry.warm_up()["index"]
+    assert status["state"] == FAILED and "FileNotFoundError" in status["error"]
+    assert not registry.ready()
+    assert registry.get("index") is None
+    assert registry.ready() and not registry.status()["index"]["available"]
+
+
+def test_pipeline_starts_cold_and_becomes_ready(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline()
+    try:
+        readiness = pipeline.readiness()
+        assert not readiness["ready"]
+        assert {status["state"] for status in readiness["resources"].values()} == {PENDING}
+        assert not (tmp_path / "outputs" / "results.db").exists()
+
+        pipeline.warm_up()
+        readiness = pipeline.readiness()
+        assert readiness["ready"] and all(readiness["layers"].values())
+    finally:
+        pipeline.store.close()
+        pipeline.scheduler.shutdown()
@@ -0,0 +1,56 @@
+import time
+
+from result_cache import ResultCache, SharedCacheTier, cache_key, normalize_query
+
+VERSION = {"pipeline": 1}
+
+
+def test_equivalent_queries_share_a_key():
+    assert normalize_query("  No   princípio\n") == "no princípio"
+    # NFD input (decomposed accent) normalizes to the same key as NFC
+    assert cache_key("Graça", VERSION) == cache_key("grac\u0327a ", VERSION)
+    assert cache_key("graça", VERSION) != cache_key("graça", {"pipeline": 2})
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = ResultCache(max_entries=2, ttl_seconds=None)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1} and cache.get("c") == {"n": 3}
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 1)
+
+
+def test_expired_entries_are_misses(monkeypatch):
+    cache = ResultCache(ttl_seconds=10)
+    cache.put("a", {"n": 1})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    ResultCache(disk_dir=str(tmp_path)).put("ab12", {"n": 1})
+    cache = ResultCache(disk_dir=str(tmp_path))
+    assert cache.get("ab12") == {"n": 1}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_shared_tier_serves_hits_across_instances(tmp_path):
+    db_path = str(tmp_path / "results.sqlite")
+    first = ResultCache(shared=SharedCacheTier(db_path))
+    second = ResultCache(shared=SharedCacheTier(db_path))
+    first.put("k", {"n": 1})
+    assert second.get("k") == {"n": 1}
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_shared_tier_prunes_the_oldest(tmp_path):
+    tier = SharedCacheTier(str(tmp_path / "results.sqlite"), max_entries=2, prune_every=3)
+    for i in range(3):
+        tier.put(f"k{i}", {"stored_at": float(i), "result": {"n": i}})
+    assert len(tier) == 2 and tier.get("k0") is None
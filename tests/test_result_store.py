@@ -0,0 +1,44 @@
+import logging
+import sqlite3
+
+import pytest
+
+from result_store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), batch_size=4)
+    yield store
+    store.close()
+
+
+def test_results_are_readable_before_and_after_the_write(store):
+    result_id = store.put({"query": "amor", "layers": []})
+    assert store.get(result_id)["query"] == "amor"
+    store.flush()
+    assert store.get(result_id) == {"query": "amor", "layers": []}
+    assert store.get("missing") is None
+
+
+def test_recent_and_top_queries(store):
+    ids = [store.put({"query": query}) for query in ("amor", "fé", "amor", "Amor")]
+    store.flush()
+    assert set(store.recent_ids(10)) == set(ids)
+    assert len(store.recent(2)) == 2
+    assert store.top_queries(1) == [("amor", 2)]
+
+
+def test_write_failures_are_logged(store, caplog):
+    logger = logging.getLogger("oracle_biblico.result_store")
+    logger.addHandler(caplog.handler)
+    try:
+        with sqlite3.connect(store.db_path) as conn:
+            conn.execute("DROP TABLE results")
+        store.put({"query": "amor"})
+        store.flush()
+    finally:
+        logger.removeHandler(caplog.handler)
+    assert store.write_errors == 1
+    assert "Result store write failed" in caplog.text
+    assert "no such table" in caplog.text
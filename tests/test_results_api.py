@@ -0,0 +1,37 @@
+import pytest
+
+from analysis_pipeline import BiblicalAnalysisPipeline
+from result_store import ResultStore
+
+
+@pytest.fixture
+def client(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pipeline = BiblicalAnalysisPipeline(store=ResultStore(str(tmp_path / "results.db")))
+    monkeypatch.setattr(server, "pipeline", pipeline)
+    yield server.app.test_client()
+    pipeline.store.close()
+    pipeline.scheduler.shutdown()
+
+
+def test_analyze_stores_results_off_the_request_path(client, server, tmp_path):
+    assert client.get("/api/results").status_code == 404
+    result_id = client.post("/api/analyze", json={"query": "aliança"}).get_json()["result_id"]
+    # Readable right away, before the writer thread has committed it
+    assert client.get(f"/api/results/{result_id}").get_json()["results"]["query"] == "aliança"
+    server.pipeline.store.flush()
+    assert not (tmp_path / "outputs" / "analysis_results.json").exists()
+
+    response = client.get(f"/api/results/{result_id}")
+    assert response.headers["Cache-Control"] == server.STORED_RESULT_CACHE_CONTROL
+    assert client.get(f"/api/results/{result_id}",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get("/api/results/missing").status_code == 404
+
+
+def test_recent_results(client, server):
+    for query in ("amor", "fé", "luz"):
+        client.post("/api/analyze", json={"query": query})
+    server.pipeline.store.flush()
+    assert client.get("/api/results").get_json()["results"]["query"] == "luz"
+    assert len(client.get("/api/results?limit=2").get_json()["results"]) == 2
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "k", compute) for _ in range(4)]
+        while flight.stats()["coalesced"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result is results[0][0] for result, _ in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", fail)
+    assert flight.do("k", lambda: 1) == (1, False)
+    assert flight.stats()["failures"] == 1
+
+
+def test_async_followers_survive_a_cancelled_leader():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do_async("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do_async("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == ("done", True)
+    assert flight.stats()["leaders"] == 1
@@ -0,0 +1,39 @@
+import numpy as np
+
+from dataset_stream import write_jsonl
+from token_dataset import ByteTokenizer, load_or_build, pack_documents
+
+
+def test_packing_keeps_order_and_splits_long_documents():
+    documents = [[1, 2], [3, 4, 5], [6], list(range(10, 19))]
+    assert list(pack_documents(documents, 4)) == [
+        [1, 2], [3, 4, 5, 6], [10, 11, 12, 13], [14, 15, 16, 17], [18]]
+
+
+def test_cache_is_reused_until_the_source_changes(tmp_path):
+    source, cache_dir = tmp_path / "training.jsonl", str(tmp_path / "tokens")
+    write_jsonl(source, [{"text": "amor"}, {"text": "fé"}, {"other": "skipped"}])
+    dataset = load_or_build(str(source), cache_dir, max_seq_length=8)
+    assert dataset.config["num_documents"] == 2 and dataset.tokens.dtype == np.uint16
+    tokenizer = ByteTokenizer()
+    assert tokenizer.decode(dataset[0]) == "amor"
+    assert list(dataset[1]) == [tokenizer.bos_id, *"fé".encode("utf-8"), tokenizer.eos_id]
+
+    assert load_or_build(str(source), cache_dir, max_seq_length=8).config == dataset.config
+    write_jsonl(source, [{"text": "graça e paz"}])
+    rebuilt = load_or_build(str(source), cache_dir, max_seq_length=8)
+    assert rebuilt.config["num_documents"] == 1 and len(rebuilt) == 2
+
+
+def test_batches_are_padded_and_deterministic(tmp_path):
+    source = tmp_path / "training.jsonl"
+    write_jsonl(source, [{"text": "x" * n} for n in range(1, 8)])
+    dataset = load_or_build(str(source), str(tmp_path / "tokens"), max_seq_length=6)
+    input_ids, lengths = dataset.batch([0, 1])
+    assert input_ids.shape == (2, 6) and list(lengths) == [3, 4]
+    assert input_ids[0, 3:].tolist() == [ByteTokenizer.pad_id] * 3
+
+    first = [ids.tolist() for ids, _ in dataset.batches(2, epoch=1, seed=7)]
+    assert first == [ids.tolist() for ids, _ in dataset.batches(2, epoch=1, seed=7)]
+    assert sorted(dataset.order(epoch=1, seed=7)) == list(range(len(dataset)))
+    assert sum(len(ids) for ids, _ in dataset.batches(2, drop_last=True)) == len(dataset) // 2 * 2
@@ -0,0 +1,96 @@
+import json
+
+import numpy as np
+import pytest
+
+from dataset_stream import iter_jsonl, write_jsonl
+from training_samples import (SampleGenerator, band_hashes, deduplicate, fingerprint,
+                              in_validation, plan_chunks)
+
+
+def corpus(books=("Gen", "Exod"), chapters=6, verses=8):
+    for book in books:
+        for chapter in range(1, chapters + 1):
+            for verse in range(1, verses + 1):
+                yield {"ref": f"{book} {chapter}:{verse}", "book": book, "chapter": chapter,
+                       "verse": verse, "translation": "T",
+                       "text": f"{book} palavra {chapter} e verso {verse} do capítulo {chapter}"}
+
+
+def test_case_and_punctuation_variants_are_exact_duplicates():
+    assert fingerprint("No princípio, era o Verbo!")[0] == fingerprint("no princípio era o verbo")[0]
+    assert fingerprint("no princípio era o verbo")[0] != fingerprint("no fim era o verbo")[0]
+
+
+def test_deduplicate_keeps_first_and_drops_near_copies():
+    texts = ["o senhor é o meu pastor e nada me faltará nos pastos verdejantes",
+             "O senhor é o meu pastor, e nada me faltará nos pastos verdejantes",
+             "o senhor é o meu pastor e nada me faltará nos pastos verdejantes hoje",
+             "no princípio criou deus os céus e a terra"]
+    prints = [fingerprint(text) for text in texts]
+    exact = np.array([p[0] for p in prints], dtype=np.uint64)
+    signatures = np.array([p[1] for p in prints])
+    bands = np.array([band_hashes(p[1], "verse") for p in prints])
+    keep, exact_dups, near_dups = deduplicate(exact, bands, signatures, threshold=0.8)
+    assert list(keep) == [True, False, False, True]
+    assert (exact_dups, near_dups) == (1, 1)
+
+
+def test_validation_split_is_deterministic():
+    groups = [f"Gen {chapter}" for chapter in range(1000)]
+    held_out = [group for group in groups if in_validation(group, 0.1)]
+    assert held_out == [group for group in groups if in_validation(group, 0.1)]
+    assert 50 < len(held_out) < 150
+
+
+def test_chunks_start_on_chapter_boundaries(tmp_path):
+    path = tmp_path / "verses.jsonl"
+    write_jsonl(path, corpus())
+    lines = path.read_bytes().splitlines(keepends=True)
+    ranges = plan_chunks(path, 2000)
+    assert len(ranges) > 2 and ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+    offsets, position = {}, 0
+    for line in lines:
+        offsets[position] = json.loads(line)
+        position += len(line)
+    for start, _ in ranges[1:]:
+        assert offsets[start]["verse"] == 1
+
+
+def generate(tmp_path, name, **options):
+    output = tmp_path / name
+    stats = SampleGenerator(str(tmp_path / "verses.jsonl"), str(output), **options).generate()
+    samples = [list(iter_jsonl(output / f"{split}_data.jsonl"))
+               for split in ("training", "validation")]
+    return stats, samples
+
+
+def test_a_single_file_is_split_across_workers(tmp_path):
+    write_jsonl(tmp_path / "verses.jsonl", corpus())
+    serial_stats, serial = generate(tmp_path, "serial", workers=1, validation_fraction=0.3)
+    stats, parallel = generate(tmp_path, "parallel", workers=2, chunk_bytes=2000,
+                               validation_fraction=0.3)
+    assert (serial_stats["parts"], stats["shards"]) == (1, 1) and stats["parts"] > 2
+    assert stats["generated"] == serial_stats["generated"]
+    assert parallel == serial
+    train_refs = {sample["metadata"]["ref"] for sample in parallel[0]}
+    assert parallel[1] and not train_refs & {sample["metadata"]["ref"] for sample in parallel[1]}
+
+
+def test_records_without_text_or_reference_are_skipped(tmp_path, capsys):
+    records = list(corpus(books=("Gen",), chapters=1, verses=3))
+    records += [{"text": "sem referência"}, {"ref": "Gen 1:9"},
+                {"book": "Gen", "chapter": 2, "verse": 1, "text": "só com livro e capítulo"},
+                {"ref": "Gen 3", "book": "Gen", "chapter": 3, "text": "sem número de verso"}]
+    write_jsonl(tmp_path / "verses.jsonl", records)
+    stats, (train, validation) = generate(tmp_path, "out", workers=1, kinds=["verse", "passage"],
+                                          validation_fraction=0)
+    assert stats["skipped"] == 2
+    assert "Skipped 2 verse records" in capsys.readouterr().out
+    refs = [sample["metadata"]["ref"] for sample in train]
+    assert "Gen 2:1" in refs and "Gen 3" in refs and "Gen 1:1-3" in refs
+
+
+def test_unknown_kinds_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SampleGenerator(str(tmp_path), str(tmp_path), kinds=["sermon"])
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from vector_index import HashingEmbedder, VectorIndex, _top_k
+
+TEXTS = ["In the beginning God created the heaven and the earth",
+         "And God said, Let there be light: and there was light",
+         "Melchizedek king of Salem brought forth bread and wine",
+         "The Lord is my shepherd; I shall not want"]
+DOCUMENTS = [{"text": text, "metadata": {"n": i}} for i, text in enumerate(TEXTS)]
+
+
+def random_index(n=2000, dimension=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return VectorIndex(HashingEmbedder(dimension), vectors,
+                       [{"text": str(i)} for i in range(n)])
+
+
+def test_top_k_is_ordered_and_bounded():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert _top_k(scores, 2).tolist() == [1, 3]
+    assert _top_k(scores, 10).tolist() == [1, 3, 2, 0]
+    assert _top_k(scores, 0).tolist() == []
+
+
+def test_search_ranks_the_matching_document_first():
+    index = VectorIndex.build(HashingEmbedder(256), iter(DOCUMENTS), batch_size=3)
+    assert len(index) == 4 and index.vectors.dtype == np.float32
+    hits = index.search("Let there be light", k=2)
+    assert [hit["id"] for hit in hits][:1] == [1]
+    assert hits[0]["metadata"] == {"n": 1} and hits[0]["score"] > hits[1]["score"]
+    assert VectorIndex.build(HashingEmbedder(16), []).search("light") == []
+
+
+def test_ivf_search_agrees_with_exact_search():
+    index = random_index()
+    queries = index.vectors[:20].astype(np.float32)
+    exact = [index.search_vector(q, k=1, approximate=False)[0]["id"] for q in queries]
+    with pytest.raises(ValueError):
+        index.search_vector(queries[0], approximate=True)
+    index.build_ivf(nlist=16)
+    assert index.list_offsets[-1] == len(index)
+    approximate = [index.search_vector(q, k=1, nprobe=4)[0]["id"] for q in queries]
+    assert approximate == exact == list(range(20))
+
+
+def test_ids_survive_ivf_reordering():
+    index = random_index(500)
+    index.build_ivf(nlist=8)
+    assert index.rows_for_ids([7, 10_000]).tolist()[1] == -1
+    assert index.documents_for_ids([7, 42]) == [{"text": "7"}, {"text": "42"}]
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_saved_index_is_memory_mapped(tmp_path, dtype):
+    index = random_index(300)
+    index.build_ivf(nlist=4)
+    config = index.save(str(tmp_path), dtype=dtype)
+    assert config["index_type"] == "ivf_flat" and config["vector_dtype"] == dtype
+
+    loaded = VectorIndex.load(str(tmp_path))
+    assert loaded.vectors.dtype == np.dtype(dtype) and not loaded.vectors.flags.writeable
+    assert loaded.ids.tolist() == index.ids.tolist()
+    assert list(loaded.documents) == index.documents
+    query = index.vectors[5].astype(np.float32)
+    assert loaded.search_vector(query, k=3)[0]["id"] == index.search_vector(query, k=3)[0]["id"]
+
+
+def test_empty_and_foreign_files(tmp_path):
+    VectorIndex.build(HashingEmbedder(16), []).save(str(tmp_path / "empty"))
+    assert len(VectorIndex.load(str(tmp_path / "empty"))) == 0
+
+    random_index(10).save(str(tmp_path / "bad"))
+    with open(tmp_path / "bad" / "index.bin", "r+b") as f:
+        f.write(b"NOTINDEX")
+    with pytest.raises(ValueError):
+        VectorIndex.load(str(tmp_path / "bad"))
+    with pytest.raises(ValueError):
+        random_index(10).save(str(tmp_path / "int8"), dtype="int8")